@@ -1,12 +1,13 @@
 """ Functions for analyzing board states and results of games """
-from typing import Dict, Iterable, Union
+from typing import Dict, Iterable, Optional, Union
 
 import chess  # type: ignore
 import numpy as np  # type: ignore
 
-from chessmate.constants.misc import PIECE_NAMES
+from chessmate.constants.misc import KNOWN_WIN, PIECE_NAMES
 from chessmate.constants.piece_values import (ConventionalPieceTable,
                                               ConventionalPieceValues)
+from chessmate.endgames import DEFAULT_BITBASE_DIR, Bitbase, load_bitbases
 from chessmate.utils import get_piece_value_from_table, is_valid_fen
 
 
@@ -197,3 +198,99 @@ class PiecePositionEvaluation(EvaluationFunction):
         self.evaluations[board.fen()] = val
 
         return val
+
+
+class BitbaseEvaluation(EvaluationFunction):
+    """
+    Wraps an evaluation function with KPK, KRK & KQK bitbases. Positions of
+    those endings are answered from bitbases: draws as 0 and wins as
+    KNOWN_WIN plus a bonus for progress, so that searches drive the lone
+    king to the edge & the pawn forward instead of shuffling. All other
+    positions are passed on to the wrapped function
+
+    Attributes:
+        evaluation_function (EvaluationFunction): evaluates positions not
+            in bitbases. Default=StandardEvaluation
+        bitbases (Dict[str, Bitbase]): bitbases by ending. Loaded from
+            cache, or generated on first use
+        bitbase_hits (int): number of evaluations answered by bitbases
+    """
+
+    def __init__(
+        self,
+        evaluation_function: Optional[EvaluationFunction] = None,
+        bitbase_dir: Optional[str] = DEFAULT_BITBASE_DIR,
+    ) -> None:
+        """
+        Args:
+            evaluation_function (Optional[EvaluationFunction]): evaluates
+                positions not in bitbases
+            bitbase_dir (Optional[str]): cache directory of bitbases. None
+                to generate without caching
+        """
+        super().__init__()
+        if evaluation_function is None:
+            evaluation_function = StandardEvaluation()
+        self.name: str = f"{evaluation_function.name} + Bitbases"
+        self.evaluation_function: EvaluationFunction = evaluation_function
+        self.piece_values = evaluation_function.piece_values
+        self.bitbases: Dict[str, Bitbase] = load_bitbases(bitbase_dir)
+        self.bitbase_hits: int = 0
+
+    def probe(self, board: chess.Board) -> Optional[int]:
+        """
+        Evaluates board from bitbases
+
+        Args:
+            board (chess.Board): board state to evaluate
+        Returns:
+            (Optional[int]): pro-white evaluation. None if board is not an
+                ending of bitbases
+        """
+        if chess.popcount(board.occupied) != 3:
+            return None
+        for bitbase in self.bitbases.values():
+            wins = bitbase.wins(board)
+            if wins is None:
+                continue
+            if not wins:
+                return 0
+            strong = chess.WHITE
+            if not board.pieces_mask(bitbase.piece_type, chess.WHITE):
+                strong = chess.BLACK
+            weak_king = board.king(not strong)
+            edge_distance = min(
+                chess.square_file(weak_king),
+                7 - chess.square_file(weak_king),
+                chess.square_rank(weak_king),
+                7 - chess.square_rank(weak_king),
+            )
+            king_distance = chess.square_distance(
+                board.king(strong), weak_king
+            )
+            progress = 10 * (3 - edge_distance) + 10 * (7 - king_distance)
+            if bitbase.piece_type == chess.PAWN:
+                pawn = chess.lsb(board.pieces_mask(chess.PAWN, strong))
+                progress = 10 * chess.square_rank(
+                    pawn if strong else chess.square_mirror(pawn)
+                )
+            value = KNOWN_WIN + progress
+            return value if strong == chess.WHITE else -value
+        return None
+
+    def evaluate(self, board: chess.Board) -> int:
+        """
+        Evaluate board from bitbases if covered, otherwise via. wrapped
+        evaluation function
+
+        Args:
+            board (chess.Board): board state to evaluate
+        Returns:
+            (int)
+        """
+        val = self.probe(board)
+        if val is None:
+            return self.evaluation_function.evaluate(board)
+        self.bitbase_hits += 1
+        self.evaluations[board.fen()] = val
+        return val
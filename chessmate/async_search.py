@@ -0,0 +1,122 @@
+""" Asyncio interface to engine searches running in worker threads """
+import asyncio
+from typing import List, NamedTuple, Optional
+
+import chess  # type: ignore
+
+
+class SearchUpdate(NamedTuple):
+    """ Progress of a search after each completed iteration. Score is from
+    perspective of side to move """
+
+    depth: int
+    score: Optional[float]
+    pv: List[chess.Move]
+    nodes: int
+
+
+class AsyncSearch:
+    """
+    Handle of an engine search running in a worker thread, created by
+    BaseEngine.search from within a running event loop. Iterating over the
+    handle streams updates of the search, and awaiting it returns the move
+    selected. Stopping the search returns the best move found so far
+
+    Attributes:
+        engine (engines.BaseEngine): engine searching
+        board (chess.Board): copy of board searched
+        latest (Optional[SearchUpdate]): last update received
+
+    Methods:
+        stop() -> None: requests search to stop early
+        cancel() -> chess.Move: stops search and waits for best move so far
+        done() -> bool: True once search is finished
+        result() -> chess.Move: waits for move selected by search
+    """
+
+    def __init__(
+        self,
+        engine,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+    ) -> None:
+        """
+        Starts search in default executor of running event loop
+
+        Args:
+            engine (engines.BaseEngine): engine to search with
+            board (chess.Board): board state to search. Copied, so caller
+                may keep playing on board
+            time_limit (Optional[float]): seconds allowed for search
+            node_limit (Optional[int]): nodes allowed for search
+        Raises:
+            RuntimeError: if no event loop is running
+        """
+        self._loop = asyncio.get_running_loop()
+        self._updates: asyncio.Queue = asyncio.Queue()
+        self.engine = engine
+        self.board: chess.Board = board.copy()
+        self.latest: Optional[SearchUpdate] = None
+        self._future = self._loop.run_in_executor(
+            None,
+            engine.search_move,
+            self.board,
+            time_limit,
+            node_limit,
+            self._report,
+        )
+        # Updates are queued through the loop in order, so end of search is
+        # always queued after the last update
+        self._future.add_done_callback(
+            lambda future: self._updates.put_nowait(None)
+        )
+
+    def __aiter__(self) -> "AsyncSearch":
+        return self
+
+    async def __anext__(self) -> SearchUpdate:
+        update = await self._updates.get()
+        if update is None:
+            raise StopAsyncIteration
+        self.latest = update
+        return update
+
+    def __await__(self):
+        return self.result().__await__()
+
+    def _report(self, update: SearchUpdate) -> None:
+        """ Passes update from worker thread to event loop """
+        self._loop.call_soon_threadsafe(self._updates.put_nowait, update)
+
+    def stop(self) -> None:
+        """ Requests search to stop. Returns immediately """
+        self.engine.stop()
+
+    def done(self) -> bool:
+        """ True once search is finished """
+        return self._future.done()
+
+    async def result(self) -> chess.Move:
+        """
+        Waits for search to finish. If the waiting task is cancelled, i.e
+        as client disconnected, search is stopped too
+
+        Returns:
+            (chess.Move): move selected by engine
+        """
+        try:
+            return await asyncio.shield(self._future)
+        except asyncio.CancelledError:
+            self.stop()
+            raise
+
+    async def cancel(self) -> chess.Move:
+        """
+        Stops search and waits for it to wind down
+
+        Returns:
+            (chess.Move): best move found so far
+        """
+        self.stop()
+        return await self.result()
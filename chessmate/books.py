@@ -0,0 +1,479 @@
+""" Opening book support for engines """
+import dbm
+import heapq
+import itertools
+import os
+import random
+import struct
+import tempfile
+from typing import (Callable, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
+
+import chess  # type: ignore
+import chess.pgn  # type: ignore
+import chess.polyglot  # type: ignore
+import numpy as np  # type: ignore
+
+from chessmate.async_search import AsyncSearch, SearchUpdate
+from chessmate.engines import BaseEngine
+from chessmate.stats import SearchStatistics
+
+# Layout of a Polyglot book entry. Entries are sorted by key
+POLYGLOT_DTYPE = np.dtype(
+    [("key", ">u8"), ("move", ">u2"), ("weight", ">u2"), ("learn", ">u4")]
+)
+# Win, draw & loss counts of a (position, move) pair in BookBuilder
+_COUNTS = struct.Struct("<III")
+# Weighted moves of BookBuilder before scaling, sorted into runs of up to
+# BOOK_CHUNK_ENTRIES entries when writing a book
+_RUN_DTYPE = np.dtype(
+    [("key", np.uint64), ("move", np.uint16), ("weight", np.uint64)]
+)
+BOOK_CHUNK_ENTRIES = 2 ** 20
+# Entries of a run read, and of a book written, at a time
+_RUN_READ_ENTRIES = 2 ** 12
+# Points of a win and a draw in book weights
+WIN_WEIGHT = 2
+DRAW_WEIGHT = 1
+
+
+def encode_polyglot_move(board: chess.Board, move: chess.Move) -> int:
+    """
+    Encodes move as in Polyglot books i.e to square, from square and
+    promotion piece in 6, 6 and 3 bits. Castling is encoded as king
+    capturing own rook
+
+    Args:
+        board (chess.Board): board state move is played from
+        move (chess.Move)
+    Returns:
+        (int)
+    """
+    to_square = move.to_square
+    if board.is_castling(move):
+        to_file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(to_file, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | move.from_square << 6 | promotion << 12
+
+
+class BookEngine(BaseEngine):
+    """
+    Wraps any engine with one or more Polyglot opening books. Positions in
+    book are answered instantly with a book move chosen at random weighted
+    by entry weights, and all other positions are passed on to the wrapped
+    engine. Books are memory mapped and binary searched by position key by
+    chess.polyglot, so only pages probed are read
+
+    Attributes:
+        name (str): name of engine, from wrapped engine
+        engine (BaseEngine): engine to move out of book
+        book_paths (List[str]): paths of Polyglot .bin books, probed in order
+            until one contains position
+        minimum_weight (int): entries weighted less are ignored. Default=1
+        max_book_ply (Optional[int]): half moves played from start of game
+            after which books are no longer probed. None for no limit.
+            Default=None
+        random (random.Random): source of randomness of book move choice.
+            Seed for reproducible games
+        book_hits (int): number of moves played from book
+        book_misses (int): number of moves passed on to wrapped engine
+        stats (Optional[SearchStatistics]): statistics of wrapped engine's
+            last search. None if last move was played from book
+
+    Methods:
+        book_move(board) -> Optional[chess.Move]: weighted book move, if
+            position is in book
+        hit_rate() -> float: share of moves played from book
+        close(): closes books
+    """
+
+    def __init__(
+        self,
+        engine: BaseEngine,
+        book_paths: Union[str, List[str]],
+        minimum_weight: int = 1,
+        max_book_ply: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            engine (BaseEngine): engine to move out of book
+            book_paths (Union[str, List[str]]): path(s) of Polyglot books
+            minimum_weight (int): entries weighted less are ignored
+            max_book_ply (Optional[int]): last ply to probe books at
+            seed (Optional[int]): seed of book move choice
+        """
+        super().__init__()
+        if isinstance(book_paths, str):
+            book_paths = [book_paths]
+        self.name: str = f"{engine.name} + Book"
+        self.engine: BaseEngine = engine
+        self.book_paths: List[str] = list(book_paths)
+        self.minimum_weight: int = minimum_weight
+        self.max_book_ply: Optional[int] = max_book_ply
+        self.random: random.Random = random.Random(seed)
+        self.book_hits: int = 0
+        self.book_misses: int = 0
+        self._book_hit: bool = False
+        self._readers: List[chess.polyglot.MemoryMappedReader] = [
+            chess.polyglot.open_reader(path) for path in self.book_paths
+        ]
+
+    def __repr__(self):
+        """ Print out current state of engine, including book usage """
+        return f"""{super().__repr__()}
+                book hits: {self.book_hits}
+                book misses: {self.book_misses}"""
+
+    @property
+    def stats(self) -> Optional[SearchStatistics]:
+        """ Statistics of wrapped engine, if it searched last move """
+        if self._book_hit:
+            return None
+        return getattr(self.engine, "stats", None)
+
+    def _book_entries(
+        self, board: chess.Board
+    ) -> List[chess.polyglot.Entry]:
+        """
+        Entries of position in first book containing it, unless past
+        max_book_ply
+
+        Args:
+            board (chess.Board): board state to probe
+        Returns:
+            (List[chess.polyglot.Entry]): empty if position not in book
+        """
+        if self.max_book_ply is not None and board.ply() > self.max_book_ply:
+            return []
+        for reader in self._readers:
+            entries = list(
+                reader.find_all(board, minimum_weight=self.minimum_weight)
+            )
+            if entries:
+                return entries
+        return []
+
+    def book_move(self, board: chess.Board) -> Optional[chess.Move]:
+        """
+        Chooses book move at random, weighted by entry weights, from first
+        book containing position
+
+        Args:
+            board (chess.Board): board state to move from
+        Returns:
+            (Optional[chess.Move]): book move. None if position not in book
+        """
+        entries = self._book_entries(board)
+        if not entries:
+            return None
+        return self.random.choices(
+            [entry.move for entry in entries],
+            weights=[entry.weight for entry in entries],
+        )[0]
+
+    def evaluate(self, board: chess.Board) -> None:
+        """
+        Maps book moves of position to their weights in legal_moves, or has
+        wrapped engine evaluate position if not in book
+
+        Args:
+            board (chess.Board): board state to evaluate
+        """
+        self.reset_move_variables()
+        entries = self._book_entries(board)
+        self._book_hit = bool(entries)
+        if not entries:
+            self.engine.evaluate(board)
+            return
+        for entry in entries:
+            self.legal_moves[entry.move] = entry.weight
+
+    def move(self, board: chess.Board) -> chess.Move:
+        """
+        Plays book move if position is in book, otherwise move of wrapped
+        engine
+
+        Args:
+            board (chess.Board): board state to move from
+        Returns:
+            (chess.Move)
+        """
+        return self.search_move(board)
+
+    def search_move(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        callback: Optional[Callable[[SearchUpdate], None]] = None,
+    ) -> chess.Move:
+        """
+        Plays book move if position is in book, otherwise has wrapped engine
+        search position, passing on limits & callback
+
+        Args:
+            board (chess.Board): board state to move from
+            time_limit (Optional[float]): seconds allowed for search
+            node_limit (Optional[int]): nodes allowed for search
+            callback (Optional[Callable[[SearchUpdate], None]]): called with
+                progress of search
+        Returns:
+            (chess.Move)
+        """
+        move = self.book_move(board)
+        self._book_hit = move is not None
+        if move is not None:
+            self.book_hits += 1
+        else:
+            self.book_misses += 1
+            if time_limit is None and node_limit is None and callback is None:
+                move = self.engine.move(board)
+            else:
+                move = self.engine.search_move(
+                    board, time_limit, node_limit, callback
+                )
+        self.material_difference.append(
+            self.evaluation_function.evaluate(board)
+        )
+        return move
+
+    def search(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+    ) -> AsyncSearch:
+        """ Starts move selection in worker thread. See BaseEngine.search """
+        self.engine._stop_requested = False
+        return super().search(board, time_limit, node_limit)
+
+    def stop(self) -> None:
+        """ Requests search of wrapped engine to stop """
+        super().stop()
+        self.engine.stop()
+
+    def hit_rate(self) -> float:
+        """ Share of moves played from book """
+        total = self.book_hits + self.book_misses
+        return self.book_hits / total if total else 0.0
+
+    def reset_move_variables(self) -> None:
+        """ Resets variables of wrapper & wrapped engine at end of move """
+        super().reset_move_variables()
+        self.engine.reset_move_variables()
+
+    def reset_game_variables(self) -> None:
+        """ Resets variables of wrapper & wrapped engine at end of game """
+        super().reset_game_variables()
+        self.engine.reset_game_variables()
+
+    def close(self) -> None:
+        """ Closes books """
+        for reader in self._readers:
+            reader.close()
+        self._readers = []
+
+
+class BookBuilder:
+    """
+    Aggregates win, draw and loss counts of each (position, move) pair over
+    played games in an on-disk dbm hash, so that archives larger than
+    memory can be streamed in, and writes a Polyglot book from the counts.
+    Counts are from perspective of side playing move. Book weight of a move
+    is WIN_WEIGHT * wins + DRAW_WEIGHT * draws, so moves that only lost
+    aren't played
+
+    Attributes:
+        path (str): path of dbm hash. Reopening path resumes counts
+        max_ply (int): half moves of each game counted. Default=20
+        games (int): number of games counted since opened
+
+    Methods:
+        add_game(game): counts moves of finished game
+        add_games(games): counts moves of each game
+        add_pgn(path): counts moves of each game in PGN file
+        counts(board, move) -> Tuple[int, int, int]: wins, draws & losses
+        write_book(path, min_games): writes Polyglot book
+        close(): closes dbm hash
+    """
+
+    def __init__(self, path: str, max_ply: int = 20) -> None:
+        """
+        Args:
+            path (str): path of dbm hash, created if missing
+            max_ply (int): half moves of each game counted
+        """
+        self.path: str = path
+        self.max_ply: int = max_ply
+        self.games: int = 0
+        self._db = dbm.open(path, "c")
+
+    @staticmethod
+    def _key(board: chess.Board, move: chess.Move) -> bytes:
+        """ dbm key of (position, move) pair """
+        return struct.pack(
+            ">QH",
+            chess.polyglot.zobrist_hash(board),
+            encode_polyglot_move(board, move),
+        )
+
+    def add_game(self, game: chess.pgn.Game) -> None:
+        """
+        Counts moves of game from perspective of side playing each move.
+        Games without a result i.e unfinished are skipped
+
+        Args:
+            game (chess.pgn.Game): game with Result header
+        """
+        result = game.headers.get("Result", "*")
+        if result not in ("1-0", "0-1", "1/2-1/2"):
+            return
+        board = game.board()
+        for ply, move in enumerate(game.mainline_moves()):
+            if ply >= self.max_ply:
+                break
+            if result == "1/2-1/2":
+                outcome = 1
+            elif (result == "1-0") == (board.turn == chess.WHITE):
+                outcome = 0
+            else:
+                outcome = 2
+            key = self._key(board, move)
+            counts = list(_COUNTS.unpack(self._db.get(key, bytes(12))))
+            counts[outcome] += 1
+            self._db[key] = _COUNTS.pack(*counts)
+            board.push(move)
+        self.games += 1
+
+    def add_games(self, games: Iterable[chess.pgn.Game]) -> None:
+        """
+        Counts moves of each game, i.e ChessPlayground.game_pgns
+
+        Args:
+            games (Iterable[chess.pgn.Game])
+        """
+        for game in games:
+            self.add_game(game)
+
+    def add_pgn(self, path: str) -> None:
+        """
+        Streams games of PGN file into counts
+
+        Args:
+            path (str): path of PGN file
+        """
+        with open(path) as pgn:
+            game = chess.pgn.read_game(pgn)
+            while game is not None:
+                self.add_game(game)
+                game = chess.pgn.read_game(pgn)
+
+    def counts(
+        self, board: chess.Board, move: chess.Move
+    ) -> Tuple[int, int, int]:
+        """
+        Win, draw and loss counts of move from board
+
+        Args:
+            board (chess.Board): board state move is played from
+            move (chess.Move)
+        Returns:
+            (Tuple[int, int, int]): wins, draws & losses of side playing move
+        """
+        return _COUNTS.unpack(self._db.get(self._key(board, move), bytes(12)))
+
+    def _db_keys(self) -> Iterator[bytes]:
+        """ Keys of dbm hash, read one at a time where backend allows """
+        if hasattr(self._db, "firstkey"):
+            # dbm.gnu
+            key = self._db.firstkey()
+            while key is not None:
+                yield key
+                key = self._db.nextkey(key)
+        else:
+            yield from self._db.keys()
+
+    def _write_runs(self, directory: str, min_games: int) -> List[str]:
+        """
+        Writes counted moves as runs of up to BOOK_CHUNK_ENTRIES entries,
+        each sorted by key & move, so that no more than a run is held in
+        memory
+
+        Args:
+            directory (str): directory of run files
+            min_games (int): moves played in fewer games are left out
+        Returns:
+            (List[str]): paths of run files
+        """
+        paths: List[str] = []
+        run = np.zeros(BOOK_CHUNK_ENTRIES, dtype=_RUN_DTYPE)
+        size = 0
+
+        def flush():
+            chunk = np.sort(run[:size], order=["key", "move"])
+            paths.append(os.path.join(directory, f"{len(paths)}.run"))
+            chunk.tofile(paths[-1])
+
+        for key in self._db_keys():
+            wins, draws, losses = _COUNTS.unpack(self._db[key])
+            weight = WIN_WEIGHT * wins + DRAW_WEIGHT * draws
+            if weight and wins + draws + losses >= min_games:
+                run[size] = struct.unpack(">QH", key) + (weight,)
+                size += 1
+                if size == BOOK_CHUNK_ENTRIES:
+                    flush()
+                    size = 0
+        if size:
+            flush()
+        return paths
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Tuple[int, int, int]]:
+        """ Entries of run file, read in pages """
+        run = np.memmap(path, dtype=_RUN_DTYPE, mode="r")
+        for start in range(0, len(run), _RUN_READ_ENTRIES):
+            yield from run[start : start + _RUN_READ_ENTRIES].tolist()
+
+    def write_book(self, path: str, min_games: int = 1) -> int:
+        """
+        Writes Polyglot book of counted moves. Counts are written in sorted
+        runs which are then merged into the book, so memory used is bounded
+        by BOOK_CHUNK_ENTRIES rather than the number of moves counted.
+        Weights of each position are scaled down together if any exceeds
+        the 16 bit maximum
+
+        Args:
+            path (str): path of book
+            min_games (int): moves played in fewer games are left out.
+                Default=1
+        Returns:
+            (int): number of entries written
+        """
+        book = np.zeros(_RUN_READ_ENTRIES, dtype=POLYGLOT_DTYPE)
+        written, size = 0, 0
+        with tempfile.TemporaryDirectory(
+            dir=os.path.dirname(os.path.abspath(path))
+        ) as directory, open(path, "wb") as file:
+            runs = [
+                self._read_run(run_path)
+                for run_path in self._write_runs(directory, min_games)
+            ]
+            merged = heapq.merge(*runs)
+            for key, moves in itertools.groupby(merged, lambda e: e[0]):
+                moves = list(moves)
+                # Scale weights of positions whose heaviest move overflows
+                scale = max(max(weight for _, _, weight in moves) / 65535, 1)
+                for _, move, weight in moves:
+                    book[size] = (key, move, max(round(weight / scale), 1), 0)
+                    size += 1
+                    if size == len(book):
+                        book.tofile(file)
+                        written, size = written + size, 0
+            book[:size].tofile(file)
+        return written + size
+
+    def close(self) -> None:
+        """ Closes dbm hash, flushing counts to disk """
+        self._db.close()
@@ -21,3 +21,47 @@ PIECE_INDEXING = {
     "K": 10,
     "k": 11,
 }
+
+# Deepest iteration attempted when MiniMax searches under a time/node budget
+MAX_SEARCH_DEPTH = 64
+
+# Bound types of values stored in transposition table entries. Searches
+# that fail high only prove a lower bound & searches that fail low only
+# prove an upper bound
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Replacement schemes of transposition table slots
+DEPTH_PREFERRED = "depth-preferred"
+ALWAYS_REPLACE = "always-replace"
+TWO_TIER = "two-tier"
+
+# Parallel search modes of MiniMax with more than one worker
+LAZY_SMP = "lazy-smp"
+ROOT_SPLIT = "root-split"
+
+# Root search drivers of MiniMax. MTDF converges on the value of each
+# iteration by null window searches, relying on the transposition table to
+# keep bounds between them
+ALPHA_BETA = "alpha-beta"
+MTDF = "mtdf"
+
+# Value of a position proven won by endgame tablebases, beyond any material
+# difference. Reduced by distance from root so quicker wins are preferred
+TABLEBASE_WIN = 50000
+
+# Value of a position known won from a bitbase. Below TABLEBASE_WIN, as
+# bitbases don't know distance to mate
+KNOWN_WIN = 10000
+
+# Child selection rules of MCTS
+UCT = "uct"
+PUCT = "puct"
+
+# Outcomes of proof number search for a forced mate
+PROVEN = "proven"
+DISPROVEN = "disproven"
+UNPROVEN = "unproven"
+# Proof & disproof number of solved positions
+PROOF_INFINITY = 2 ** 31 - 1
@@ -0,0 +1,515 @@
+""" Endgame tablebases & bitbases for engines & simulations """
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+import chess  # type: ignore
+import chess.polyglot  # type: ignore
+import chess.syzygy  # type: ignore
+import numpy as np  # type: ignore
+
+from chessmate.constants.misc import TABLEBASE_WIN
+
+# Endings covered by bitbases, mapped to the piece of the side with the
+# extra piece. Generated in order, as KPK promotes into KQK & KRK
+BITBASE_ENDINGS = {"KQK": chess.QUEEN, "KRK": chess.ROOK, "KPK": chess.PAWN}
+BITBASE_VERSION = 1
+DEFAULT_BITBASE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "chessmate"
+)
+# Positions of an ending per side to move, indexed by strong king, strong
+# piece & weak king squares
+_NUM_POSITIONS = 64 ** 3
+
+
+class Tablebase:
+    """
+    Probes local Syzygy WDL & DTZ tables through chess.syzygy. Positions with
+    more pieces than max_pieces, or with castling rights, are never probed.
+    Probes are cached by position key in an LRU cache, since searches
+    reach the same endgame positions over and over and chess.syzygy
+    decompresses table blocks on each probe
+
+    WDL values are from perspective of side to move: 2 win, 1 win that is
+    drawn by the fifty move rule, 0 draw, -1 loss that is drawn by the fifty
+    move rule, -2 loss
+
+    Attributes:
+        directories (List[str]): directories of .rtbw & .rtbz files
+        max_pieces (int): most pieces, kings included, of positions probed.
+            Defaults to most pieces of tables found
+        cache_size (int): number of probe results cached. Default=2**16
+        probes (int): number of probes, including cached ones
+        cache_hits (int): number of probes answered from cache
+
+    Methods:
+        probe_wdl(board) -> Optional[int]: WDL of side to move
+        probe_dtz(board) -> Optional[int]: DTZ of side to move
+        value(board, ply) -> Optional[float]: search value of position
+        best_move(board) -> Optional[chess.Move]: move keeping best WDL,
+            converting fastest
+        result(board) -> Optional[str]: game result under perfect play
+        close(): closes tables
+    """
+
+    def __init__(
+        self,
+        directories: Union[str, List[str]],
+        max_pieces: Optional[int] = None,
+        cache_size: int = 2 ** 16,
+    ) -> None:
+        """
+        Args:
+            directories (Union[str, List[str]]): directory(s) of Syzygy tables
+            max_pieces (Optional[int]): most pieces of positions probed
+            cache_size (int): number of probe results cached
+        """
+        if isinstance(directories, str):
+            directories = [directories]
+        self.directories: List[str] = list(directories)
+        self.cache_size: int = cache_size
+        self.probes: int = 0
+        self.cache_hits: int = 0
+        self._open()
+        if max_pieces is None:
+            # Tables are named by their pieces, i.e KQvK
+            max_pieces = max(
+                (len(name) - 1 for name in self._tables.wdl), default=0
+            )
+        self.max_pieces: int = max_pieces
+
+    def _open(self) -> None:
+        """ Opens tables of directories & empties cache """
+        self._tables = chess.syzygy.Tablebase()
+        for directory in self.directories:
+            self._tables.add_directory(directory)
+        self._cache: "OrderedDict[Tuple[str, int], Optional[int]]" = (
+            OrderedDict()
+        )
+
+    def __getstate__(self) -> dict:
+        """ Tables are memory mapped files, so are reopened on unpickling
+        i.e in worker processes of parallel searches """
+        state = self.__dict__.copy()
+        del state["_tables"], state["_cache"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    def probeable(self, board: chess.Board) -> bool:
+        """ True if board has few enough pieces & no castling rights """
+        return (
+            chess.popcount(board.occupied) <= self.max_pieces
+            and not board.castling_rights
+        )
+
+    def _probe(self, kind: str, board: chess.Board) -> Optional[int]:
+        """
+        Probes WDL or DTZ table through cache
+
+        Args:
+            kind (str): "wdl" or "dtz"
+            board (chess.Board)
+        Returns:
+            (Optional[int]): None if not probeable or table is missing
+        """
+        if not self.probeable(board):
+            return None
+        self.probes += 1
+        key = (kind, chess.polyglot.zobrist_hash(board))
+        if key in self._cache:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if kind == "wdl":
+            result = self._tables.get_wdl(board)
+        else:
+            result = self._tables.get_dtz(board)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def probe_wdl(self, board: chess.Board) -> Optional[int]:
+        """
+        Win/draw/loss of side to move
+
+        Args:
+            board (chess.Board)
+        Returns:
+            (Optional[int]): one of -2..2. None if not in tables
+        """
+        return self._probe("wdl", board)
+
+    def probe_dtz(self, board: chess.Board) -> Optional[int]:
+        """
+        Distance to zeroing move i.e capture or pawn move of side to move,
+        positive when winning and negative when losing
+
+        Args:
+            board (chess.Board)
+        Returns:
+            (Optional[int]): plies to zeroing move. None if not in tables
+        """
+        return self._probe("dtz", board)
+
+    def value(self, board: chess.Board, ply: int = 0) -> Optional[float]:
+        """
+        Value of position for search, from perspective of side to move.
+        Wins & losses drawn by the fifty move rule are draws
+
+        Args:
+            board (chess.Board)
+            ply (int): distance from root of search
+        Returns:
+            (Optional[float]): TABLEBASE_WIN - ply if won, negated if lost,
+                0 if drawn. None if not in tables
+        """
+        wdl = self.probe_wdl(board)
+        if wdl is None:
+            return None
+        if wdl == 2:
+            return TABLEBASE_WIN - ply
+        if wdl == -2:
+            return -(TABLEBASE_WIN - ply)
+        return 0
+
+    def best_move(self, board: chess.Board) -> Optional[chess.Move]:
+        """
+        Chooses move keeping best WDL of side to move. Winning side plays
+        mate, then zeroing moves, then moves closest to zeroing. Losing side
+        plays moves furthest from zeroing
+
+        Args:
+            board (chess.Board): board state to move from
+        Returns:
+            (Optional[chess.Move]): None if any position after a legal move
+                is not in tables
+        """
+        if not self.probeable(board):
+            return None
+        best_rank, best_move = None, None
+        for move in board.legal_moves:
+            zeroing = board.is_zeroing(move)
+            board.push(move)
+            mate = board.is_checkmate()
+            wdl, dtz = self.probe_wdl(board), self.probe_dtz(board)
+            board.pop()
+            if wdl is None or dtz is None:
+                return None
+            # WDL & DTZ after move are from perspective of opponent
+            wdl = -wdl
+            if wdl > 0:
+                tiebreak = (mate, zeroing, -abs(dtz))
+            elif wdl < 0:
+                tiebreak = (False, not zeroing, abs(dtz))
+            else:
+                tiebreak = (False, False, 0)
+            rank = (wdl, tiebreak)
+            if best_rank is None or rank > best_rank:
+                best_rank, best_move = rank, move
+        return best_move
+
+    def result(self, board: chess.Board) -> Optional[str]:
+        """
+        Result of game under perfect play, i.e for adjudicating games
+
+        Args:
+            board (chess.Board)
+        Returns:
+            (Optional[str]): "1-0", "0-1" or "1/2-1/2". None if not in tables
+        """
+        wdl = self.probe_wdl(board)
+        if wdl is None:
+            return None
+        if abs(wdl) < 2:
+            return "1/2-1/2"
+        return "1-0" if (wdl > 0) == (board.turn == chess.WHITE) else "0-1"
+
+    def close(self) -> None:
+        """ Closes tables """
+        self._tables.close()
+
+
+def _king_steps() -> np.ndarray:
+    """ Targets of king moves from each square in 8 directions, -1 off
+    board, shape (8, 64) """
+    squares = np.arange(64)
+    files, ranks = squares & 7, squares >> 3
+    steps = np.full((8, 64), -1)
+    deltas = [(df, dr) for df in (-1, 0, 1) for dr in (-1, 0, 1) if df or dr]
+    for i, (df, dr) in enumerate(deltas):
+        on_board = (
+            (files + df >= 0)
+            & (files + df < 8)
+            & (ranks + dr >= 0)
+            & (ranks + dr < 8)
+        )
+        steps[i, on_board] = squares[on_board] + df + 8 * dr
+    return steps
+
+
+def generate_bitbase(
+    piece_type: chess.PieceType,
+    promotions: Optional[List[np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Generates bitbase of king & piece of white against lone black king.
+    Rather than unmoving one position at a time, all legal moves are
+    generated once as arrays of (position, child) edges, then wins are
+    propagated backwards over the edges for the whole table at once until
+    they no longer change: white to move wins if any move reaches a won
+    position, black to move is lost if mated or every move reaches a won
+    position. Captures of the piece & stalemates are draws
+
+    Args:
+        piece_type (chess.PieceType): QUEEN, ROOK or PAWN
+        promotions (Optional[List[np.ndarray]]): bitbases pawns promote
+            into, required for PAWN i.e of KQK & KRK
+    Returns:
+        (np.ndarray): bool of shape (2, 64 ** 3), True where white wins,
+            indexed by [side to move (0 white), position index]
+    """
+    between = np.array(
+        [[chess.between(a, b) for b in chess.SQUARES] for a in chess.SQUARES],
+        dtype=np.uint64,
+    )
+    squares = np.arange(64)
+    files, ranks = squares & 7, squares >> 3
+    file_diff = np.abs(files[:, None] - files[None, :])
+    rank_diff = np.abs(ranks[:, None] - ranks[None, :])
+    adjacent = np.maximum(file_diff, rank_diff) == 1
+    aligned = (file_diff == 0) ^ (rank_diff == 0)
+    if piece_type == chess.QUEEN:
+        aligned |= (file_diff == rank_diff) & (file_diff > 0)
+    pawn_attacks = (file_diff == 1) & (ranks[None, :] - ranks[:, None] == 1)
+    king_steps = _king_steps()
+
+    index = np.arange(_NUM_POSITIONS)
+    wk, wx, bk = index >> 12, (index >> 6) & 63, index & 63
+
+    def clear(a, b, blocker):
+        """ True where no blocker is between a and b """
+        return ((between[a, b] >> blocker.astype(np.uint64)) & 1) == 0
+
+    def attacks(source, target):
+        """ True where white piece attacks target, white king blocking """
+        if piece_type == chess.PAWN:
+            return pawn_attacks[source, target]
+        return aligned[source, target] & clear(source, target, wk)
+
+    valid = (wk != wx) & (wk != bk) & (wx != bk) & ~adjacent[wk, bk]
+    if piece_type == chess.PAWN:
+        valid &= (ranks[wx] > 0) & (ranks[wx] < 7)
+    check = valid & attacks(wx, bk)
+    valid_white = valid & ~check
+
+    # White moves, from positions with white to move into black to move
+    parents, children = [], []
+    for step in king_steps:
+        target = step[wk]
+        legal = valid_white & (target >= 0) & (target != wx)
+        legal &= ~adjacent[target, bk] & (target != bk)
+        parents.append(index[legal])
+        children.append((target[legal] << 12) | (wx[legal] << 6) | bk[legal])
+    promoted = np.zeros(_NUM_POSITIONS, dtype=bool)
+    if piece_type == chess.PAWN:
+        # Wrapped pushes are only from invalid positions, masked below
+        push = (wx + 8) & 63
+        free = (push != wk) & (push != bk)
+        double = (wx + 16) & 63
+        targets = [
+            (push, valid_white & free),
+            (
+                double,
+                valid_white
+                & free
+                & (ranks[wx] == 1)
+                & (double != wk)
+                & (double != bk),
+            ),
+        ]
+    else:
+        targets = [
+            (
+                np.full(_NUM_POSITIONS, target),
+                valid_white
+                & aligned[wx, target]
+                & (target != wk)
+                & (target != bk)
+                & clear(wx, target, wk)
+                & clear(wx, target, bk),
+            )
+            for target in range(64)
+        ]
+    for target, legal in targets:
+        child = (wk << 12) | (target << 6) | bk
+        if piece_type == chess.PAWN:
+            # Promotions are looked up in bitbases of promoted piece
+            promoting = legal & (ranks[target] == 7)
+            for bitbase in promotions:
+                promoted[promoting] |= bitbase[1, child[promoting]]
+            legal &= ~promoting
+        parents.append(index[legal])
+        children.append(child[legal])
+    white_parents = np.concatenate(parents)
+    white_children = np.concatenate(children)
+
+    # Black moves, from positions with black to move into white to move.
+    # Capturing an undefended piece draws
+    parents, children, captures = [], [], []
+    for step in king_steps:
+        target = step[bk]
+        legal = valid & (target >= 0) & ~adjacent[target, wk]
+        capture = target == wx
+        legal &= capture & ~adjacent[wx, wk] | ~capture & ~attacks(wx, target)
+        parents.append(index[legal])
+        children.append((wk[legal] << 12) | (wx[legal] << 6) | target[legal])
+        captures.append(capture[legal])
+    black_parents = np.concatenate(parents)
+    black_children = np.concatenate(children)
+    black_captures = np.concatenate(captures)
+    moves = np.bincount(black_parents, minlength=_NUM_POSITIONS)
+    mated = check & (moves == 0)
+
+    white_wins = promoted & valid_white
+    black_loses = mated.copy()
+    while True:
+        white_wins[white_parents[black_loses[white_children]]] = True
+        escapes = np.bincount(
+            black_parents[~white_wins[black_children] | black_captures],
+            minlength=_NUM_POSITIONS,
+        )
+        lost = mated | (moves > 0) & (escapes == 0)
+        if np.array_equal(lost, black_loses):
+            break
+        black_loses = lost
+    return np.stack([white_wins, black_loses])
+
+
+class Bitbase:
+    """
+    Win/draw bitbase of king & piece against lone king, from perspective of
+    the side with the piece, packed 8 positions to a byte. Probes are
+    constant time index computations, answering the ending without search.
+    Bitbases are generated on first use and cached to disk
+
+    Attributes:
+        ending (str): one of BITBASE_ENDINGS i.e "KPK"
+        piece_type (chess.PieceType): piece of strong side
+        bits (np.ndarray): packed uint8 bits, indexed by side to move (0 for
+            strong side) then position
+
+    Methods:
+        load(ending, directory, bitbases) -> Bitbase: loads from cache or
+            generates
+        wins(board) -> Optional[bool]: True if side with piece wins
+    """
+
+    def __init__(self, ending: str, bits: np.ndarray) -> None:
+        """
+        Args:
+            ending (str): one of BITBASE_ENDINGS
+            bits (np.ndarray): packed bits as from generate_bitbase
+        """
+        self.ending: str = ending
+        self.piece_type: chess.PieceType = BITBASE_ENDINGS[ending]
+        self.bits: np.ndarray = bits
+
+    @classmethod
+    def load(
+        cls,
+        ending: str,
+        directory: Optional[str] = DEFAULT_BITBASE_DIR,
+        bitbases: Optional[Dict[str, "Bitbase"]] = None,
+    ) -> "Bitbase":
+        """
+        Loads bitbase cached in directory, or generates & caches it
+
+        Args:
+            ending (str): one of BITBASE_ENDINGS
+            directory (Optional[str]): cache directory. None to not cache
+            bitbases (Optional[Dict[str, Bitbase]]): KQK & KRK bitbases, so
+                KPK doesn't regenerate them
+        Returns:
+            (Bitbase)
+        Raises:
+            ValueError: if ending has no bitbase
+        """
+        if ending not in BITBASE_ENDINGS:
+            raise ValueError(f"No bitbase for ending {ending}")
+        path = None
+        if directory is not None:
+            path = os.path.join(directory, f"{ending}-v{BITBASE_VERSION}.npy")
+            if os.path.exists(path):
+                return cls(ending, np.load(path))
+
+        promotions = None
+        if BITBASE_ENDINGS[ending] == chess.PAWN:
+            bitbases = bitbases or {}
+            promotions = [
+                (
+                    bitbases.get(promoted)
+                    or cls.load(promoted, directory, bitbases)
+                ).unpack()
+                for promoted in ("KQK", "KRK")
+            ]
+        bits = np.packbits(
+            generate_bitbase(BITBASE_ENDINGS[ending], promotions)
+        )
+        if path is not None:
+            os.makedirs(directory, exist_ok=True)
+            np.save(path, bits)
+        return cls(ending, bits)
+
+    def unpack(self) -> np.ndarray:
+        """ Bitbase as bool array of shape (2, 64 ** 3) """
+        return np.unpackbits(self.bits).astype(bool).reshape(2, -1)
+
+    def wins(self, board: chess.Board) -> Optional[bool]:
+        """
+        Probes bitbase
+
+        Args:
+            board (chess.Board)
+        Returns:
+            (Optional[bool]): True if side with piece wins, False if drawn.
+                None if board is not the ending of bitbase
+        """
+        if chess.popcount(board.occupied) != 3:
+            return None
+        pieces = board.pieces_mask(self.piece_type, chess.WHITE)
+        if not pieces:
+            pieces = board.pieces_mask(self.piece_type, chess.BLACK)
+            if not pieces:
+                return None
+            # Bitbases are of white with piece, so flip colors & ranks
+            board = board.mirror()
+            pieces = chess.flip_vertical(pieces)
+        index = (
+            board.king(chess.WHITE) << 12
+            | chess.lsb(pieces) << 6
+            | board.king(chess.BLACK)
+        )
+        if board.turn == chess.BLACK:
+            index += _NUM_POSITIONS
+        return bool(self.bits[index >> 3] >> (7 - (index & 7)) & 1)
+
+
+def load_bitbases(
+    directory: Optional[str] = DEFAULT_BITBASE_DIR,
+) -> Dict[str, Bitbase]:
+    """
+    Loads or generates all bitbases
+
+    Args:
+        directory (Optional[str]): cache directory. None to not cache
+    Returns:
+        (Dict[str, Bitbase]): bitbases by ending
+    """
+    bitbases: Dict[str, Bitbase] = {}
+    for ending in BITBASE_ENDINGS:
+        bitbases[ending] = Bitbase.load(ending, directory, bitbases)
+    return bitbases
@@ -1,19 +1,272 @@
 """
 Collection of chess engines that evaluate board state and select best moves
 """
+import multiprocessing
+import queue
 import random
-from typing import Dict, Iterable, List, Union
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import (Callable, Dict, Iterable, List, NamedTuple, Optional,
+                    Tuple, Union)
 
 import chess  # type: ignore
 import chess.pgn  # type: ignore
+import chess.polyglot  # type: ignore
+import numpy as np  # type: ignore
 
 from chessmate.analysis import StandardEvaluation
+from chessmate.async_search import AsyncSearch, SearchUpdate
+from chessmate.constants.misc import (ALPHA_BETA, DISPROVEN, EXACT,
+                                      LAZY_SMP, LOWER_BOUND,
+                                      MAX_SEARCH_DEPTH, MTDF, PIECE_NAMES,
+                                      PROOF_INFINITY, PROVEN, PUCT,
+                                      ROOT_SPLIT, TABLEBASE_WIN, UCT,
+                                      UNPROVEN, UPPER_BOUND)
 from chessmate.constants.piece_values import ConventionalPieceValues
+from chessmate.endgames import Tablebase
 from chessmate.heuristics import MVV_LVA
-from chessmate.transpositions import TranspositionTable, zobrist_hash_function
+from chessmate.mcts import MCTSTree
+from chessmate.stats import (EVALUATION, HASHING, MOVE_GENERATION, ORDERING,
+                             TRANSPOSITION_TABLE, SearchStatistics)
+from chessmate.transpositions import (ProofTable, SharedTranspositionTable,
+                                      TranspositionTable,
+                                      zobrist_hash_function)
 from chessmate.utils import get_piece_at
 
 
+class SearchAborted(Exception):
+    """ Raised from within a search once its time or node budget runs out """
+
+
+class PrincipalVariation(NamedTuple):
+    """ Line of best play found by search, and its value from perspective
+    of side to move at start of line """
+
+    score: float
+    moves: List[chess.Move]
+
+
+class MateSearchResult(NamedTuple):
+    """ Outcome of proof number search. Line is the proven mating line,
+    empty unless status is PROVEN """
+
+    status: str
+    line: List[chess.Move]
+    nodes: int
+
+
+def late_move_reduction(depth: int, move_number: int) -> int:
+    """
+    Default reduction schedule of late move reductions. Reduces by one ply,
+    or by two plies for moves ordered well past the first ones of a deep
+    search
+
+    Args:
+        depth (int): remaining depth of search at node
+        move_number (int): index of move in ordered move list
+    Returns:
+        (int): plies to reduce search of move by
+    """
+    if depth >= 6 and move_number >= 6:
+        return 2
+    return 1
+
+
+def _lazy_smp_worker(
+    engine: "MiniMax",
+    board: chess.Board,
+    worker_id: int,
+    time_limit: Optional[float],
+    node_limit: Optional[int],
+    max_depth: int,
+    results: multiprocessing.Queue,
+) -> None:
+    """
+    Runs iterative deepening in a worker process of MiniMax.lazy_smp, putting
+    (worker_id, depth, score, pv lines, nodes, None) on results after each
+    completed iteration and (worker_id, None, None, None, nodes, stats) when
+    done. Lines are (score, uci moves) pairs. Odd workers start one ply
+    deeper so that workers spread over depths
+
+    Args:
+        engine (MiniMax): engine with shared transposition table
+        board (chess.Board): board state to search from
+        worker_id (int): index of worker
+        time_limit (Optional[float]): seconds allowed for search
+        node_limit (Optional[int]): nodes allowed for worker
+        max_depth (int): deepest iteration to attempt
+        results (multiprocessing.Queue): queue to report iterations on
+    """
+    engine.workers = 1
+
+    def report(depth: int, score: float, best_move: chess.Move) -> None:
+        lines = [
+            (line.score, [move.uci() for move in line.moves])
+            for line in engine.pv_lines
+        ]
+        results.put((worker_id, depth, score, lines, engine.nodes, None))
+
+    try:
+        engine.iterative_deepening(
+            board,
+            time_limit,
+            node_limit,
+            max_depth=max_depth,
+            start_depth=min(1 + worker_id % 2, max_depth),
+            callback=report,
+        )
+    finally:
+        results.put((worker_id, None, None, None, engine.nodes, engine.stats))
+
+
+# Engine and shared alpha of root split worker process, set by
+# _init_root_split_worker
+_root_split_worker: Dict = {}
+
+
+def _init_root_split_worker(engine: "MiniMax", shared_alpha) -> None:
+    """
+    Initializes worker process of MiniMax.root_split with its copy of engine
+    and root alpha shared by all workers
+
+    Args:
+        engine (MiniMax): engine with shared transposition table
+        shared_alpha (multiprocessing.Value): best root value found so far,
+            from perspective of side to move at root
+    """
+    engine.workers = 1
+    _root_split_worker["engine"] = engine
+    _root_split_worker["alpha"] = shared_alpha
+
+
+def _search_root_move(
+    board: chess.Board,
+    uci: str,
+    depth: int,
+    beta: float,
+    deadline: Optional[float],
+    node_limit: Optional[int],
+) -> tuple:
+    """
+    Searches subtree of a single root move in a worker process of
+    MiniMax.root_split. Window is bounded below by the shared alpha at the
+    time the search starts, and alpha is raised for other workers if the
+    move improves on it
+
+    Args:
+        board (chess.Board): root board state
+        uci (str): root move to search
+        depth (int): depth of search, including root move
+        beta (float): upper bound, from perspective of side to move at root
+        deadline (Optional[float]): time.time() at which to abort
+        node_limit (Optional[int]): nodes allowed for subtree
+    Returns:
+        (tuple): principal variation of move as uci moves, value from
+            perspective of side to move at root (None if aborted), nodes
+            searched and statistics of search if collected. Values at or
+            below alpha are only upper bounds
+    """
+    engine = _root_split_worker["engine"]
+    shared_alpha = _root_split_worker["alpha"]
+    alpha = shared_alpha.value
+    table = engine.transposition_table
+
+    engine.nodes = 0
+    if engine.stats is not None:
+        engine.stats = SearchStatistics()
+    # Budget fields are relative to perf_counter of this process
+    if deadline is not None:
+        engine._deadline = time.perf_counter() + deadline - time.time()
+    engine._node_budget = node_limit
+    try:
+        child_hash = table.make_move(
+            board, chess.Move.from_uci(uci), table.hash_position(board)
+        )
+        value = -engine.negamax(board, depth - 1, -beta, -alpha, child_hash, 1)
+    except SearchAborted:
+        return [uci], None, engine.nodes, engine.stats
+    finally:
+        engine._deadline, engine._node_budget = None, None
+
+    with shared_alpha.get_lock():
+        if value > shared_alpha.value:
+            shared_alpha.value = value
+    pv = [uci] + [move.uci() for move in engine._pv.get(1, [])]
+    return pv, value, engine.nodes, engine.stats
+
+
+# Rollout settings of each MCTS playout worker process
+_playout_worker: Dict = {}
+
+
+def playout(
+    board: chess.Board,
+    policy: "BaseEngine",
+    max_plies: int,
+    evaluation_scale: float,
+) -> float:
+    """
+    Plays game out from board with policy choosing moves for both sides.
+    Rollouts cut short after max_plies are scored by evaluation of the
+    final board, squashed into a win probability
+
+    Args:
+        board (chess.Board): board state to play out from. Not modified
+        policy (BaseEngine): engine choosing rollout moves
+        max_plies (int): most half moves played
+        evaluation_scale (float): evaluation at which white is 10 times as
+            likely to win as to lose
+    Returns:
+        (float): result for white, 1 for win, 0.5 for draw & 0 for loss
+    """
+    board = board.copy(stack=False)
+    for _ in range(max_plies):
+        if board.is_game_over():
+            break
+        move = policy.move(board)
+        if not move:
+            break
+        board.push(move)
+    # Rollout engines store an evaluation per move, so clear them
+    policy.reset_game_variables()
+
+    if board.is_game_over():
+        result = board.result()
+        if result == "1/2-1/2":
+            return 0.5
+        return 1.0 if result == "1-0" else 0.0
+    evaluation = policy.evaluation_function.evaluate(board)
+    return 1 / (1 + 10 ** (-evaluation / evaluation_scale))
+
+
+def _init_playout_worker(
+    policy: "BaseEngine", max_plies: int, evaluation_scale: float
+) -> None:
+    """
+    Initializes worker process of MCTS with rollout settings
+
+    Args:
+        policy (BaseEngine): engine choosing rollout moves
+        max_plies (int): most half moves of each rollout
+        evaluation_scale (float): see playout
+    """
+    # Forked workers inherit state of random, so would repeat rollouts
+    random.seed()
+    _playout_worker["policy"] = policy
+    _playout_worker["max_plies"] = max_plies
+    _playout_worker["evaluation_scale"] = evaluation_scale
+
+
+def _playout_fen(fen: str) -> float:
+    """ Plays out position in worker process of MCTS. See playout """
+    return playout(
+        chess.Board(fen),
+        _playout_worker["policy"],
+        _playout_worker["max_plies"],
+        _playout_worker["evaluation_scale"],
+    )
+
+
 class BaseEngine:
     """
     Base class for defining an engine. Each engine is responsible for
@@ -36,6 +289,11 @@ class BaseEngine:
             evaluation
         reset_game_variables(): reinitialize variables for beginning of new
             game
+        search(board, time_limit, node_limit) -> AsyncSearch: selects move
+            in worker thread, for use from asyncio
+        search_move(board, time_limit, node_limit, callback): selects move,
+            reporting progress to callback. Run by search
+        stop(): requests search started by search() to stop
     """
 
     def __init__(self) -> None:
@@ -57,6 +315,7 @@ class BaseEngine:
         self.value_mapping: Iterable = ConventionalPieceValues
         self.evaluation_function: StandardEvaluation = StandardEvaluation()
         self.material_difference: List[float] = []
+        self._stop_requested: bool = False
 
     def __repr__(self):
         """ Print out current state of engine """
@@ -92,6 +351,55 @@ class BaseEngine:
         """
         raise NotImplementedError("Function move not implemented")
 
+    def search(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+    ) -> AsyncSearch:
+        """
+        Starts selecting move in a worker thread so that the event loop
+        stays responsive. Must be called from within a running event loop
+
+        Args:
+            board (chess.board): current board state in python-chess object
+            time_limit (Optional[float]): seconds allowed, for engines
+                searching under limits
+            node_limit (Optional[int]): nodes allowed, for engines searching
+                under limits
+        Returns:
+            (AsyncSearch): handle to iterate over updates of, stop & await
+        """
+        self._stop_requested = False
+        return AsyncSearch(self, board, time_limit, node_limit)
+
+    def search_move(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        callback: Optional[Callable[[SearchUpdate], None]] = None,
+    ) -> chess.Move:
+        """
+        Selects move, reporting progress to callback. Engines that don't
+        search iteratively ignore limits & callback, and can't be stopped
+
+        Args:
+            board (chess.board): current board state in python-chess object
+            time_limit (Optional[float]): seconds allowed
+            node_limit (Optional[int]): nodes allowed
+            callback (Optional[Callable[[SearchUpdate], None]]): called with
+                progress of search
+        Returns:
+            (chess.Move): uci notation object of chosen move
+        """
+        return self.move(board)
+
+    def stop(self) -> None:
+        """ Requests search started by search() to stop, keeping best move
+        found so far """
+        self._stop_requested = True
+
     def reset_move_variables(self) -> None:
         """ Resets variables at end of move"""
         # Once move is over, legal_moves at end of mve no longer relevant
@@ -382,13 +690,95 @@ class MiniMax(BaseEngine):
         alpha (float): alpha value in pruning, default=-inf
         beta (float): beta value in pruning, default= inf
         move_ordering (bool): True to utilize move ordering heuristic
-        ordering_heuristic (Callable): heuristic for move ordering
+        ordering_heuristic (Callable): heuristic for move ordering. If
+            heuristic defines store_cutoff, it is passed each move causing
+            a beta cutoff i.e heuristics.KillerHistoryHeuristic
         transposition-table (TranspositionTable): transposition table to
             store hashes. Init with default zobrist hash
+        time_limit (Optional[float]): seconds allowed per move. If set,
+            search deepens iteratively until the budget runs out. Default=None
+        node_limit (Optional[int]): nodes allowed per move. If set,
+            search deepens iteratively until the budget runs out. Default=None
+        nodes (int): number of nodes visited during last move
+        completed_depth (int): depth of last fully completed iteration
+        quiescence_search (bool): True to extend leaf nodes with a
+            capture-only search to avoid horizon effect blunders.
+            Default=False
+        quiescence_checks (bool): True to also search all evasions of
+            checks in quiescence search. Default=False
+        quiescence_depth (int): maximum plies of quiescence search. Default=8
+        null_move_pruning (bool): True to prune nodes where passing the turn
+            still fails high. Not used in check or when side to move only has
+            king & pawns, where zugzwang is likely. Default=False
+        null_move_reduction (int): depth reduction R of null move search.
+            Default=2
+        late_move_reductions (bool): True to search quiet moves ordered late
+            at reduced depth, re-searching at full depth only if they improve
+            on the bound. Default=False
+        lmr_min_depth (int): minimum remaining depth to reduce at. Default=3
+        lmr_full_depth_moves (int): number of moves searched at full depth
+            before reducing. Default=3
+        lmr_schedule (Callable[[int, int], int]): maps remaining depth and
+            move index to plies of reduction. Default=late_move_reduction
+        score (Optional[float]): value of last completed iteration from
+            perspective of side to move. None before first search of game
+        aspiration_window (Optional[float]): half-width of root window
+            centered on score of previous iteration or move. Window doubles
+            on each fail-high or fail-low. None searches full window.
+            Default=None
+        workers (int): number of processes searching in parallel. Above 1,
+            workers deepen iteratively over a shared transposition table
+            (Lazy SMP) and best move of deepest completed iteration is kept.
+            Default=1
+        parallel_search (str): how work is split when workers > 1. One of
+            LAZY_SMP or ROOT_SPLIT, where ROOT_SPLIT searches each root move
+            in a process pool to self.depth. Default=LAZY_SMP
+        search_driver (str): how each iteration finds the value of the
+            root. One of ALPHA_BETA, searching one window (or aspiration
+            windows), or MTDF, searching null windows from the score of the
+            previous iteration until bounds meet. MTDF relies on bounds kept
+            in transposition table, assumes integer evaluations and isn't
+            used with multi_pv above 1. Default=ALPHA_BETA
+        collect_statistics (bool): True to fill stats during each move.
+            Default=False
+        stats (Optional[SearchStatistics]): counters & component timings of
+            last move. None unless collect_statistics
+        principal_variation (List[chess.Move]): expected line of play of
+            last completed iteration, starting with best_move
+        multi_pv (int): number of best root moves to find exact values &
+            lines for in one search. Aspiration windows are not used above
+            1. Default=1
+        pv_lines (List[PrincipalVariation]): best multi_pv lines of last
+            completed iteration with their values, best first
+        tablebase (Optional[Tablebase]): endgame tablebase. If set, root
+            positions within it are played from tables without searching,
+            and interior nodes within it reached by a capture or pawn move
+            are valued by probing. Default=None
 
     Methods:
-        minimax(base_board, maximizing, depth): main algorithmic loop for
-            minimax algorithm.
+        minimax(base_board, maximizing, depth): evaluates board via. minimax
+            algorithm from white's perspective. Wrapper around negamax
+        negamax(board, depth, alpha, beta): main algorithmic loop. Principal
+            variation search in negamax form, with transposition table,
+            move ordering, null move pruning & late move reductions
+        quiesce(board, alpha, beta, depth): capture-only search at leaf
+            nodes of negamax
+        iterative_deepening(board, time_limit, node_limit): searches depth
+            1, 2, 3... until budget runs out, keeping best move of the last
+            completed iteration
+        search_depth(board, depth): runs single iteration, with aspiration
+            windows if enabled or MTD(f) if selected
+        mtdf(board, depth, guess, alpha, beta): finds value of board by
+            null window searches starting from guess
+        extend_pv(board, pv, depth): extends principal variation with moves
+            from transposition table
+        search_move(board, time_limit, node_limit, callback): searches
+            iteratively, reporting each iteration to callback. Stopped by
+            stop()
+        lazy_smp(board, time_limit, node_limit): searches with self.workers
+            processes sharing the transposition table
+        root_split(board, time_limit, node_limit): searches root moves in
+            parallel over a pool of self.workers processes
     """
 
     def __init__(self, color: Union[chess.Color, bool], depth: int) -> None:
@@ -403,6 +793,35 @@ class MiniMax(BaseEngine):
         self.move_ordering = True
         self.ordering_heuristic = MVV_LVA
         self.transposition_table = TranspositionTable(zobrist_hash_function)
+        self.time_limit: Optional[float] = None
+        self.node_limit: Optional[int] = None
+        self.nodes: int = 0
+        self.completed_depth: int = 0
+        self._iteration_best_move: chess.Move = chess.Move.null()
+        self._deadline: Optional[float] = None
+        self._node_budget: Optional[int] = None
+        self.quiescence_search: bool = False
+        self.quiescence_checks: bool = False
+        self.quiescence_depth: int = 8
+        self.null_move_pruning: bool = False
+        self.null_move_reduction: int = 2
+        self.late_move_reductions: bool = False
+        self.lmr_min_depth: int = 3
+        self.lmr_full_depth_moves: int = 3
+        self.lmr_schedule: Callable[[int, int], int] = late_move_reduction
+        self.score: Optional[float] = None
+        self.aspiration_window: Optional[float] = None
+        self.workers: int = 1
+        self.parallel_search: str = LAZY_SMP
+        self.search_driver: str = ALPHA_BETA
+        self.collect_statistics: bool = False
+        self.stats: Optional[SearchStatistics] = None
+        self.principal_variation: List[chess.Move] = []
+        self.multi_pv: int = 1
+        self.pv_lines: List[PrincipalVariation] = []
+        self._pv: Dict[int, List[chess.Move]] = {}
+        self._iteration_lines: List[PrincipalVariation] = []
+        self.tablebase: Optional[Tablebase] = None
 
     @property
     def depth(self) -> int:
@@ -426,6 +845,137 @@ class MiniMax(BaseEngine):
             raise ValueError(f"depth {depth_val} < 1")
         self._depth = depth_val
 
+    def check_budget(self) -> None:
+        """
+        Counts visited node and aborts search if time or node budget of
+        current iteration is exhausted, or search was stopped
+
+        Raises:
+            SearchAborted: if budget exhausted
+        """
+        self.nodes += 1
+        if self._stop_requested:
+            raise SearchAborted("search stopped")
+        if self._node_budget is not None and self.nodes > self._node_budget:
+            raise SearchAborted(f"node limit {self._node_budget} reached")
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchAborted("time limit reached")
+
+    def order_moves(
+        self, board: chess.Board, tt_move: chess.Move
+    ) -> List[chess.Move]:
+        """
+        Orders legal moves for search. Move from transposition table is
+        searched first since it is the most likely to still be best
+
+        Args:
+            board (chess.Board): current board state
+            tt_move (chess.Move): best move stored for position. Null if none
+        Returns:
+            (List[chess.Move])
+        """
+        # If running w/ heuristic, execute heuristic. Else, randomly
+        # order legal_moves
+        if self.move_ordering:
+            legal_moves = self.ordering_heuristic(board)
+        else:
+            legal_moves = list(board.legal_moves)
+            random.shuffle(legal_moves)
+
+        if tt_move in legal_moves:
+            legal_moves.remove(tt_move)
+            legal_moves.insert(0, tt_move)
+        return legal_moves
+
+    def store_cutoff(
+        self, board: chess.Board, move: chess.Move, depth: int
+    ) -> None:
+        """
+        Passes move causing beta cutoff on to ordering heuristic if it
+        learns from cutoffs i.e heuristics.KillerHistoryHeuristic
+
+        Args:
+            board (chess.Board): board state move was played from
+            move (chess.Move): move causing cutoff
+            depth (int): remaining depth of search at cutoff
+        """
+        store_cutoff = getattr(self.ordering_heuristic, "store_cutoff", None)
+        if store_cutoff is not None:
+            store_cutoff(board, move, depth)
+
+    def null_move_allowed(self, board: chess.Board, depth: int) -> bool:
+        """
+        Checks whether null move can be tried i.e pruning is enabled,
+        remaining depth covers reduction, side to move isn't in check and has
+        pieces other than king & pawns, and previous move wasn't null
+
+        Args:
+            board (chess.Board): current board state
+            depth (int): remaining depth of search
+        Returns:
+            (bool)
+        """
+        if not (self.null_move_pruning and self.alpha_beta_pruning):
+            return False
+        if depth < self.null_move_reduction + 1:
+            return False
+        if board.move_stack and not board.move_stack[-1]:
+            return False
+        pieces = board.occupied_co[board.turn] & ~(board.pawns | board.kings)
+        return bool(pieces) and not board.is_check()
+
+    def reduction(
+        self,
+        board: chess.Board,
+        move: chess.Move,
+        depth: int,
+        move_number: int,
+        in_check: bool,
+    ) -> int:
+        """
+        Plies to reduce search of move by under late move reductions. Only
+        quiet moves ordered after the first lmr_full_depth_moves are reduced
+        i.e no captures, promotions, checks or check evasions
+
+        Args:
+            board (chess.Board): board state move is played from
+            move (chess.Move): move to search
+            depth (int): remaining depth of search at node
+            move_number (int): index of move in ordered move list
+            in_check (bool): whether side to move is in check
+        Returns:
+            (int): 0 if move is searched at full depth
+        """
+        if (
+            not self.late_move_reductions
+            or in_check
+            or depth < self.lmr_min_depth
+            or move_number < self.lmr_full_depth_moves
+            or move.promotion
+            or board.is_capture(move)
+            or board.gives_check(move)
+        ):
+            return 0
+        # Always leave at least a ply before the horizon
+        return min(self.lmr_schedule(depth, move_number), depth - 1)
+
+    def static_evaluation(self, board: chess.Board) -> float:
+        """
+        Evaluates board via. evaluation_function from perspective of side to
+        move, as required by negamax
+
+        Args:
+            board (chess.Board): board state to evaluate
+        Returns:
+            (float): positive if side to move is ahead
+        """
+        if self.stats is not None:
+            start = time.perf_counter()
+        evaluation = self.evaluation_function.evaluate(board)
+        if self.stats is not None:
+            self.stats.times[EVALUATION] += time.perf_counter() - start
+        return evaluation if board.turn == chess.WHITE else -evaluation
+
     def minimax(
         self,
         base_board: chess.Board,
@@ -433,117 +983,1645 @@ class MiniMax(BaseEngine):
         depth: int,
         alpha: float,
         beta: float,
+        hash_: Optional[int] = None,
     ) -> float:
         """
-        Recursively evaluate result of each legal move on board via. minimax
-        algorithm
+        Evaluates board via. minimax algorithm, where values are from white's
+        perspective. Wrapper around negamax, which searches from perspective
+        of side to move
         Reference: https://www.youtube.com/watch?v=l-hh51ncgDI
 
         Args:
             base_board (chess.Board): current board state
-            maximizing (bool): True for white, False for black
+            maximizing (bool): True for white, False for black. Should match
+                side to move of base_board
             depth (int): depth to search. Init at self._depth for base. Note:
                 depth=>3 will be computationally slow for most CPUs
+            alpha (float): alpha value in pruning, from white's perspective
+            beta (float): beta value in pruning, from white's perspective
+            hash_ (Optional[int]): hash of base_board. Computed if not given
         Returns:
             (float): value of maximizing or minimizing move
         """
-        if depth == 0 or base_board.is_game_over():
-            return self.evaluation_function.evaluate(base_board)
+        if maximizing:
+            return self.negamax(base_board, depth, alpha, beta, hash_)
+        return -self.negamax(base_board, depth, -beta, -alpha, hash_)
+
+    def negamax(
+        self,
+        board: chess.Board,
+        depth: int,
+        alpha: float,
+        beta: float,
+        hash_: Optional[int] = None,
+        ply: int = 0,
+    ) -> float:
+        """
+        Recursively evaluate result of each legal move on board via. negamax
+        formulation of minimax i.e value of a position is the negated value
+        of the best reply, so both sides share one loop. Implements principal
+        variation search: first move is searched with the full window while
+        remaining moves are searched with a null window, proving they are no
+        better, and re-searched only on fail-high. Null window assumes
+        integer evaluations
+
+        Args:
+            board (chess.Board): current board state
+            depth (int): remaining depth to search
+            alpha (float): lower bound, from perspective of side to move
+            beta (float): upper bound, from perspective of side to move
+            hash_ (Optional[int]): hash of board, maintained incrementally
+                through the search. Computed if not given
+            ply (int): distance from root of search
+        Returns:
+            (float): value of position for side to move
+        """
+        self.check_budget()
+        self._pv[ply] = []
+        is_root = ply == 0
+        stats = self.stats
+
+        # Tables ignore the fifty move rule counter, so are only probed
+        # right after it resets, when their values hold exactly
+        if (
+            not is_root
+            and self.tablebase is not None
+            and board.halfmove_clock == 0
+        ):
+            value = self.tablebase.value(board, ply)
+            if value is not None:
+                if stats is not None:
+                    stats.tablebase_hits += 1
+                return value
+        if depth <= 0 and self.quiescence_search:
+            return self.quiesce(board, alpha, beta, self.quiescence_depth)
+        if stats is not None:
+            start = time.perf_counter()
+        game_over = depth > 0 and board.is_game_over()
+        if stats is not None:
+            stats.times[MOVE_GENERATION] += time.perf_counter() - start
+        if depth <= 0 or game_over:
+            return self.static_evaluation(board)
+
+        table = self.transposition_table
+
+        # Check for entry of current board in transposition table. Entries
+        # searched at least as deep can narrow the window or cut off
+        # entirely. Never cut off at the root since a move is required
+        if stats is not None:
+            start = time.perf_counter()
+        if hash_ is None:
+            hash_ = table.hash_position(board)
+        if stats is not None:
+            probe_start = time.perf_counter()
+            stats.times[HASHING] += probe_start - start
+        entry = table.probe(hash_)
+        if stats is not None:
+            stats.times[TRANSPOSITION_TABLE] += (
+                time.perf_counter() - probe_start
+            )
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        tt_move = chess.Move.null()
+        if entry is not None:
+            tt_move = entry.best_move
+            if not is_root and entry.depth >= depth:
+                if entry.flag == EXACT:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return entry.value
+                if entry.flag == LOWER_BOUND:
+                    alpha = max(alpha, entry.value)
+                elif entry.flag == UPPER_BOUND:
+                    beta = min(beta, entry.value)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return entry.value
+        # At the root, best move of previous iteration takes precedence
+        if is_root and self.best_move:
+            tt_move = self.best_move
+        window_alpha, window_beta = alpha, beta
+
+        # Pass turn and search with reduced depth & null window around beta.
+        # If position still fails high, a real move would too
+        if not is_root and self.null_move_allowed(board, depth):
+            null_hash = table.make_move(board, chess.Move.null(), hash_)
+            val = -self.negamax(
+                board,
+                depth - 1 - self.null_move_reduction,
+                -beta,
+                -beta + 1,
+                null_hash,
+                ply + 1,
+            )
+            board.pop()
+            if val >= beta:
+                if stats is not None:
+                    stats.null_move_cutoffs += 1
+                return val
+
+        if stats is not None:
+            start = time.perf_counter()
+        legal_moves = self.order_moves(board, tt_move)
+        if stats is not None:
+            stats.times[ORDERING] += time.perf_counter() - start
+            stats.interior_nodes += 1
+        in_check = self.late_move_reductions and board.is_check()
+        # With multi pv, root moves are searched against the value of the
+        # k-th best line rather than the best, so the top k are exact
+        multi_pv = is_root and self.multi_pv > 1
+        if multi_pv:
+            self._iteration_lines = []
 
         # Evaluate position after each legal move, store result of
         # best move
-        if maximizing:
-            max_val = -float("inf")
-            # If running w/ heuristic, execute heuristic. Else, randomly
-            # order legal_moves
-            if self.move_ordering:
-                legal_moves = self.ordering_heuristic(base_board)
+        best_val, best_move = -float("inf"), chess.Move.null()
+        for move_number, move in enumerate(legal_moves):
+            if multi_pv:
+                full_window = len(self._iteration_lines) < self.multi_pv
+                if not full_window and self.alpha_beta_pruning:
+                    alpha = max(window_alpha, self._iteration_lines[-1].score)
             else:
-                legal_moves = list(base_board.legal_moves)
-                random.shuffle(legal_moves)
-
-            for move in legal_moves:
-                base_board.push_uci(str(move))
-                # Hash current board and check for membership in transposition
-                # table
-                hash_ = self.transposition_table.hash_current_board(base_board)
-                if hash_ in self.transposition_table:
-                    val = self.transposition_table.stored_values[hash_]
-                else:
-                    # If current board not yet hashed, use minimax to eval
-                    val = self.minimax(
-                        base_board, False, depth - 1, alpha, beta
+                full_window = move_number == 0
+            reduction = self.reduction(
+                board, move, depth, move_number, in_check
+            )
+            if stats is not None:
+                start = time.perf_counter()
+            child_hash = table.make_move(board, move, hash_)
+            if stats is not None:
+                stats.times[HASHING] += time.perf_counter() - start
+                stats.moves_searched += 1
+            if full_window or not self.alpha_beta_pruning:
+                val = -self.negamax(
+                    board, depth - 1, -beta, -alpha, child_hash, ply + 1
+                )
+            else:
+                # Null window search, reduced for late quiet moves. Reduced
+                # search that beats alpha is repeated at full depth, and
+                # full depth search that beats alpha with full window
+                val = -self.negamax(
+                    board,
+                    depth - 1 - reduction,
+                    -alpha - 1,
+                    -alpha,
+                    child_hash,
+                    ply + 1,
+                )
+                if reduction and val > alpha:
+                    if stats is not None:
+                        stats.lmr_researches += 1
+                    val = -self.negamax(
+                        board,
+                        depth - 1,
+                        -alpha - 1,
+                        -alpha,
+                        child_hash,
+                        ply + 1,
+                    )
+                if alpha < val < beta:
+                    if stats is not None:
+                        stats.pvs_researches += 1
+                    val = -self.negamax(
+                        board, depth - 1, -beta, -alpha, child_hash, ply + 1
+                    )
+            board.pop()
+
+            if val > best_val:
+                best_val, best_move = val, move
+                # Principal variation continues with that of best reply
+                self._pv[ply] = [move] + self._pv.get(ply + 1, [])
+                # Keep best move at the root of the move tree
+                if is_root:
+                    self._iteration_best_move = move
+            if multi_pv and (full_window or val > alpha):
+                self._iteration_lines.append(
+                    PrincipalVariation(
+                        val, [move] + self._pv.get(ply + 1, [])
                     )
-                    # Store hash with evaluation of entire branch
-                    self.transposition_table.stored_values[hash_] = val
-                popped_move = base_board.pop()
-
-                if val > max_val:
-                    max_val = val
-                    # Keep only best moves for own color and at the root of
-                    # the move tree corresponding to the best move
-                    if (self.color) and (depth == self._depth):
-                        self.best_move = popped_move
-
-                if self.alpha_beta_pruning:
-                    alpha = max(alpha, val)
-                    if beta <= alpha:
-                        break
-
-            return max_val
-
-        # elif not strictly necessary but increasing readability
-        elif not maximizing:
-            min_val = float("inf")
-            if self.move_ordering:
-                legal_moves = self.ordering_heuristic(base_board)
+                )
+                self._iteration_lines.sort(key=lambda line: -line.score)
+                del self._iteration_lines[self.multi_pv :]
+
+            if self.alpha_beta_pruning and not multi_pv:
+                alpha = max(alpha, val)
+                if alpha >= beta:
+                    self.store_cutoff(board, move, depth)
+                    if stats is not None:
+                        stats.beta_cutoffs += 1
+                        stats.first_move_cutoffs += move_number == 0
+                    break
+
+        # Values outside of search window are only bounds on true value
+        if best_val <= window_alpha:
+            flag = UPPER_BOUND
+        elif best_val >= window_beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        if stats is not None:
+            start = time.perf_counter()
+        table.store(hash_, best_val, depth, flag, best_move)
+        if stats is not None:
+            stats.times[TRANSPOSITION_TABLE] += time.perf_counter() - start
+
+        return best_val
+
+    def quiesce(
+        self, board: chess.Board, alpha: float, beta: float, depth: int,
+    ) -> float:
+        """
+        Searches captures only until position is quiet so that leaf nodes
+        aren't evaluated in the middle of an exchange. Side to move may
+        "stand pat" on static evaluation instead of capturing, which bounds
+        the search. Captures are ordered by MVV_LVA. Always pruned
+
+        Args:
+            board (chess.Board): current board state
+            alpha (float): lower bound, from perspective of side to move
+            beta (float): upper bound, from perspective of side to move
+            depth (int): remaining plies of quiescence search
+        Returns:
+            (float): value of position for side to move
+        """
+        self.check_budget()
+        stats = self.stats
+        if stats is not None:
+            stats.quiescence_nodes += 1
+            start = time.perf_counter()
+        game_over = depth == 0 or board.is_game_over()
+        if stats is not None:
+            stats.times[MOVE_GENERATION] += time.perf_counter() - start
+        if game_over:
+            return self.static_evaluation(board)
+
+        # When in check, standing pat is not an option so search all
+        # evasions. Otherwise, only captures can improve on stand pat
+        if self.quiescence_checks and board.is_check():
+            best_val = -float("inf")
+            moves = list(board.legal_moves)
+        else:
+            best_val = self.static_evaluation(board)
+            if best_val >= beta:
+                return best_val
+            alpha = max(alpha, best_val)
+            if stats is not None:
+                start = time.perf_counter()
+            moves = [
+                m
+                for m in MVV_LVA(board, self.value_mapping)
+                if board.is_capture(m)
+            ]
+            if stats is not None:
+                stats.times[ORDERING] += time.perf_counter() - start
+
+        for move in moves:
+            board.push(move)
+            val = -self.quiesce(board, -beta, -alpha, depth - 1)
+            board.pop()
+
+            best_val = max(best_val, val)
+            alpha = max(alpha, val)
+            if alpha >= beta:
+                break
+
+        return best_val
+
+    def search_window(
+        self, board: chess.Board, depth: int, alpha: float, beta: float
+    ) -> float:
+        """
+        Searches root to fixed depth within window, tracking best move of
+        search in _iteration_best_move
+
+        Args:
+            board (chess.Board): board state to search from
+            depth (int): depth of search
+            alpha (float): lower bound, from perspective of side to move
+            beta (float): upper bound, from perspective of side to move
+        Returns:
+            (float): value of board for side to move. Only a bound if outside
+                of window
+        """
+        self._iteration_best_move = chess.Move.null()
+        return self.negamax(board, depth, alpha, beta)
+
+    def mtdf(
+        self,
+        board: chess.Board,
+        depth: int,
+        guess: float,
+        alpha: float,
+        beta: float,
+    ) -> float:
+        """
+        Finds value of board by MTD(f): null window searches around guess,
+        each failing high to raise lower bound or low to lower upper bound,
+        until the bounds meet. Nodes searched by earlier passes are mostly
+        answered from transposition table, so a good guess converges in few
+        passes. Best move & principal variation are those of the last pass
+        failing high, as fail-low passes only bound the value of each move.
+        A pass whose value lands strictly inside its null window found the
+        exact value, as fractional evaluations can, and ends the search.
+        Reference: Plaat, Best-First Fixed-Depth Minimax Algorithms, 1996
+
+        Args:
+            board (chess.Board): board state to search from
+            depth (int): depth of search
+            guess (float): first guess of value, i.e score of previous
+                iteration
+            alpha (float): lower bound, from perspective of side to move
+            beta (float): upper bound, from perspective of side to move
+        Returns:
+            (float): value of board for side to move. Only a bound if
+                outside of alpha & beta
+        """
+        lower, upper = alpha, beta
+        value = min(max(guess, lower), upper)
+        best_move, pv = chess.Move.null(), []
+        while lower < upper:
+            bound = max(value, lower + 1)
+            value = self.search_window(board, depth, bound - 1, bound)
+            if self.stats is not None:
+                self.stats.mtdf_passes += 1
+            if value < bound:
+                upper = value
             else:
-                legal_moves = list(base_board.legal_moves)
-                random.shuffle(legal_moves)
-
-            for move in legal_moves:
-                base_board.push_uci(str(move))
-                hash_ = self.transposition_table.hash_current_board(base_board)
-                if hash_ in self.transposition_table:
-                    val = self.transposition_table.stored_values[hash_]
+                lower = value
+                best_move = self._iteration_best_move
+                pv = self._pv.get(0, [])
+            # Window would be searched again unchanged, so stop
+            if bound - 1 < value < bound:
+                best_move = self._iteration_best_move
+                pv = self._pv.get(0, [])
+                break
+        # Without any pass failing high, moves of last pass are kept
+        if best_move:
+            self._iteration_best_move, self._pv[0] = best_move, pv
+        return value
+
+    def search_depth(self, board: chess.Board, depth: int) -> float:
+        """
+        Runs a single search iteration to fixed depth and keeps best move
+        and score found once the iteration completes. With aspiration
+        windows, root window is centered on previous score and widened
+        progressively on the failing side until the value falls inside it.
+        With MTDF driver, value is found by mtdf from previous score
+
+        Args:
+            board (chess.Board): board state to search from
+            depth (int): depth of iteration
+        Returns:
+            (float): value of board for side to move
+        """
+        # Root bounds are defined from white's perspective
+        if board.turn == chess.WHITE:
+            root_alpha, root_beta = self.alpha, self.beta
+        else:
+            root_alpha, root_beta = -self.beta, -self.alpha
+
+        if self.search_driver == MTDF and self.multi_pv == 1:
+            guess = 0.0 if self.score is None else self.score
+            value = self.mtdf(board, depth, guess, root_alpha, root_beta)
+        elif (
+            self.aspiration_window is None
+            or self.score is None
+            or self.multi_pv > 1
+        ):
+            value = self.search_window(board, depth, root_alpha, root_beta)
+        else:
+            delta = self.aspiration_window
+            alpha = max(self.score - delta, root_alpha)
+            beta = min(self.score + delta, root_beta)
+            while True:
+                value = self.search_window(board, depth, alpha, beta)
+                if value <= alpha and alpha > root_alpha:
+                    alpha = max(alpha - delta, root_alpha)
+                elif value >= beta and beta < root_beta:
+                    beta = min(beta + delta, root_beta)
                 else:
-                    val = self.minimax(
-                        base_board, True, depth - 1, alpha, beta
-                    )
-                    self.transposition_table.stored_values[hash_] = val
-                popped_move = base_board.pop()
+                    break
+                if self.stats is not None:
+                    self.stats.aspiration_researches += 1
+                delta *= 2
+
+        self.best_move = self._iteration_best_move
+        self.score = value
+        self.completed_depth = depth
+        self.principal_variation = self.extend_pv(
+            board, self._pv.get(0, []), depth
+        )
+        if self.multi_pv > 1:
+            self.pv_lines = [
+                PrincipalVariation(
+                    line.score, self.extend_pv(board, line.moves, depth)
+                )
+                for line in self._iteration_lines
+            ]
+        else:
+            self.pv_lines = [
+                PrincipalVariation(value, self.principal_variation)
+            ]
+        return value
+
+    def extend_pv(
+        self, board: chess.Board, pv: List[chess.Move], depth: int
+    ) -> List[chess.Move]:
+        """
+        Extends principal variation cut short by transposition table hits
+        with best moves stored in transposition table, up to depth moves
 
-                if val < min_val:
-                    min_val = val
-                    if (not self.color) and (depth == self._depth):
-                        self.best_move = popped_move
-                if self.alpha_beta_pruning:
-                    beta = min(beta, val)
-                    if beta <= alpha:
-                        break
+        Args:
+            board (chess.Board): board state line starts from
+            pv (List[chess.Move]): principal variation
+            depth (int): length of line to extend to
+        Returns:
+            (List[chess.Move])
+        """
+        table = self.transposition_table
+        board = board.copy(stack=False)
+        for move in pv:
+            board.push(move)
+        pv = list(pv)
+        while len(pv) < depth:
+            entry = table.probe(table.hash_position(board))
+            if (
+                entry is None
+                or not entry.best_move
+                or not board.is_legal(entry.best_move)
+            ):
+                break
+            pv.append(entry.best_move)
+            board.push(entry.best_move)
+        return pv
+
+    def iterative_deepening(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        max_depth: int = MAX_SEARCH_DEPTH,
+        start_depth: int = 1,
+        callback: Optional[Callable[[int, float, chess.Move], None]] = None,
+    ) -> chess.Move:
+        """
+        Searches depth 1, 2, 3... until time or node budget runs out. Each
+        iteration reuses the transposition table and best move of the
+        previous iteration. Depth 1 always completes so that a move is
+        available regardless of budget
 
-            return min_val
+        Args:
+            board (chess.Board): board state to search from
+            time_limit (Optional[float]): seconds allowed for search
+            node_limit (Optional[int]): nodes allowed for search
+            max_depth (int): deepest iteration to attempt
+            start_depth (int): first iteration to search. Default=1
+            callback (Optional[Callable[[int, float, chess.Move], None]]):
+                called with depth, score and best move after each completed
+                iteration
+        Returns:
+            (chess.Move): best move of last completed iteration
+        """
+        start = time.perf_counter()
+        stack_len = len(board.move_stack)
+        for depth in range(start_depth, max_depth + 1):
+            if depth > 1:
+                if time_limit is not None:
+                    self._deadline = start + time_limit
+                self._node_budget = node_limit
+            try:
+                self.search_depth(board, depth)
+            except SearchAborted:
+                # Unwind moves pushed by the interrupted iteration
+                while len(board.move_stack) > stack_len:
+                    board.pop()
+                break
+            finally:
+                self._deadline, self._node_budget = None, None
+
+            if callback is not None:
+                callback(depth, self.score, self.best_move)
+            if (
+                time_limit is not None
+                and time.perf_counter() - start >= time_limit
+            ):
+                break
 
-    def evaluate(self, board: chess.Board) -> None:
-        """ Evaluates board from perspective of side playing on """
-        if isinstance(self.color, bool):
-            self.minimax(
-                board,
-                self.color,
-                depth=self._depth,
-                alpha=self.alpha,
-                beta=self.beta,
+        return self.best_move
+
+    def lazy_smp(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+    ) -> chess.Move:
+        """
+        Lazy SMP search. Each of self.workers processes runs its own
+        iterative deepening from board, with workers staggered over depths,
+        and all of them store into a shared transposition table so that
+        results found by one worker cut off the search of the others. Best
+        move of deepest iteration completed by any worker is kept. Without
+        limits, workers search to self.depth
+
+        Args:
+            board (chess.Board): board state to search from
+            time_limit (Optional[float]): seconds allowed for search
+            node_limit (Optional[int]): nodes allowed for search, split
+                evenly over workers
+        Returns:
+            (chess.Move): best move of deepest completed iteration
+        """
+        if not isinstance(self.transposition_table, SharedTranspositionTable):
+            self.transposition_table = SharedTranspositionTable.from_table(
+                self.transposition_table
+            )
+        if time_limit is None and node_limit is None:
+            max_depth = self._depth
+        else:
+            max_depth = MAX_SEARCH_DEPTH
+        if node_limit is not None:
+            node_limit = max(node_limit // self.workers, 1)
+
+        context = multiprocessing.get_context()
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_lazy_smp_worker,
+                args=(
+                    self, board.copy(), worker_id, time_limit, node_limit,
+                    max_depth, results,
+                ),
+                daemon=True,
+            )
+            for worker_id in range(self.workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+
+        # Deepest iteration per worker, and nodes once worker is done
+        completed: Dict[int, tuple] = {}
+        nodes: Dict[int, int] = {}
+        while len(nodes) < self.workers:
+            # Workers stop themselves on time, only wait on stragglers
+            # briefly once a move is known
+            if (
+                time_limit is not None
+                and completed
+                and time.perf_counter() - start > 2 * time_limit + 1
+            ):
+                break
+            if self._stop_requested and completed:
+                break
+            try:
+                (
+                    worker_id, depth, score, lines, worker_nodes, stats,
+                ) = results.get(timeout=0.1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+                continue
+            if depth is None:
+                nodes[worker_id] = worker_nodes
+                if self.stats is not None and stats is not None:
+                    self.stats.merge(stats)
+            else:
+                completed[worker_id] = (depth, score, lines)
+
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        results.close()
+
+        if not completed:
+            # Workers failed, fall back to searching in this process
+            if time_limit is None and node_limit is None:
+                self.search_depth(board, self._depth)
+                return self.best_move
+            return self.iterative_deepening(board, time_limit, node_limit)
+
+        # Deepest iteration wins, ties going to lowest worker
+        worker_id = max(completed, key=lambda i: (completed[i][0], -i))
+        depth, score, lines = completed[worker_id]
+        self.pv_lines = [
+            PrincipalVariation(
+                line_score, [chess.Move.from_uci(uci) for uci in ucis]
             )
+            for line_score, ucis in lines
+        ]
+        # Game over at root leaves no move to play
+        if self.pv_lines and self.pv_lines[0].moves:
+            self.principal_variation = self.pv_lines[0].moves
+            self.best_move = self.principal_variation[0]
+        else:
+            self.principal_variation = []
+            self.best_move = chess.Move.null()
+        self.score = score
+        self.completed_depth = depth
+        self.nodes = sum(nodes.values())
+        return self.best_move
+
+    def root_split(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+    ) -> chess.Move:
+        """
+        Splits root moves over a pool of self.workers processes, each
+        subtree searched to self.depth over a shared transposition table.
+        Best value found so far is broadcast to workers as shared alpha, so
+        later moves are searched with a narrower window. Values of all root
+        moves are merged into legal_moves, from perspective of side to move,
+        and best multi_pv moves into pv_lines. Moves failing low only have
+        an upper bound as value, and moves whose search is aborted by time
+        or node limit are left out
+
+        Args:
+            board (chess.Board): board state to search from
+            time_limit (Optional[float]): seconds allowed for search
+            node_limit (Optional[int]): nodes allowed for search, split
+                evenly over root moves
+        Returns:
+            (chess.Move): root move with highest value
+        """
+        if not isinstance(self.transposition_table, SharedTranspositionTable):
+            self.transposition_table = SharedTranspositionTable.from_table(
+                self.transposition_table
+            )
+        root_moves = self.order_moves(board, self.best_move)
+        if not root_moves:
+            return self.best_move
+
+        # Root bounds are defined from white's perspective
+        if board.turn == chess.WHITE:
+            root_alpha, root_beta = self.alpha, self.beta
         else:
+            root_alpha, root_beta = -self.beta, -self.alpha
+        deadline = None if time_limit is None else time.time() + time_limit
+        if node_limit is not None:
+            node_limit = max(node_limit // len(root_moves), 1)
+
+        context = multiprocessing.get_context()
+        shared_alpha = context.Value("d", root_alpha)
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_root_split_worker,
+            initargs=(self, shared_alpha),
+        ) as executor:
+            # Submitted in move ordering order so that likely best moves
+            # raise alpha early
+            futures = [
+                executor.submit(
+                    _search_root_move,
+                    board.copy(),
+                    move.uci(),
+                    self._depth,
+                    root_beta,
+                    deadline,
+                    node_limit,
+                )
+                for move in root_moves
+            ]
+            self.legal_moves = {}
+            pvs: Dict[chess.Move, List[chess.Move]] = {}
+            for future in as_completed(futures):
+                if self._stop_requested:
+                    # Subtrees already being searched still complete
+                    for pending in futures:
+                        pending.cancel()
+                if future.cancelled():
+                    continue
+                ucis, value, nodes, stats = future.result()
+                self.nodes += nodes
+                if self.stats is not None and stats is not None:
+                    self.stats.merge(stats)
+                if value is not None:
+                    pv = [chess.Move.from_uci(uci) for uci in ucis]
+                    self.legal_moves[pv[0]] = value
+                    pvs[pv[0]] = pv
+
+        if not self.legal_moves:
+            # Every subtree aborted, fall back to first ordered move
+            self.best_move = root_moves[0]
+            return self.best_move
+        # Ties go to move ordered first
+        ranked = sorted(
+            (move for move in root_moves if move in self.legal_moves),
+            key=lambda move: -self.legal_moves[move],
+        )
+        self.pv_lines = [
+            PrincipalVariation(self.legal_moves[move], pvs[move])
+            for move in ranked[: self.multi_pv]
+        ]
+        self.best_move = ranked[0]
+        self.principal_variation = pvs[self.best_move]
+        self.score = self.legal_moves[self.best_move]
+        self.completed_depth = self._depth
+        return self.best_move
+
+    def reset_game_variables(self) -> None:
+        """ Resets variables at end of game. Score of previous move no longer
+        centers aspiration window """
+        super().reset_game_variables()
+        self.score = None
+
+    def evaluate(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        callback: Optional[Callable[[SearchUpdate], None]] = None,
+    ) -> None:
+        """
+        Evaluates board from perspective of side playing on. Searches to
+        fixed depth unless a time or node limit is given, in which case
+        search deepens iteratively until the limit is hit. With a callback,
+        search deepens iteratively up to depth even without limits, so that
+        progress can be reported. Positions within tablebase are played
+        from tables without searching
+
+        Args:
+            board (chess.Board): board state to evaluate
+            time_limit (Optional[float]): seconds allowed. Defaults to
+                self.time_limit
+            node_limit (Optional[int]): nodes allowed. Defaults to
+                self.node_limit
+            callback (Optional[Callable[[SearchUpdate], None]]): called after
+                each completed iteration. Parallel searches only report
+                their final result
+        """
+        if not isinstance(self.color, bool):
             raise ValueError(
                 f"self.color value {self.color} not in (White, Black)"
             )
 
+        if self.search_driver not in (ALPHA_BETA, MTDF):
+            raise ValueError(f"Invalid search driver {self.search_driver}")
+        if time_limit is None:
+            time_limit = self.time_limit
+        if node_limit is None:
+            node_limit = self.node_limit
+
+        self.nodes = 0
+        self.best_move = chess.Move.null()
+        self.principal_variation, self.pv_lines = [], []
+        self.stats = SearchStatistics() if self.collect_statistics else None
+        start = time.perf_counter()
+        self.transposition_table.new_search()
+        new_search = getattr(self.ordering_heuristic, "new_search", None)
+        if new_search is not None:
+            new_search()
+        tablebase_move = None
+        if self.tablebase is not None:
+            tablebase_move = self.tablebase.best_move(board)
+        if tablebase_move is not None:
+            self.best_move = tablebase_move
+            self.principal_variation = [tablebase_move]
+            self.score = self.tablebase.value(board)
+            self.completed_depth = 0
+        elif self.workers > 1:
+            if self.parallel_search == LAZY_SMP:
+                self.lazy_smp(board, time_limit, node_limit)
+            elif self.parallel_search == ROOT_SPLIT:
+                self.root_split(board, time_limit, node_limit)
+            else:
+                raise ValueError(
+                    f"Invalid parallel search {self.parallel_search}"
+                )
+        elif callback is not None:
+            max_depth = MAX_SEARCH_DEPTH
+            if time_limit is None and node_limit is None:
+                max_depth = self._depth
+            self.iterative_deepening(
+                board,
+                time_limit,
+                node_limit,
+                max_depth=max_depth,
+                callback=lambda *iteration: self.report(callback),
+            )
+        elif time_limit is None and node_limit is None:
+            self.search_depth(board, self._depth)
+        else:
+            self.iterative_deepening(board, time_limit, node_limit)
+
+        # Searches without iterations of their own report once at the end
+        single_report = self.workers > 1 or tablebase_move is not None
+        if callback is not None and single_report and self.best_move:
+            self.report(callback)
+        if self.stats is not None:
+            self.stats.elapsed = time.perf_counter() - start
+            self.stats.nodes = self.nodes
+            self.stats.searches = 1
+            self.stats.depth = self.completed_depth
         self.material_difference.append(
             self.evaluation_function.evaluate(board)
         )
 
+    def move(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+    ) -> chess.Move:
+        """
+        Returns best move as selected by minimax algorithm
+
+        Args:
+            board (chess.Board): board state to move from
+            time_limit (Optional[float]): seconds allowed for move
+            node_limit (Optional[int]): nodes allowed for move
+        Returns:
+            (chess.Move)
+        """
+        # Stop requested after last search finished doesn't apply
+        self._stop_requested = False
+        self.evaluate(board, time_limit=time_limit, node_limit=node_limit)
+        return self.best_move
+
+    def report(self, callback: Callable[[SearchUpdate], None]) -> None:
+        """
+        Passes result of last completed iteration to callback
+
+        Args:
+            callback (Callable[[SearchUpdate], None])
+        """
+        callback(
+            SearchUpdate(
+                self.completed_depth,
+                self.score,
+                list(self.principal_variation),
+                self.nodes,
+            )
+        )
+
+    def search_move(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        callback: Optional[Callable[[SearchUpdate], None]] = None,
+    ) -> chess.Move:
+        """
+        Searches iteratively, reporting each completed iteration to callback,
+        until limits or depth are reached or search is stopped. If stopped
+        before the first iteration completes, first ordered move is played
+
+        Args:
+            board (chess.Board): board state to move from
+            time_limit (Optional[float]): seconds allowed for move
+            node_limit (Optional[int]): nodes allowed for move
+            callback (Optional[Callable[[SearchUpdate], None]]): called after
+                each completed iteration
+        Returns:
+            (chess.Move): best move of last completed iteration
+        """
+        try:
+            self.evaluate(board, time_limit, node_limit, callback)
+        finally:
+            self._stop_requested = False
+        if not self.best_move:
+            legal_moves = self.order_moves(board, chess.Move.null())
+            if legal_moves:
+                self.best_move = legal_moves[0]
+        return self.best_move
+
+
+class MCTS(BaseEngine):
+    """
+    Monte Carlo tree search. Each playout descends the tree from the root
+    by UCT or PUCT, expands the leaf reached, plays the game out with a
+    rollout engine and adds the result to each node on the way. Move played
+    is the most visited root move. Playouts are selected in batches with
+    virtual losses, so that a batch explores different lines and can be
+    played out in parallel over a process pool
+
+    Attributes:
+        name (str): name of engine
+        playouts (int): playouts per move, unless a node limit is given.
+            Default=100
+        time_limit (Optional[float]): seconds allowed per move. Search ends
+            at whichever of playouts & time_limit comes first. Default=None
+        selection (str): UCT or PUCT. PUCT weights exploration by priors of
+            moves, favouring captures of valuable pieces. Default=UCT
+        exploration (float): weight of exploration term. Default=1.4
+        rollout_policy (BaseEngine): engine choosing moves of playouts, i.e
+            Random or CaptureHighestValue. Default=Random
+        rollout_plies (int): most half moves of a playout, after which
+            evaluation_function scores it. Default=20
+        evaluation_scale (float): evaluation at which truncated playouts
+            are scored as 10 to 1 odds of winning. Default=400
+        workers (int): processes playing out in parallel. Pool of workers
+            is started on first parallel search and kept until close().
+            Default=1
+        batch_size (Optional[int]): playouts selected before backing up
+            results. Defaults to workers
+        tree_reuse (bool): True to keep subtree of position reached after
+            moves played since last search. Default=True
+        tree (Optional[MCTSTree]): tree of last search
+        best_move (chess.Move): most visited root move of last search
+        principal_variation (List[chess.Move]): most visited line of last
+            search
+        score (Optional[float]): mean result of best_move for side to move,
+            from 0 for loss to 1 for win
+        completed_playouts (int): playouts of last search, excluding those
+            of reused tree
+
+    Methods:
+        priors(board, moves) -> np.ndarray: prior probabilities of moves
+        search_move(board, time_limit, node_limit, callback): searches,
+            reporting progress to callback. Stopped by stop()
+        close(): shuts down pool of playout workers
+    """
+
+    def __init__(self, playouts: int = 100) -> None:
+        """
+        Args:
+            playouts (int): playouts per move
+        """
+        super().__init__()
+        self.name: str = "MCTS"
+        self.playouts: int = playouts
+        self.time_limit: Optional[float] = None
+        self.selection: str = UCT
+        self.exploration: float = 1.4
+        self.rollout_policy: BaseEngine = Random()
+        self.rollout_plies: int = 20
+        self.evaluation_scale: float = 400
+        self.workers: int = 1
+        self.batch_size: Optional[int] = None
+        self.tree_reuse: bool = True
+        self.tree: Optional[MCTSTree] = None
+        self.best_move: chess.Move = chess.Move.null()
+        self.principal_variation: List[chess.Move] = []
+        self.score: Optional[float] = None
+        self.completed_playouts: int = 0
+        self._tree_board: Optional[chess.Board] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_settings: Optional[tuple] = None
+        self._futures: List[Future] = []
+
+    def priors(
+        self, board: chess.Board, moves: List[chess.Move]
+    ) -> np.ndarray:
+        """
+        Prior probabilities of moves. Uniform for UCT. For PUCT, weighted by
+        1 plus value of piece captured in pawns
+
+        Args:
+            board (chess.Board): board state moves are played from
+            moves (List[chess.Move]): legal moves
+        Returns:
+            (np.ndarray): probabilities summing to 1
+        """
+        weights = np.ones(len(moves))
+        if self.selection == PUCT:
+            pawn = self.value_mapping["P"].value
+            for i, move in enumerate(moves):
+                if board.is_en_passant(move):
+                    weights[i] += 1
+                elif board.is_capture(move):
+                    victim = board.piece_type_at(move.to_square)
+                    value = self.value_mapping[PIECE_NAMES[victim]].value
+                    weights[i] += value / pawn
+        return weights / weights.sum()
+
+    def _playout_pool(self) -> ProcessPoolExecutor:
+        """
+        Pool of playout workers, started on first use and kept across moves
+        so that workers start up once. Restarted if workers or rollout
+        settings changed since it was started
+
+        Returns:
+            (ProcessPoolExecutor)
+        """
+        settings = (
+            self.workers,
+            self.rollout_policy,
+            self.rollout_plies,
+            self.evaluation_scale,
+        )
+        if self._pool is not None and self._pool_settings != settings:
+            self.close()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_playout_worker,
+                initargs=settings[1:],
+            )
+            self._pool_settings = settings
+        return self._pool
+
+    def _root_tree(self, board: chess.Board) -> MCTSTree:
+        """
+        Tree to search board with. Reuses subtree of last search if board
+        continues from its root
+
+        Args:
+            board (chess.Board): board state to search
+        Returns:
+            (MCTSTree)
+        """
+        last = self._tree_board
+        if self.tree_reuse and self.tree is not None and last is not None:
+            played = len(last.move_stack)
+            if (
+                board.move_stack[:played] == last.move_stack
+                and board.root().fen() == last.root().fen()
+            ):
+                node = self.tree.find(board.move_stack[played:])
+                if node == 0:
+                    return self.tree
+                if node > 0:
+                    return self.tree.subtree(node)
+        return MCTSTree()
+
+    def _select(
+        self, tree: MCTSTree, root: chess.Board
+    ) -> Tuple[List[int], List[bool], chess.Board]:
+        """
+        Descends tree from root, expanding leaf reached and stepping into
+        one of its children. Adds virtual visit to path
+
+        Args:
+            tree (MCTSTree)
+            root (chess.Board): board state at root
+        Returns:
+            (Tuple[List[int], List[bool], chess.Board]): nodes of path, side
+                that moved into each node and board state at end of path
+        """
+        puct = self.selection == PUCT
+        board = root.copy(stack=False)
+        node, path, movers = 0, [0], [not board.turn]
+        while tree.expanded(node) and tree.nodes["num_children"][node]:
+            node = tree.select_child(node, self.exploration, puct)
+            movers.append(board.turn)
+            board.push(tree.move(node))
+            path.append(node)
+        if not tree.expanded(node) and not board.is_game_over():
+            moves = list(board.legal_moves)
+            tree.expand(node, moves, self.priors(board, moves))
+            node = tree.select_child(node, self.exploration, puct)
+            movers.append(board.turn)
+            board.push(tree.move(node))
+            path.append(node)
+        tree.add_virtual_visit(path)
+        return path, movers, board
+
+    def evaluate(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        callback: Optional[Callable[[SearchUpdate], None]] = None,
+    ) -> None:
+        """
+        Searches board until playouts or time run out, or search is stopped.
+        Maps root moves to their visits in legal_moves
+
+        Args:
+            board (chess.Board): board state to evaluate
+            time_limit (Optional[float]): seconds allowed. Defaults to
+                self.time_limit
+            node_limit (Optional[int]): playouts allowed. Defaults to
+                self.playouts
+            callback (Optional[Callable[[SearchUpdate], None]]): called
+                after each batch of playouts
+        Raises:
+            ValueError: if selection isn't UCT or PUCT
+        """
+        if self.selection not in (UCT, PUCT):
+            raise ValueError(f"Invalid selection {self.selection}")
+        if time_limit is None:
+            time_limit = self.time_limit
+        budget = self.playouts if node_limit is None else node_limit
+        deadline = None
+        if time_limit is not None:
+            deadline = time.perf_counter() + time_limit
+        batch_size = self.batch_size or self.workers
+
+        tree = self._root_tree(board)
+        self.tree, self._tree_board = tree, board.copy()
+        self.completed_playouts = 0
+        pool = self._playout_pool() if self.workers > 1 else None
+        try:
+            game_over = board.is_game_over()
+            while (
+                self.completed_playouts < budget
+                and not self._stop_requested
+                and (deadline is None or time.perf_counter() < deadline)
+                and not game_over
+            ):
+                batch = min(batch_size, budget - self.completed_playouts)
+                leaves = [self._select(tree, board) for _ in range(batch)]
+                # Finished games are scored directly, others played out
+                finished = [leaf.is_game_over() for _, _, leaf in leaves]
+                pending = [
+                    leaf
+                    for (_, _, leaf), done in zip(leaves, finished)
+                    if not done
+                ]
+                if pool is not None:
+                    self._futures = [
+                        pool.submit(_playout_fen, leaf.fen())
+                        for leaf in pending
+                    ]
+                    played = (future.result() for future in self._futures)
+                else:
+                    played = (
+                        playout(
+                            leaf,
+                            self.rollout_policy,
+                            self.rollout_plies,
+                            self.evaluation_scale,
+                        )
+                        for leaf in pending
+                    )
+                for (path, movers, leaf), done in zip(leaves, finished):
+                    if done:
+                        result = playout(
+                            leaf, self.rollout_policy, 0, self.evaluation_scale
+                        )
+                    else:
+                        result = next(played)
+                    tree.add_virtual_visit(path, -1)
+                    tree.backpropagate(
+                        path,
+                        [
+                            result if mover == chess.WHITE else 1 - result
+                            for mover in movers
+                        ],
+                    )
+                self.completed_playouts += batch
+                self._update_result(board)
+                if callback is not None:
+                    self.report(callback)
+        except BaseException:
+            # Pool may be left broken or busy with playouts no longer needed
+            self.close()
+            raise
+
+        self._update_result(board)
+        self.material_difference.append(
+            self.evaluation_function.evaluate(board)
+        )
+
+    def _update_result(self, board: chess.Board) -> None:
+        """ Sets best move, line & score from tree """
+        tree = self.tree
+        self.legal_moves = {
+            tree.move(child): int(tree.nodes["visits"][child])
+            for child in tree.children(0)
+        }
+        best = tree.best_child(0)
+        if best < 0:
+            self.best_move, self.score = chess.Move.null(), None
+            self.principal_variation = []
+            return
+        self.best_move = tree.move(best)
+        self.score = tree.mean_value(best)
+        self.principal_variation = tree.principal_variation()
+
     def move(self, board: chess.Board) -> chess.Move:
-        """ Returns best move as selected by minimax algorithm """
+        """
+        Returns most visited move of search
+
+        Args:
+            board (chess.Board): board state to move from
+        Returns:
+            (chess.Move): null move if game is over
+        """
+        self._stop_requested = False
         self.evaluate(board)
         return self.best_move
+
+    def report(self, callback: Callable[[SearchUpdate], None]) -> None:
+        """
+        Passes current result of search to callback. Depth is length of
+        most visited line and score the mean result of best move
+
+        Args:
+            callback (Callable[[SearchUpdate], None])
+        """
+        callback(
+            SearchUpdate(
+                len(self.principal_variation),
+                self.score,
+                list(self.principal_variation),
+                self.completed_playouts,
+            )
+        )
+
+    def search_move(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        callback: Optional[Callable[[SearchUpdate], None]] = None,
+    ) -> chess.Move:
+        """
+        Searches, reporting each batch of playouts to callback, until
+        limits are reached or search is stopped
+
+        Args:
+            board (chess.Board): board state to move from
+            time_limit (Optional[float]): seconds allowed for move
+            node_limit (Optional[int]): playouts allowed for move
+            callback (Optional[Callable[[SearchUpdate], None]]): called after
+                each batch of playouts
+        Returns:
+            (chess.Move): most visited move
+        """
+        try:
+            self.evaluate(board, time_limit, node_limit, callback)
+        finally:
+            self._stop_requested = False
+        if not self.best_move:
+            legal_moves = list(board.legal_moves)
+            if legal_moves:
+                self.best_move = legal_moves[0]
+        return self.best_move
+
+    def reset_game_variables(self) -> None:
+        """ Resets variables at end of game, dropping tree """
+        super().reset_game_variables()
+        self.tree, self._tree_board = None, None
+        self.score = None
+
+    def close(self) -> None:
+        """ Shuts down pool of playout workers """
+        # Playouts not yet started are cancelled rather than waited for
+        for future in self._futures:
+            future.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        self._pool, self._pool_settings, self._futures = None, None, []
+
+
+class ProofNumberSearch(BaseEngine):
+    """
+    Depth-first proof number search (df-pn) for forced mates by the side to
+    move within max_moves moves. Each position carries a proof number, the
+    fewest leaves that must be proven to prove a mate, and a disproof
+    number, the fewest that must be disproven to refute it. Search always
+    expands the most proving position, staying in a subtree until its
+    numbers exceed thresholds, so memory is bounded by the proof table
+    rather than the tree. Numbers are kept in phi/delta form i.e from
+    perspective of side to move, so both sides share one loop.
+    Reference: Nagai, Df-pn Algorithm for Searching AND/OR Trees, 2002
+
+    Proven lines mate within max_moves, though not necessarily in fewest
+    moves. Positions that aren't proven or disproven within node_limit are
+    unproven, and moves are then chosen by fallback
+
+    Attributes:
+        name (str): name of engine
+        max_moves (int): moves of side to move to mate in. Default=3
+        node_limit (Optional[int]): nodes allowed per search. Default=100000
+        checks_only (bool): True to only search checking moves of attacking
+            side, as in mate puzzles. Faster, but misses quiet mates.
+            Default=False
+        table (ProofTable): bounded table of proof numbers
+        fallback (BaseEngine): engine moving when no mate is proven.
+            Default=Random
+        result (Optional[MateSearchResult]): outcome of last search
+        nodes (int): nodes visited during last search
+
+    Methods:
+        solve(board, node_limit, time_limit) -> MateSearchResult: proves or
+            disproves mate from board
+        search_move(board, time_limit, node_limit, callback): plays first
+            move of proven mate, otherwise move of fallback
+    """
+
+    def __init__(self, max_moves: int = 3) -> None:
+        """
+        Args:
+            max_moves (int): moves of side to move to mate in
+        """
+        super().__init__()
+        self.name: str = "Proof Number Search"
+        self.max_moves: int = max_moves
+        self.node_limit: Optional[int] = 100000
+        self.checks_only: bool = False
+        self.table: ProofTable = ProofTable()
+        self.fallback: BaseEngine = Random()
+        self.result: Optional[MateSearchResult] = None
+        self.nodes: int = 0
+        self._attacker: chess.Color = chess.WHITE
+        self._node_budget: Optional[int] = None
+        self._deadline: Optional[float] = None
+
+    def check_budget(self) -> None:
+        """
+        Counts visited node and aborts search if node or time budget is
+        exhausted, or search was stopped
+
+        Raises:
+            SearchAborted: if budget exhausted
+        """
+        self.nodes += 1
+        if self._stop_requested:
+            raise SearchAborted("search stopped")
+        if self._node_budget is not None and self.nodes > self._node_budget:
+            raise SearchAborted(f"node limit {self._node_budget} reached")
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchAborted("time limit reached")
+
+    def _numbers(self, proof: int, disproof: int, board: chess.Board):
+        """ Converts proof & disproof numbers of mate to phi & delta of side
+        to move """
+        if board.turn == self._attacker:
+            return proof, disproof
+        return disproof, proof
+
+    def _terminal(self, board: chess.Board, moves: int) -> Optional[tuple]:
+        """
+        Proof numbers of positions decided without search
+
+        Args:
+            board (chess.Board): board state
+            moves (int): moves left to mate
+        Returns:
+            (Optional[tuple]): phi & delta if decided
+        """
+        if board.is_checkmate():
+            # Side to move has lost, whichever side it is
+            return PROOF_INFINITY, 0
+        attacking = board.turn == self._attacker
+        # Defender survives draws & running out of moves to mate in
+        if board.is_game_over() or moves == 0 and not attacking:
+            return self._numbers(PROOF_INFINITY, 0, board)
+        return None
+
+    def _moves(self, board: chess.Board, moves: int) -> List[chess.Move]:
+        """ Moves searched from board. Attacker with no moves left can't
+        mate, and with checks_only only gives checks """
+        if board.turn != self._attacker:
+            return list(board.legal_moves)
+        if moves == 0:
+            return []
+        if self.checks_only:
+            return [
+                move for move in board.legal_moves if board.gives_check(move)
+            ]
+        return list(board.legal_moves)
+
+    def _mid(
+        self,
+        board: chess.Board,
+        hash_: int,
+        moves: int,
+        phi_threshold: int,
+        delta_threshold: int,
+        path: set,
+    ) -> tuple:
+        """
+        Multiple iterative deepening step of df-pn. Searches board until its
+        phi or delta reach their thresholds, storing numbers in table
+
+        Args:
+            board (chess.Board): board state
+            hash_ (int): polyglot hash of board
+            moves (int): moves left to mate
+            phi_threshold (int): phi at which to return
+            delta_threshold (int): delta at which to return
+            path (set): hashes of positions on path from root, which count
+                as draws when repeated
+        Returns:
+            (tuple): phi & delta of board
+        """
+        self.check_budget()
+        start = self.nodes
+        numbers = self._terminal(board, moves)
+        if numbers is None:
+            legal_moves = self._moves(board, moves)
+            if not legal_moves:
+                numbers = self._numbers(PROOF_INFINITY, 0, board)
+        if numbers is not None:
+            self.table.store(hash_, moves, *numbers, work=1)
+            return numbers
+
+        child_moves = moves - (board.turn == self._attacker)
+        children = []
+        for move in legal_moves:
+            board.push(move)
+            child_hash = chess.polyglot.zobrist_hash(board)
+            # Repetition draws, so favours defender
+            repeated = None
+            if child_hash in path:
+                repeated = self._numbers(PROOF_INFINITY, 0, board)
+            board.pop()
+            children.append((move, child_hash, repeated))
+
+        # Numbers each child last returned, in case table evicted them
+        searched: List[Optional[tuple]] = [None] * len(children)
+        path.add(hash_)
+        while True:
+            phis, deltas = [], []
+            for i, (_, child_hash, repeated) in enumerate(children):
+                child = (
+                    repeated
+                    or self.table.probe(child_hash, child_moves)
+                    or searched[i]
+                )
+                child_phi, child_delta = child or (1, 1)
+                phis.append(child_phi)
+                deltas.append(child_delta)
+            phi = min(deltas)
+            delta = min(sum(phis), PROOF_INFINITY)
+            if phi >= phi_threshold or delta >= delta_threshold:
+                break
+            # Most proving child has least delta, i.e least phi of
+            # opponent
+            best = min(range(len(children)), key=deltas.__getitem__)
+            second_delta = min(
+                (d for i, d in enumerate(deltas) if i != best),
+                default=PROOF_INFINITY,
+            )
+            child_phi_threshold = min(
+                delta_threshold - delta + phis[best], PROOF_INFINITY
+            )
+            child_delta_threshold = min(phi_threshold, second_delta + 1)
+            move, child_hash, _ = children[best]
+            board.push(move)
+            try:
+                searched[best] = self._mid(
+                    board,
+                    child_hash,
+                    child_moves,
+                    child_phi_threshold,
+                    child_delta_threshold,
+                    path,
+                )
+            finally:
+                board.pop()
+            # Child that made no progress would be searched again forever,
+            # so give up on board, leaving it unproven
+            if searched[best] == (phis[best], deltas[best]):
+                break
+        path.discard(hash_)
+        self.table.store(hash_, moves, phi, delta, self.nodes - start)
+        return phi, delta
+
+    def _mating_line(self, board: chess.Board) -> List[chess.Move]:
+        """
+        Follows proven moves of attacker & any defence from table until
+        mate. Line is cut short where proofs were evicted from table
+
+        Args:
+            board (chess.Board): board state of proven root
+        Returns:
+            (List[chess.Move])
+        """
+        board = board.copy()
+        line, moves = [], self.max_moves
+        while not board.is_checkmate():
+            attacking = board.turn == self._attacker
+            child_moves = moves - attacking
+            chosen = None
+            for move in self._moves(board, moves):
+                board.push(move)
+                child = self.table.probe(
+                    chess.polyglot.zobrist_hash(board), child_moves
+                )
+                # Mate is proven where proof number of child is 0, i.e
+                # delta of defender or phi of attacker
+                proven = board.is_checkmate() or (
+                    child is not None and child[int(attacking)] == 0
+                )
+                board.pop()
+                if proven:
+                    chosen = move
+                    break
+            if chosen is None:
+                break
+            line.append(chosen)
+            board.push(chosen)
+            moves = child_moves
+        return line
+
+    def solve(
+        self,
+        board: chess.Board,
+        node_limit: Optional[int] = None,
+        time_limit: Optional[float] = None,
+    ) -> MateSearchResult:
+        """
+        Searches for forced mate by side to move within max_moves
+
+        Args:
+            board (chess.Board): board state to solve
+            node_limit (Optional[int]): nodes allowed. Defaults to
+                self.node_limit
+            time_limit (Optional[float]): seconds allowed
+        Returns:
+            (MateSearchResult): PROVEN with mating line, DISPROVEN if no
+                mate exists within max_moves, or UNPROVEN if budget ran out
+        """
+        self.nodes = 0
+        self._attacker = board.turn
+        if node_limit is None:
+            node_limit = self.node_limit
+        self._node_budget = node_limit
+        if time_limit is not None:
+            self._deadline = time.perf_counter() + time_limit
+        board = board.copy()
+        try:
+            phi, delta = self._mid(
+                board,
+                chess.polyglot.zobrist_hash(board),
+                self.max_moves,
+                PROOF_INFINITY,
+                PROOF_INFINITY,
+                set(),
+            )
+        except SearchAborted:
+            phi, delta = None, None
+        finally:
+            self._node_budget, self._deadline = None, None
+
+        if phi == 0:
+            self.result = MateSearchResult(
+                PROVEN, self._mating_line(board), self.nodes
+            )
+        elif delta == 0:
+            self.result = MateSearchResult(DISPROVEN, [], self.nodes)
+        else:
+            self.result = MateSearchResult(UNPROVEN, [], self.nodes)
+        return self.result
+
+    def evaluate(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+    ) -> None:
+        """
+        Solves board, mapping first move of proven mate in legal_moves
+
+        Args:
+            board (chess.Board): board state to evaluate
+            time_limit (Optional[float]): seconds allowed
+            node_limit (Optional[int]): nodes allowed
+        """
+        self.reset_move_variables()
+        result = self.solve(board, node_limit, time_limit)
+        if result.status == PROVEN and result.line:
+            self.legal_moves = {result.line[0]: 1}
+        self.material_difference.append(
+            self.evaluation_function.evaluate(board)
+        )
+
+    def move(self, board: chess.Board) -> chess.Move:
+        """
+        Plays first move of proven mate, otherwise move of fallback
+
+        Args:
+            board (chess.Board): board state to move from
+        Returns:
+            (chess.Move)
+        """
+        self._stop_requested = False
+        return self.search_move(board)
+
+    def search_move(
+        self,
+        board: chess.Board,
+        time_limit: Optional[float] = None,
+        node_limit: Optional[int] = None,
+        callback: Optional[Callable[[SearchUpdate], None]] = None,
+    ) -> chess.Move:
+        """
+        Solves board within limits and plays first move of proven mate,
+        otherwise move of fallback. Reports proven line to callback
+
+        Args:
+            board (chess.Board): board state to move from
+            time_limit (Optional[float]): seconds allowed
+            node_limit (Optional[int]): nodes allowed
+            callback (Optional[Callable[[SearchUpdate], None]]): called
+                with mating line once proven
+        Returns:
+            (chess.Move)
+        """
+        try:
+            self.evaluate(board, time_limit, node_limit)
+        finally:
+            self._stop_requested = False
+        if self.legal_moves:
+            if callback is not None:
+                # Scored as a tablebase win, mate distance in plies
+                callback(
+                    SearchUpdate(
+                        len(self.result.line),
+                        float(TABLEBASE_WIN - len(self.result.line)),
+                        list(self.result.line),
+                        self.nodes,
+                    )
+                )
+            return next(iter(self.legal_moves))
+        return self.fallback.move(board)
@@ -4,6 +4,7 @@ import random
 from typing import Dict, Iterable, List
 
 import chess  # type: ignore
+import numpy as np  # type: ignore
 
 from chessmate.constants.piece_values import ConventionalPieceValues
 from chessmate.utils import get_piece_at
@@ -53,3 +54,96 @@ def MVV_LVA(
     # If no captures, return shuffled list of all legal moves
     random.shuffle(move_list)
     return move_list
+
+
+class KillerHistoryHeuristic:
+    """
+    Move ordering that, in addition to sorting captures via. MVV_LVA, sorts
+    quiet moves by killer moves & history table. Killer moves are quiet
+    moves that recently caused a beta cutoff at the same ply, history
+    table counts cutoffs caused by each from-to pair weighted by depth.
+    Callable with board like MVV_LVA, so can be set as
+    MiniMax.ordering_heuristic
+
+    Attributes:
+        piece_values (Iterable): piece values used to sort captures
+        num_killers (int): number of killer move slots per ply
+        killers (Dict[int, List[chess.Move]]): killer moves for each ply
+            of game
+        history (np.ndarray): 64x64 counters indexed by from & to square
+
+    Methods:
+        store_cutoff(board, move, depth): records move causing cutoff.
+            Called by search
+        new_search(): forgets killers & ages history before a new search
+    """
+
+    def __init__(
+        self,
+        piece_values: Iterable = ConventionalPieceValues,
+        num_killers: int = 2,
+    ) -> None:
+        self.piece_values: Iterable = piece_values
+        self.num_killers: int = num_killers
+        self.killers: Dict[int, List[chess.Move]] = {}
+        self.history: np.ndarray = np.zeros((64, 64), dtype=np.int64)
+
+    def __call__(self, board: chess.Board) -> List[chess.Move]:
+        """
+        Sorts legal moves as captures by MVV_LVA, then killer moves, then
+        remaining moves by history score
+
+        Args:
+            board (chess.Board): current board state to evaluate
+        Returns:
+            (List[chess.Move]): all legal moves, sorted
+        """
+        captures = [
+            m for m in MVV_LVA(board, self.piece_values) if board.is_capture(m)
+        ]
+        ordered_captures = set(captures)
+        quiet_moves = [
+            m for m in board.legal_moves if m not in ordered_captures
+        ]
+
+        killers = [
+            m
+            for m in self.killers.get(len(board.move_stack), [])
+            if m in quiet_moves
+        ]
+        remaining = [m for m in quiet_moves if m not in killers]
+        remaining.sort(
+            key=lambda m: self.history[m.from_square, m.to_square],
+            reverse=True,
+        )
+
+        return captures + killers + remaining
+
+    def store_cutoff(
+        self, board: chess.Board, move: chess.Move, depth: int
+    ) -> None:
+        """
+        Records quiet move that caused a beta cutoff. Captures are already
+        ordered by MVV_LVA so aren't recorded
+
+        Args:
+            board (chess.Board): board state move was played from
+            move (chess.Move): move causing cutoff
+            depth (int): remaining depth of search at cutoff
+        """
+        if board.is_capture(move):
+            return
+
+        ply = len(board.move_stack)
+        ply_killers = self.killers.setdefault(ply, [])
+        if move not in ply_killers:
+            ply_killers.insert(0, move)
+            del ply_killers[self.num_killers :]
+
+        self.history[move.from_square, move.to_square] += depth * depth
+
+    def new_search(self) -> None:
+        """ Forgets killer moves and halves history so that recent cutoffs
+        outweigh older ones """
+        self.killers = {}
+        self.history //= 2
@@ -0,0 +1,235 @@
+""" Node store of Monte Carlo tree search """
+import math
+from typing import List
+
+import chess  # type: ignore
+import numpy as np  # type: ignore
+
+from chessmate.transpositions import decode_move, encode_move
+
+# Layout of a node. Value is the sum of playout results from perspective of
+# the side that played move into node. Children of a node are contiguous,
+# starting at first_child (-1 until expanded). Virtual visits count as
+# losses of playouts still in flight, steering batched selection apart
+NODE_DTYPE = np.dtype(
+    [
+        ("parent", np.int32),
+        ("move", np.uint16),
+        ("first_child", np.int32),
+        ("num_children", np.uint16),
+        ("visits", np.int32),
+        ("virtual", np.int32),
+        ("value", np.float64),
+        ("prior", np.float32),
+    ]
+)
+
+
+class MCTSTree:
+    """
+    Search tree of MCTS engine stored as one structured NumPy array of
+    NODE_DTYPE, so that selection scores all children of a node in one
+    vectorized step and trees of many thousand nodes stay compact. Node 0
+    is the root. The array doubles in size whenever full
+
+    Attributes:
+        nodes (np.ndarray): node store, of which the first size are in use
+        size (int): number of nodes in tree
+
+    Methods:
+        expand(node, moves, priors): adds children of node
+        children(node) -> np.ndarray: indices of children of node
+        select_child(node, exploration, puct) -> int: child maximizing UCT
+            or PUCT score
+        add_virtual_visit(path): marks playout through path in flight
+        backpropagate(path, results): adds playout result along path
+        best_child(node) -> int: most visited child
+        principal_variation() -> List[chess.Move]: most visited line
+        find(moves) -> int: node reached from root by moves
+        subtree(node) -> MCTSTree: copy of tree rooted at node
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        Args:
+            capacity (int): initial number of nodes allocated
+        """
+        self.nodes: np.ndarray = np.zeros(capacity, dtype=NODE_DTYPE)
+        self.nodes["parent"][0] = -1
+        self.nodes["first_child"][0] = -1
+        self.size: int = 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def expand(
+        self, node: int, moves: List[chess.Move], priors: np.ndarray
+    ) -> None:
+        """
+        Adds a child for each move of node
+
+        Args:
+            node (int): node to expand
+            moves (List[chess.Move]): legal moves of node
+            priors (np.ndarray): prior probability of each move
+        """
+        needed = self.size + len(moves)
+        if needed > len(self.nodes):
+            capacity = len(self.nodes)
+            while capacity < needed:
+                capacity *= 2
+            nodes = np.zeros(capacity, dtype=NODE_DTYPE)
+            nodes[: self.size] = self.nodes[: self.size]
+            self.nodes = nodes
+        children = self.nodes[self.size : needed]
+        children["parent"] = node
+        children["move"] = [encode_move(move) for move in moves]
+        children["first_child"] = -1
+        children["prior"] = priors
+        self.nodes["first_child"][node] = self.size
+        self.nodes["num_children"][node] = len(moves)
+        self.size = needed
+
+    def expanded(self, node: int) -> bool:
+        """ True once children of node were added """
+        return bool(self.nodes["first_child"][node] >= 0)
+
+    def children(self, node: int) -> np.ndarray:
+        """ Indices of children of node """
+        first = self.nodes["first_child"][node]
+        if first < 0:
+            return np.arange(0)
+        return np.arange(first, first + self.nodes["num_children"][node])
+
+    def move(self, node: int) -> chess.Move:
+        """ Move played into node """
+        return decode_move(int(self.nodes["move"][node]))
+
+    def select_child(
+        self, node: int, exploration: float, puct: bool = False
+    ) -> int:
+        """
+        Chooses child of node to descend into. UCT scores each child by
+        mean result plus exploration * sqrt(ln N / n), trying unvisited
+        children first, in order of prior. PUCT scores by mean result plus
+        exploration * prior * sqrt(N) / (1 + n), counting unvisited children
+        as draws
+
+        Args:
+            node (int): expanded node
+            exploration (float): weight of exploration term
+            puct (bool): True for PUCT, False for UCT
+        Returns:
+            (int): index of child
+        """
+        children = self.nodes[self.children(node)]
+        visits = children["visits"] + children["virtual"]
+        total = max(int(visits.sum()), 1)
+        unvisited = visits == 0
+        mean = children["value"] / np.maximum(visits, 1)
+        if puct:
+            mean[unvisited] = 0.5
+            scores = mean + exploration * children["prior"] * (
+                math.sqrt(total) / (1 + visits)
+            )
+        elif unvisited.any():
+            # Unvisited children first, in order of prior
+            scores = np.where(unvisited, children["prior"], -np.inf)
+        else:
+            scores = mean + exploration * np.sqrt(math.log(total) / visits)
+        return int(self.nodes["first_child"][node] + np.argmax(scores))
+
+    def add_virtual_visit(self, path: List[int], count: int = 1) -> None:
+        """
+        Adds count virtual visits to nodes of path
+
+        Args:
+            path (List[int]): nodes from root to leaf
+            count (int): virtual visits to add, negative to remove
+        """
+        self.nodes["virtual"][path] += count
+
+    def backpropagate(self, path: List[int], results: List[float]) -> None:
+        """
+        Adds a visit & result to each node of path
+
+        Args:
+            path (List[int]): nodes from root to leaf
+            results (List[float]): result of playout for each node, from
+                perspective of side that played move into node
+        """
+        self.nodes["visits"][path] += 1
+        self.nodes["value"][path] += results
+
+    def best_child(self, node: int = 0) -> int:
+        """ Most visited child of node, -1 if not expanded """
+        children = self.children(node)
+        if not len(children):
+            return -1
+        return int(children[np.argmax(self.nodes["visits"][children])])
+
+    def mean_value(self, node: int) -> float:
+        """ Mean result of node, from perspective of side that moved into
+        it """
+        visits = self.nodes["visits"][node]
+        return float(self.nodes["value"][node] / visits) if visits else 0.5
+
+    def principal_variation(self) -> List[chess.Move]:
+        """ Line of play following most visited children from root """
+        pv, node = [], self.best_child(0)
+        while node >= 0 and self.nodes["visits"][node] > 0:
+            pv.append(self.move(node))
+            node = self.best_child(node)
+        return pv
+
+    def find(self, moves: List[chess.Move]) -> int:
+        """
+        Follows moves from root
+
+        Args:
+            moves (List[chess.Move])
+        Returns:
+            (int): node reached, -1 if any move isn't in tree
+        """
+        node = 0
+        for move in moves:
+            encoded = encode_move(move)
+            children = self.children(node)
+            matches = children[self.nodes["move"][children] == encoded]
+            if not len(matches):
+                return -1
+            node = int(matches[0])
+        return node
+
+    def subtree(self, node: int) -> "MCTSTree":
+        """
+        Copies subtree rooted at node into a new compact tree, i.e to reuse
+        search of position reached after a move
+
+        Args:
+            node (int): new root
+        Returns:
+            (MCTSTree)
+        """
+        tree = MCTSTree(max(1024, self.size))
+        tree.nodes[0] = self.nodes[node]
+        tree.nodes["parent"][0] = -1
+        tree.nodes["virtual"][0] = 0
+        # Breadth first, so that children stay contiguous
+        queue, head = [(node, 0)], 0
+        while head < len(queue):
+            old, new = queue[head]
+            head += 1
+            children = self.children(old)
+            if not len(children):
+                tree.nodes["first_child"][new] = -1
+                continue
+            first = tree.size
+            block = tree.nodes[first : first + len(children)]
+            block[:] = self.nodes[children]
+            block["parent"] = new
+            block["virtual"] = 0
+            tree.nodes["first_child"][new] = first
+            tree.size += len(children)
+            queue.extend(zip(children.tolist(), range(first, tree.size)))
+        return tree
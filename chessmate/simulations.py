@@ -1,6 +1,7 @@
 """ Tools to simulate chess games """
+import threading
 from tempfile import TemporaryDirectory
-from typing import Callable, Dict, List, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import chess  # type: ignore
 import chess.pgn  # type: ignore
@@ -8,11 +9,22 @@ import chess.svg  # type: ignore
 from tqdm import tqdm  # type: ignore
 
 from chessmate.analysis import evaluate_ending_board
+from chessmate.books import BookBuilder
 from chessmate.constants.fens import FEN_MAPS
 from chessmate.constants.misc import COLOR_MAP
+from chessmate.endgames import Tablebase
+from chessmate.stats import SearchStatistics
 from chessmate.utils import is_valid_fen, render_svg_board
 
 
+# Descriptions of game results adjudicated by tablebase, as in all_results
+TABLEBASE_RESULTS = {
+    "1-0": "White win by tablebase",
+    "0-1": "Black win by tablebase",
+    "1/2-1/2": "Draw by tablebase",
+}
+
+
 class EnginePlay:
     """
     Base class for engine play. Used in classes in which engines
@@ -107,11 +119,25 @@ class PlayVsEngine(EnginePlay):
         player_side (chess.Color/bool): chess.WHITE or chess.BLACK for
             side to play as. Note that since python-chess encodes the color
             as a bool, decode it as color for displaying
+        ponder (bool): True for engine to search position after reply it
+            expects, i.e second move of its principal variation, while
+            player thinks. If player plays expected reply, engine plays move
+            found by pondering. Otherwise, pondering is stopped and engine
+            searches as usual, with transposition table partially warmed.
+            Requires engine with principal_variation i.e MiniMax.
+            Default=False
+        ponder_hits (int): number of player moves matching expected reply
+        ponder_misses (int): number of player moves not matching expected
+            reply
 
     Methods:
         player_move() -> chess.Move: allows player to push UCI move
         engine_move() -> chess.Move: allows engine to evaluate boardstate and
             push a move. Null if engine resigns
+        start_pondering() -> None: starts searching expected reply in
+            background thread
+        stop_pondering() -> Optional[chess.Move]: ends pondering, returning
+            move found if player played expected reply
         play_game() -> None: wrapper around player_move() & engine_move()
             with built-in logic to allow move by move play
         display_board() -> None: function to display board. Wrapper around
@@ -124,6 +150,13 @@ class PlayVsEngine(EnginePlay):
         self.engine = engine
         self._board: chess.Board = chess.Board()
         self._player_side: Union[chess.Color, bool] = chess.WHITE
+        self.ponder: bool = False
+        self.ponder_hits: int = 0
+        self.ponder_misses: int = 0
+        self._ponder_move: chess.Move = chess.Move.null()
+        self._ponder_thread: Optional[threading.Thread] = None
+        self._ponder_result: List[chess.Move] = []
+        self._ponder_error: Optional[BaseException] = None
 
     def __repr__(self):
         """ Print out current state of playvsengine. Useful for
@@ -192,15 +225,89 @@ class PlayVsEngine(EnginePlay):
             (chess.Move): UCI move from engine evaluation. Null if engine
                 resigned
         """
-        eng_move = self.engine.move(self._board)
+        eng_move = self.stop_pondering()
+        if eng_move is None:
+            eng_move = self.engine.move(self._board)
         self._board.push_uci(str(eng_move))
         self.append_move_to_tree(eng_move)
         self.display_board(
             f"Move {self._board.fullmove_number} - player to move."
         )
+        self.start_pondering()
 
         return eng_move
 
+    def start_pondering(self) -> None:
+        """
+        Starts engine searching position after expected reply of player in
+        a background thread, if pondering is enabled and engine expects a
+        reply
+        """
+        pv = getattr(self.engine, "principal_variation", [])
+        if not self.ponder or len(pv) < 2 or self._board.is_game_over():
+            return
+        if not self._board.is_legal(pv[1]):
+            return
+        board = self._board.copy()
+        board.push(pv[1])
+        if board.is_game_over():
+            return
+
+        self._ponder_move = pv[1]
+        self._ponder_result = []
+        self._ponder_error = None
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, args=(board,), daemon=True
+        )
+        self._ponder_thread.start()
+
+    def _ponder(self, board: chess.Board) -> None:
+        """ Body of ponder thread. Exceptions are kept for stop_pondering
+        to raise, since they can't propagate out of the thread """
+        try:
+            # Callback makes search iterative, so that it can be stopped
+            self._ponder_result.append(
+                self.engine.search_move(board, callback=lambda update: None)
+            )
+        except Exception as error:
+            self._ponder_error = error
+
+    def stop_pondering(self) -> Optional[chess.Move]:
+        """
+        Ends pondering once player has moved. If player played the
+        expected reply, waits for search of the position to finish.
+        Otherwise, stops search
+
+        Returns:
+            (Optional[chess.Move]): move found by pondering if player played
+                expected reply, else None
+        Raises:
+            Exception: raised by engine while pondering. Engine bookkeeping
+                is left untouched
+        """
+        if self._ponder_thread is None:
+            return None
+        hit = (
+            bool(self._board.move_stack)
+            and self._board.peek() == self._ponder_move
+        )
+        if not hit:
+            self.engine.stop()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        if self._ponder_error is not None:
+            error, self._ponder_error = self._ponder_error, None
+            raise error
+
+        if hit and self._ponder_result:
+            self.ponder_hits += 1
+            return self._ponder_result[0]
+        self.ponder_misses += 1
+        # Search of position not reached isn't an evaluation of a move
+        if self.engine.material_difference:
+            self.engine.material_difference.pop()
+        return None
+
     def play_game(self) -> None:
         """
         Wrapper around player_move() & engine_move() with simple logic built in
@@ -239,6 +346,7 @@ class PlayVsEngine(EnginePlay):
                 if user_move == chess.Move.null():
                     break
 
+        self.stop_pondering()
         self.display_board(f"{evaluate_ending_board(self._board)}!")
 
     def display_board(self, display_str: str) -> None:
@@ -273,11 +381,23 @@ class ChessPlayground(EnginePlay):
         all_material_differences (List[tuple]): contains mapping of value
             differential for each move across each game played in form
             (white engine evaluation, black engine evaluation) at each move
+        all_search_statistics (List[tuple]): search statistics of each game
+            played in form (white engine statistics, black engine
+            statistics), each summed over all moves of the game. None for
+            engines not collecting statistics
+        book_builder (Optional[BookBuilder]): if set, each finished game is
+            streamed into its move counts. Default=None
+        tablebase (Optional[Tablebase]): if set, games end as soon as the
+            position is within tables, with the result under perfect play.
+            Default=None
 
     Methods:
         play_game() -> None: plays a single game
         play_multiple_games(N) -> None: plays N games. Wrapper around
             play_game()
+        search_statistics() -> tuple: search statistics of white and black
+            engines summed over all games played
+        adjudicate() -> Optional[str]: tablebase result of current position
     """
 
     def __init__(self, white_engine, black_engine) -> None:
@@ -296,6 +416,9 @@ class ChessPlayground(EnginePlay):
         self.all_results: List[str] = []
         self.all_move_counts: List[int] = []
         self.all_material_differences: List[tuple] = []
+        self.all_search_statistics: List[tuple] = []
+        self.book_builder: Optional[BookBuilder] = None
+        self.tablebase: Optional[Tablebase] = None
 
     def __repr__(self):
         """ Print out current state of playground """
@@ -316,10 +439,17 @@ class ChessPlayground(EnginePlay):
         self._board = starting_board
         self.white_engine.reset_game_variables()
         self.black_engine.reset_game_variables()
+        white_statistics: List[SearchStatistics] = []
+        black_statistics: List[SearchStatistics] = []
 
+        adjudicated = None
         while not self._board.is_game_over():
+            adjudicated = self.adjudicate()
+            if adjudicated is not None:
+                break
             # If white ends game on move, don't execute black move
             white_move = self.white_engine.move(self._board)
+            self._collect_statistics(self.white_engine, white_statistics)
             if white_move == chess.Move.null():
                 break
 
@@ -328,7 +458,11 @@ class ChessPlayground(EnginePlay):
 
             # If white's move doesn't end game, play black's move
             if not self._board.is_game_over():
+                adjudicated = self.adjudicate()
+                if adjudicated is not None:
+                    break
                 black_move = self.black_engine.move(self._board)
+                self._collect_statistics(self.black_engine, black_statistics)
                 if black_move == chess.Move.null():
                     break
                 self._board.push_uci(str(black_move))
@@ -346,8 +480,79 @@ class ChessPlayground(EnginePlay):
             )
         )
 
+        self.all_search_statistics.append(
+            tuple(
+                SearchStatistics.combine(statistics) if statistics else None
+                for statistics in (white_statistics, black_statistics)
+            )
+        )
+
+        # Engine returning null move resigns, losing as side to move
+        if adjudicated is not None:
+            self.game.headers["Result"] = adjudicated
+        elif self._board.is_game_over():
+            self.game.headers["Result"] = self._board.result()
+        else:
+            self.game.headers["Result"] = (
+                "0-1" if self._board.turn == chess.WHITE else "1-0"
+            )
+        if self.book_builder is not None:
+            self.book_builder.add_game(self.game)
+
         self.game_pgns.append(self.game)
-        self.all_results.append(evaluate_ending_board(self._board))
+        if adjudicated is not None:
+            self.all_results.append(TABLEBASE_RESULTS[adjudicated])
+        else:
+            self.all_results.append(evaluate_ending_board(self._board))
+
+    def adjudicate(self) -> Optional[str]:
+        """
+        Result of current position under perfect play if within tablebase
+
+        Returns:
+            (Optional[str]): "1-0", "0-1" or "1/2-1/2". None without
+                tablebase or if position is not in tables
+        """
+        if self.tablebase is None:
+            return None
+        return self.tablebase.result(self._board)
+
+    @staticmethod
+    def _collect_statistics(
+        engine, statistics: List[SearchStatistics]
+    ) -> None:
+        """
+        Appends statistics of engine's last move if engine collects them
+
+        Args:
+            engine (ChessEngine)
+            statistics (List[SearchStatistics]): statistics of game so far
+        """
+        stats = getattr(engine, "stats", None)
+        if stats is not None:
+            statistics.append(stats)
+
+    def search_statistics(
+        self,
+    ) -> Tuple[Optional[SearchStatistics], Optional[SearchStatistics]]:
+        """
+        Sums search statistics of white and black engines over all games
+        played. None for engines not collecting statistics
+
+        Returns:
+            (Tuple[Optional[SearchStatistics], Optional[SearchStatistics]])
+        """
+        totals = []
+        for side in (0, 1):
+            statistics = [
+                game[side]
+                for game in self.all_search_statistics
+                if game[side] is not None
+            ]
+            totals.append(
+                SearchStatistics.combine(statistics) if statistics else None
+            )
+        return tuple(totals)
 
     def play_multiple_games(self, N: int = 100) -> None:
         """
@@ -0,0 +1,197 @@
+""" Statistics collected by engines while searching """
+from typing import Dict, Iterable
+
+# Components of search timed by SearchStatistics
+MOVE_GENERATION = "move_generation"
+ORDERING = "ordering"
+HASHING = "hashing"
+TRANSPOSITION_TABLE = "transposition_table"
+EVALUATION = "evaluation"
+COMPONENTS = (
+    MOVE_GENERATION,
+    ORDERING,
+    HASHING,
+    TRANSPOSITION_TABLE,
+    EVALUATION,
+)
+
+
+class SearchStatistics:
+    """
+    Counters and cumulative timings of a search. Engines only fill
+    statistics when collecting them is enabled, so searches without
+    statistics pay no more than a None check at each counter
+
+    Attributes:
+        nodes (int): nodes visited, including quiescence nodes
+        quiescence_nodes (int): nodes visited by quiescence search
+        interior_nodes (int): nodes at which moves were searched
+        moves_searched (int): moves searched from interior nodes
+        tt_probes (int): transposition table probes
+        tt_hits (int): probes finding an entry
+        tt_cutoffs (int): probes ending search of node
+        beta_cutoffs (int): interior nodes failing high
+        first_move_cutoffs (int): fail highs on first move searched
+        null_move_cutoffs (int): nodes pruned by null move search
+        lmr_researches (int): reduced searches repeated at full depth
+        pvs_researches (int): null window searches repeated with full window
+        aspiration_researches (int): root searches repeated with wider
+            aspiration window
+        mtdf_passes (int): null window searches run by MTD(f) driver
+        tablebase_hits (int): nodes valued by endgame tablebase probes
+        searches (int): number of searches, i.e moves, statistics cover
+        depth (int): sum of completed depths of searches
+        elapsed (float): seconds spent searching
+        times (Dict[str, float]): seconds spent in each of COMPONENTS
+
+    Methods:
+        merge(other): adds counters & timings of other statistics
+        combine(statistics) -> SearchStatistics: sum of statistics
+        tt_hit_rate() -> float: share of probes finding an entry
+        cutoff_rate() -> float: share of interior nodes failing high
+        first_move_cutoff_rate() -> float: share of fail highs on first
+            move, measuring quality of move ordering
+        branching_factor() -> float: moves searched per interior node
+        effective_branching_factor() -> float: nodes per search to the power
+            of 1 / depth
+        nodes_per_second() -> float
+        to_dict() -> Dict[str, float]: counters, timings & rates
+    """
+
+    COUNTERS = (
+        "nodes",
+        "quiescence_nodes",
+        "interior_nodes",
+        "moves_searched",
+        "tt_probes",
+        "tt_hits",
+        "tt_cutoffs",
+        "beta_cutoffs",
+        "first_move_cutoffs",
+        "null_move_cutoffs",
+        "lmr_researches",
+        "pvs_researches",
+        "aspiration_researches",
+        "mtdf_passes",
+        "tablebase_hits",
+        "searches",
+        "depth",
+    )
+
+    def __init__(self) -> None:
+        self.nodes: int = 0
+        self.quiescence_nodes: int = 0
+        self.interior_nodes: int = 0
+        self.moves_searched: int = 0
+        self.tt_probes: int = 0
+        self.tt_hits: int = 0
+        self.tt_cutoffs: int = 0
+        self.beta_cutoffs: int = 0
+        self.first_move_cutoffs: int = 0
+        self.null_move_cutoffs: int = 0
+        self.lmr_researches: int = 0
+        self.pvs_researches: int = 0
+        self.aspiration_researches: int = 0
+        self.mtdf_passes: int = 0
+        self.tablebase_hits: int = 0
+        self.searches: int = 0
+        self.depth: int = 0
+        self.elapsed: float = 0.0
+        self.times: Dict[str, float] = {
+            component: 0.0 for component in COMPONENTS
+        }
+
+    def __repr__(self):
+        """ Print out counters, timings & rates """
+        return "\n".join(
+            f"{name}: {value:.4g}" for name, value in self.to_dict().items()
+        )
+
+    def merge(self, other: "SearchStatistics") -> None:
+        """
+        Adds counters & timings of other statistics to these
+
+        Args:
+            other (SearchStatistics)
+        """
+        for counter in self.COUNTERS:
+            setattr(
+                self, counter, getattr(self, counter) + getattr(other, counter)
+            )
+        self.elapsed += other.elapsed
+        for component, seconds in other.times.items():
+            self.times[component] = self.times.get(component, 0.0) + seconds
+
+    @classmethod
+    def combine(
+        cls, statistics: Iterable["SearchStatistics"]
+    ) -> "SearchStatistics":
+        """
+        Sums statistics, i.e of every move of a game
+
+        Args:
+            statistics (Iterable[SearchStatistics])
+        Returns:
+            (SearchStatistics)
+        """
+        total = cls()
+        for stats in statistics:
+            total.merge(stats)
+        return total
+
+    @staticmethod
+    def _ratio(numerator: float, denominator: float) -> float:
+        return numerator / denominator if denominator else 0.0
+
+    def tt_hit_rate(self) -> float:
+        """ Share of transposition table probes finding an entry """
+        return self._ratio(self.tt_hits, self.tt_probes)
+
+    def cutoff_rate(self) -> float:
+        """ Share of interior nodes failing high """
+        return self._ratio(self.beta_cutoffs, self.interior_nodes)
+
+    def first_move_cutoff_rate(self) -> float:
+        """ Share of fail highs caused by first move searched. Close to 1
+        with good move ordering """
+        return self._ratio(self.first_move_cutoffs, self.beta_cutoffs)
+
+    def branching_factor(self) -> float:
+        """ Average number of moves searched per interior node """
+        return self._ratio(self.moves_searched, self.interior_nodes)
+
+    def effective_branching_factor(self) -> float:
+        """ Branching factor of a uniform tree with as many nodes per search
+        as searched, to the average completed depth """
+        if not self.searches or not self.depth:
+            return 0.0
+        depth = self.depth / self.searches
+        return (self.nodes / self.searches) ** (1 / depth)
+
+    def nodes_per_second(self) -> float:
+        """ Nodes visited per second of search """
+        return self._ratio(self.nodes, self.elapsed)
+
+    def to_dict(self) -> Dict[str, float]:
+        """
+        Collects counters, timings & rates, i.e for tabulating
+
+        Returns:
+            (Dict[str, float])
+        """
+        results: Dict[str, float] = {
+            counter: getattr(self, counter) for counter in self.COUNTERS
+        }
+        results["elapsed"] = self.elapsed
+        results.update(
+            {f"{component}_time": t for component, t in self.times.items()}
+        )
+        results["tt_hit_rate"] = self.tt_hit_rate()
+        results["cutoff_rate"] = self.cutoff_rate()
+        results["first_move_cutoff_rate"] = self.first_move_cutoff_rate()
+        results["branching_factor"] = self.branching_factor()
+        results[
+            "effective_branching_factor"
+        ] = self.effective_branching_factor()
+        results["nodes_per_second"] = self.nodes_per_second()
+        return results
@@ -1,12 +1,18 @@
 """ Functions related to hash_tableing and transposition tables """
+import os
 import random
-from typing import Dict, List
+import weakref
+from collections.abc import MutableMapping
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 import chess  # type: ignore
+import numpy as np  # type: ignore
 
 from chessmate.analysis import StandardEvaluation
-from chessmate.constants.misc import PIECE_INDEXING
-from chessmate.utils import get_piece_at, is_valid_fen
+from chessmate.constants.misc import (ALWAYS_REPLACE, DEPTH_PREFERRED, EXACT,
+                                      PIECE_INDEXING, TWO_TIER)
+from chessmate.utils import is_valid_fen
 
 
 def zobrist_hash_function(board: chess.Board, hash_table: List) -> int:
@@ -20,18 +26,218 @@ def zobrist_hash_function(board: chess.Board, hash_table: List) -> int:
         (int): hashed board
     """
     _hash = 0
-    for square in chess.SQUARES:
-        piece = get_piece_at(board=board, position=square)
-        # If piece on square, hash piece based off piece identity and position
-        if piece:
-            piece_idx = PIECE_INDEXING[piece]
-            rank, _file = chess.square_rank(square), chess.square_file(square)
-            # Bitwise XOR on _hash
-            _hash ^= hash_table[rank][_file][piece_idx]
+    # Hash each occupied square based off piece identity and position
+    for square, piece in board.piece_map().items():
+        piece_idx = PIECE_INDEXING[piece.symbol()]
+        rank, _file = chess.square_rank(square), chess.square_file(square)
+        # Bitwise XOR on _hash
+        _hash ^= hash_table[rank][_file][piece_idx]
 
     return _hash
 
 
+# Layout of a single transposition table slot. Slots with negative depth
+# are empty
+ENTRY_DTYPE = np.dtype(
+    [
+        ("key", np.uint64),
+        ("value", np.float64),
+        ("depth", np.int16),
+        ("flag", np.uint8),
+        ("generation", np.uint8),
+        ("move", np.uint16),
+    ]
+)
+
+# Layout of transposition table file written by TranspositionTable.save.
+# Header is followed by zobrist keys, slots, then stored_values as
+# VALUE_DTYPE pairs sorted by key
+TABLE_MAGIC = b"CMTTABLE"
+TABLE_VERSION = 2
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", np.uint32),
+        ("replacement", "S16"),
+        ("generation", np.uint8),
+        ("num_slots", np.uint64),
+        ("num_values", np.uint64),
+    ]
+)
+VALUE_DTYPE = np.dtype([("key", np.uint64), ("value", np.float64)])
+# 8x8x12 piece keys, side key, 4 castling keys and 8 en passant keys
+NUM_ZOBRIST_KEYS = 8 * 8 * 12 + 1 + 4 + 8
+# Slots written per chunk when saving, bounding memory used by save
+SAVE_CHUNK_SLOTS = 2 ** 20
+
+
+def entry_data(entries: np.ndarray) -> np.ndarray:
+    """
+    Packs every field of slots except key into one 64 bit word per slot,
+    for lockless verification of slots shared between processes i.e
+    key ^ data is stored as key, so a slot whose fields were written by
+    different stores doesn't verify against the hash of either
+
+    Args:
+        entries (np.ndarray): slots of ENTRY_DTYPE
+    Returns:
+        (np.ndarray): uint64 data words
+    """
+    meta = (
+        entries["depth"].astype(np.uint16).astype(np.uint64)
+        | entries["flag"].astype(np.uint64) << np.uint64(16)
+        | entries["generation"].astype(np.uint64) << np.uint64(24)
+        | entries["move"].astype(np.uint64) << np.uint64(32)
+    )
+    return entries["value"].view(np.uint64) ^ meta
+
+
+def encode_move(move: chess.Move) -> int:
+    """
+    Packs move into 16 bits as from | to << 6 | promotion << 12. Null
+    move is encoded as 0
+
+    Args:
+        move (chess.Move)
+    Returns:
+        (int)
+    """
+    if not move:
+        return 0
+    return (
+        move.from_square
+        | (move.to_square << 6)
+        | ((move.promotion or 0) << 12)
+    )
+
+
+def decode_move(code: int) -> chess.Move:
+    """
+    Unpacks move packed by encode_move
+
+    Args:
+        code (int)
+    Returns:
+        (chess.Move)
+    """
+    if not code:
+        return chess.Move.null()
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) or None)
+
+
+class MappedValues(MutableMapping):
+    """
+    stored_values of a table loaded from file. Values saved with the table
+    stay memory mapped, sorted by key, and are found by binary search, so
+    only pages probed are read. Values stored since loading are kept in a
+    dict on top
+
+    Attributes:
+        path (str): file values are mapped from
+        offset (int): byte offset of values in file
+        mapped (np.ndarray): VALUE_DTYPE values sorted by key
+    """
+
+    def __init__(self, path: str, offset: int, count: int) -> None:
+        """
+        Args:
+            path (str): file path
+            offset (int): byte offset of values in file
+            count (int): number of values in file
+        """
+        self.path: str = path
+        self.offset: int = offset
+        self.mapped: np.ndarray = self._map(count)
+        self._added: Dict[int, float] = {}
+        self._removed: Set[int] = set()
+        self._size: int = count
+
+    def _map(self, count: int) -> np.ndarray:
+        """ Maps values of file read only. np.memmap can't map 0 bytes """
+        if count == 0:
+            return np.zeros(0, dtype=VALUE_DTYPE)
+        return np.memmap(
+            self.path,
+            dtype=VALUE_DTYPE,
+            mode="r",
+            offset=self.offset,
+            shape=count,
+        )
+
+    def __getstate__(self) -> dict:
+        """ Values are remapped from file on unpickling i.e in worker
+        processes of parallel searches, rather than copied """
+        state = self.__dict__.copy()
+        state["mapped"] = len(self.mapped)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.mapped = self._map(state["mapped"])
+
+    def _find(self, key) -> int:
+        """ Index of key in mapped values, -1 if not saved """
+        if not isinstance(key, int) or not 0 <= key < 2 ** 64:
+            return -1
+        index = int(np.searchsorted(self.mapped["key"], np.uint64(key)))
+        if index < len(self.mapped) and int(self.mapped["key"][index]) == key:
+            return index
+        return -1
+
+    def __getitem__(self, key) -> float:
+        if key in self._added:
+            return self._added[key]
+        index = -1 if key in self._removed else self._find(key)
+        if index < 0:
+            raise KeyError(key)
+        return float(self.mapped["value"][index])
+
+    def __setitem__(self, key, value) -> None:
+        if key not in self:
+            self._size += 1
+        self._added[key] = value
+        self._removed.discard(key)
+
+    def __delitem__(self, key) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._added.pop(key, None)
+        if self._find(key) >= 0:
+            self._removed.add(key)
+        self._size -= 1
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self._added
+        for start in range(0, len(self.mapped), SAVE_CHUNK_SLOTS):
+            for key in self.mapped["key"][
+                start : start + SAVE_CHUNK_SLOTS
+            ].tolist():
+                if key not in self._added and key not in self._removed:
+                    yield key
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class TranspositionEntry(NamedTuple):
+    """
+    Result of searching a position
+
+    Attributes:
+        value (float): evaluation of position from perspective of side to
+            move
+        depth (int): remaining depth position was searched to
+        flag (int): one of EXACT, LOWER_BOUND, UPPER_BOUND describing
+            whether value is exact or only a bound from a pruned search
+        best_move (chess.Move): best move found in position. Null if none
+    """
+
+    value: float
+    depth: int
+    flag: int
+    best_move: chess.Move
+
+
 class TranspositionTable:
     """
     Base class for transposition tables
@@ -40,8 +246,21 @@ class TranspositionTable:
         hash_function (Callable): function that hashed board to int
         hash_table (List): hash table to feed into hash function.
             Randomly generated by default
+        side_key (int): hashed in when black is to move
+        castling_keys (Dict[chess.Square, int]): hashed in for each castling
+            right, keyed by square of castling rook
+        en_passant_keys (List[int]): hashed in for file of en passant square
         evaluation_function: function to evaluate boardstate
-        stored_values (Dict[int, int]): table to store results
+        stored_values (Dict[int, int]): table to store static evaluations.
+            MappedValues once loaded from file
+        size_mb (float): memory allotted to search results in megabytes
+        replacement (str): replacement scheme of occupied slots. One of
+            DEPTH_PREFERRED, ALWAYS_REPLACE or TWO_TIER, where TWO_TIER
+            buckets a depth-preferred slot with an always-replace slot
+        generation (int): age of current search. Slots written in earlier
+            searches are replaced first
+        slots (np.ndarray): preallocated ENTRY_DTYPE array of search results
+            with depth, bound type and best move, indexed by low bits of hash
 
     Methods:
         hash_current_board (chess.Board): hashes current board WITHOUT storing
@@ -51,9 +270,28 @@ class TranspositionTable:
         store_current_board (chess.Board): hashes and evaluates
             board based off hash_function and evaluation_function
             respectively, store hashed board eval in stored_values
+        hash_position (chess.Board): hashes board including side to move,
+            castling rights and en passant square. Used as key of entries
+        make_move (chess.Board, chess.Move, int): pushes move and updates
+            hash_position hash incrementally
+        store (hash_, value, depth, flag, best_move): stores search result
+        probe (hash_) -> Optional[TranspositionEntry]: retrieves search
+            result if position stored
+        new_search (): ages slots written by previous searches
+        clear (): empties all slots
+        zobrist_keys () -> List[int]: flattens all zobrist keys
+        set_zobrist_keys (keys): replaces zobrist keys with flattened keys
+        save (path): writes zobrist keys, slots and stored_values to file
+        load (path, hash_function, mode) -> TranspositionTable: maps table
+            written by save back into memory
     """
 
-    def __init__(self, hash_function) -> None:
+    def __init__(
+        self,
+        hash_function,
+        size_mb: float = 16,
+        replacement: str = TWO_TIER,
+    ) -> None:
         self.hash_function = hash_function
         self._hash_table = [
             [
@@ -62,14 +300,50 @@ class TranspositionTable:
             ]
             for k in range(8)
         ]
+        self.side_key: int = random.randint(1, 2 ** 64 - 1)
+        self.castling_keys: Dict[chess.Square, int] = {
+            square: random.randint(1, 2 ** 64 - 1)
+            for square in (chess.A1, chess.H1, chess.A8, chess.H8)
+        }
+        self.en_passant_keys: List[int] = [
+            random.randint(1, 2 ** 64 - 1) for i in range(8)
+        ]
         self.evaluation_function = StandardEvaluation
         self.stored_values: Dict[int, int] = {}
+        if replacement not in (DEPTH_PREFERRED, ALWAYS_REPLACE, TWO_TIER):
+            raise ValueError(f"Invalid replacement scheme {replacement}")
+        self.size_mb: float = size_mb
+        self.replacement: str = replacement
+        self.generation: int = 0
+
+        # Round number of slots down to power of 2 so that slot index is
+        # simply the low bits of the hash
+        num_slots = max(int(size_mb * 2 ** 20) // ENTRY_DTYPE.itemsize, 2)
+        num_slots = 1 << (num_slots.bit_length() - 1)
+        self.slots: np.ndarray = self._allocate_slots(num_slots)
+        self._bucket_size: int = 2 if replacement == TWO_TIER else 1
+        self._index_mask: int = (num_slots - 1) & ~(self._bucket_size - 1)
 
     def __len__(self):
-        return len(self.stored_values)
+        return int(np.count_nonzero(self.slots["depth"] >= 0))
 
     def __contains__(self, hash_str: str) -> bool:
-        return hash_str in self.stored_values
+        return (
+            self.probe(hash_str) is not None or hash_str in self.stored_values
+        )
+
+    def _allocate_slots(self, num_slots: int) -> np.ndarray:
+        """
+        Allocates empty slot array
+
+        Args:
+            num_slots (int)
+        Returns:
+            (np.ndarray)
+        """
+        slots = np.zeros(num_slots, dtype=ENTRY_DTYPE)
+        slots["depth"] = -1
+        return slots
 
     @property
     def hash_table(self) -> List:
@@ -97,6 +371,91 @@ class TranspositionTable:
         """
         return self.hash_function(board, self._hash_table)
 
+    def hash_state(self, board: chess.Board) -> int:
+        """
+        Hashes side to move, castling rights and en passant square
+
+        Args:
+            board (chess.Board): board state
+        Returns:
+            (int)
+        """
+        _hash = 0
+        if board.turn == chess.BLACK:
+            _hash ^= self.side_key
+        rights = board.castling_rights & chess.BB_CORNERS
+        for square in chess.scan_forward(rights):
+            _hash ^= self.castling_keys[square]
+        if board.ep_square is not None:
+            _hash ^= self.en_passant_keys[chess.square_file(board.ep_square)]
+        return _hash
+
+    def hash_position(self, board: chess.Board) -> int:
+        """
+        Hashes full position i.e pieces as well as side to move, castling
+        rights and en passant square. Unlike hash_current_board, positions
+        differing only by side to move hash differently
+
+        Args:
+            board (chess.Board): board state
+        Returns:
+            (int)
+        """
+        return self.hash_current_board(board) ^ self.hash_state(board)
+
+    def _piece_key(self, square: chess.Square, piece: chess.Piece) -> int:
+        """ Gets key of piece on square from hash_table """
+        return self._hash_table[chess.square_rank(square)][
+            chess.square_file(square)
+        ][PIECE_INDEXING[piece.symbol()]]
+
+    def make_move(
+        self, board: chess.Board, move: chess.Move, hash_: int
+    ) -> int:
+        """
+        Pushes move onto board and returns hash_position of resulting board
+        by XORing only the keys the move changes, so cost is constant
+        instead of a scan of the board. To unmake, pop board and reuse hash
+        from before the move. Assumes the zobrist_hash_function layout of
+        hash_table
+
+        Args:
+            board (chess.Board): board state before move
+            move (chess.Move): legal or null move to push
+            hash_ (int): hash_position of board before move
+        Returns:
+            (int): hash_position of board after move
+        """
+        hash_ ^= self.hash_state(board)
+        # Null moves only pass the turn
+        if move:
+            piece = board.piece_at(move.from_square)
+            hash_ ^= self._piece_key(move.from_square, piece)
+            if board.is_castling(move):
+                # King moves two squares towards rook, rook jumps over king
+                rank = chess.square_rank(move.from_square)
+                kingside = board.is_kingside_castling(move)
+                rook = chess.Piece(chess.ROOK, board.turn)
+                king_to = chess.square(6 if kingside else 2, rank)
+                rook_from = chess.square(7 if kingside else 0, rank)
+                rook_to = chess.square(5 if kingside else 3, rank)
+                hash_ ^= self._piece_key(king_to, piece)
+                hash_ ^= self._piece_key(rook_from, rook)
+                hash_ ^= self._piece_key(rook_to, rook)
+            else:
+                captured_square = move.to_square
+                if board.is_en_passant(move):
+                    captured_square += -8 if board.turn else 8
+                captured = board.piece_at(captured_square)
+                if captured:
+                    hash_ ^= self._piece_key(captured_square, captured)
+                if move.promotion:
+                    piece = chess.Piece(move.promotion, board.turn)
+                hash_ ^= self._piece_key(move.to_square, piece)
+
+        board.push(move)
+        return hash_ ^ self.hash_state(board)
+
     def get_evaluation_from_fen(self, fen: str) -> int:
         """
         Gets evaluation of position via. FEN string if position evaluation
@@ -123,3 +482,479 @@ class TranspositionTable:
         hash_ = self.hash_current_board(board)
         evaluation = self.evaluation_function().evaluate(board)
         self.stored_values[hash_] = evaluation
+        # A static evaluation is an exact search result at depth 0. Search
+        # results are stored from perspective of side to move
+        relative_evaluation = evaluation if board.turn else -evaluation
+        self.store(
+            self.hash_position(board),
+            relative_evaluation,
+            0,
+            EXACT,
+            chess.Move.null(),
+        )
+
+    def store(
+        self,
+        hash_: int,
+        value: float,
+        depth: int,
+        flag: int,
+        best_move: chess.Move,
+    ) -> None:
+        """
+        Stores result of searching position in slot indexed by hash. Under
+        depth-preferred replacement, results from shallower searches don't
+        replace deeper ones written in the current search
+
+        Args:
+            hash_ (int): hash of position
+            value (float): evaluation of position
+            depth (int): remaining depth position was searched to
+            flag (int): EXACT, LOWER_BOUND or UPPER_BOUND
+            best_move (chess.Move): best move found in position
+        """
+        index = hash_ & self._index_mask
+        if self.replacement != ALWAYS_REPLACE:
+            slot = self.slots[index]
+            replaceable = (
+                slot["depth"] < 0
+                or slot["generation"] != self.generation
+                or depth >= slot["depth"]
+            )
+            if not replaceable:
+                # Second slot of two-tier bucket is always replaced
+                if self.replacement == DEPTH_PREFERRED:
+                    return
+                index += 1
+
+        self.slots[index] = self._pack_entry(
+            (
+                hash_,
+                value,
+                depth,
+                flag,
+                self.generation,
+                encode_move(best_move),
+            )
+        )
+
+    def probe(self, hash_: int) -> Optional[TranspositionEntry]:
+        """
+        Retrieves result of searching position if stored
+
+        Args:
+            hash_ (int): hash of position
+        Returns:
+            (Optional[TranspositionEntry])
+        """
+        index = hash_ & self._index_mask
+        # Bucket is copied so that slots can't change while being read
+        bucket = self.slots[index : index + self._bucket_size].copy()
+        for slot, key in zip(bucket, self._entry_keys(bucket)):
+            if slot["depth"] >= 0 and int(key) == hash_:
+                return TranspositionEntry(
+                    float(slot["value"]),
+                    int(slot["depth"]),
+                    int(slot["flag"]),
+                    decode_move(int(slot["move"])),
+                )
+        return None
+
+    def _pack_entry(self, entry: tuple) -> tuple:
+        """
+        Converts entry fields to form written to slot
+
+        Args:
+            entry (tuple): key, value, depth, flag, generation & move
+        Returns:
+            (tuple)
+        """
+        return entry
+
+    def _entry_keys(self, bucket: np.ndarray) -> np.ndarray:
+        """
+        Recovers hashes of positions stored in slots
+
+        Args:
+            bucket (np.ndarray): slots of ENTRY_DTYPE
+        Returns:
+            (np.ndarray)
+        """
+        return bucket["key"]
+
+    def new_search(self) -> None:
+        """ Ages slots written by previous searches so they're replaced
+        before slots written in the current search """
+        self.generation = (self.generation + 1) % 256
+
+    def clear(self) -> None:
+        """ Empties all slots """
+        self.slots["depth"] = -1
+        self.generation = 0
+
+    def zobrist_keys(self) -> List[int]:
+        """
+        Flattens piece, side, castling and en passant keys, in that order
+
+        Returns:
+            (List[int])
+        """
+        keys = [
+            key for rank in self._hash_table for file in rank for key in file
+        ]
+        keys.append(self.side_key)
+        keys.extend(
+            self.castling_keys[square] for square in sorted(self.castling_keys)
+        )
+        keys.extend(self.en_passant_keys)
+        return keys
+
+    def set_zobrist_keys(self, keys: List[int]) -> None:
+        """
+        Replaces keys with keys flattened by zobrist_keys. Entries hashed
+        with previous keys no longer match
+
+        Args:
+            keys (List[int])
+        """
+        if len(keys) != NUM_ZOBRIST_KEYS:
+            raise ValueError(
+                f"Expected {NUM_ZOBRIST_KEYS} zobrist keys, got {len(keys)}"
+            )
+        self._hash_table = [
+            [keys[96 * i + 12 * j : 96 * i + 12 * (j + 1)] for j in range(8)]
+            for i in range(8)
+        ]
+        self.side_key = keys[768]
+        self.castling_keys = dict(
+            zip(sorted(self.castling_keys), keys[769:773])
+        )
+        self.en_passant_keys = list(keys[773:])
+
+    def save(self, path: str) -> None:
+        """
+        Writes table to binary file so that it can be mapped back by load,
+        i.e in a later process. Slots are written in chunks, so tables
+        larger than memory of a single copy can be saved
+
+        Args:
+            path (str): file path
+        """
+        header = np.array(
+            [
+                (
+                    TABLE_MAGIC,
+                    TABLE_VERSION,
+                    self.replacement.encode(),
+                    self.generation,
+                    len(self.slots),
+                    len(self.stored_values),
+                )
+            ],
+            dtype=HEADER_DTYPE,
+        )
+        values = np.fromiter(
+            self.stored_values.items(),
+            dtype=VALUE_DTYPE,
+            count=len(self.stored_values),
+        )
+        # Sorted so that load can binary search values without reading them
+        values.sort(order="key")
+        with open(path, "wb") as file:
+            header.tofile(file)
+            np.array(self.zobrist_keys(), dtype=np.uint64).tofile(file)
+            for start in range(0, len(self.slots), SAVE_CHUNK_SLOTS):
+                chunk = self.slots[start : start + SAVE_CHUNK_SLOTS].copy()
+                chunk["key"] = self._entry_keys(chunk)
+                chunk.tofile(file)
+            values.tofile(file)
+
+    @staticmethod
+    def load(
+        path: str, hash_function=zobrist_hash_function, mode: str = "c"
+    ) -> "TranspositionTable":
+        """
+        Maps table written by save into memory. Slots & stored_values are
+        memory mapped rather than read, so loading is immediate regardless
+        of size and pages of the file are only read once probed
+
+        Args:
+            path (str): file path
+            hash_function (Callable): hash function of table.
+                Default=zobrist_hash_function
+            mode (str): np.memmap mode of slots. "c" keeps stores in memory
+                only, "r+" writes stores back to file. Default="c"
+        Raises:
+            ValueError: if file isn't a transposition table of this version
+        Returns:
+            (TranspositionTable)
+        """
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if (
+            len(header) == 0
+            or header["magic"][0] != TABLE_MAGIC
+            or header["version"][0] != TABLE_VERSION
+        ):
+            raise ValueError(f"{path} is not a transposition table file")
+        num_slots = int(header["num_slots"][0])
+        num_values = int(header["num_values"][0])
+
+        offset = HEADER_DTYPE.itemsize
+        keys = np.fromfile(
+            path, dtype=np.uint64, count=NUM_ZOBRIST_KEYS, offset=offset
+        )
+        offset += keys.nbytes
+        slots = np.memmap(
+            path, dtype=ENTRY_DTYPE, mode=mode, offset=offset, shape=num_slots
+        )
+        offset += slots.nbytes
+        values = MappedValues(path, offset, num_values)
+
+        table = TranspositionTable(
+            hash_function,
+            size_mb=0,
+            replacement=header["replacement"][0].decode(),
+        )
+        table.set_zobrist_keys(keys.tolist())
+        table.stored_values = values
+        table.generation = int(header["generation"][0])
+        table.size_mb = slots.nbytes / 2 ** 20
+        table.slots = slots
+        table._index_mask = (num_slots - 1) & ~(table._bucket_size - 1)
+        return table
+
+
+def _unlink_shared_memory(
+    shm: shared_memory.SharedMemory, owner_pid: int
+) -> None:
+    """
+    Frees shared memory block if called from process that created it, so
+    that copies of a table in forked processes don't free it
+
+    Args:
+        shm (shared_memory.SharedMemory)
+        owner_pid (int): pid of creating process
+    """
+    if os.getpid() == owner_pid:
+        shm.unlink()
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    Transposition table whose slots live in a multiprocessing.shared_memory
+    block, so that several processes probe & store into the same table i.e
+    for parallel search. Pickling the table (as when passing it to another
+    process) sends only the block name & zobrist keys, and unpickling
+    attaches to the same block, so all processes hash identically
+
+    Processes store & probe without locks. Since slot writes aren't atomic,
+    a probe racing a store in another process may read fields of both
+    entries, so each slot stores key XOR data of its other fields (see
+    entry_data). A mixed slot then fails verification and is treated as
+    a miss
+
+    Attributes:
+        name (str): name of shared memory block
+
+    Methods:
+        from_table(table): copies TranspositionTable into shared memory
+        close(): detaches from shared memory block
+        unlink(): frees shared memory block. Called by creating process
+    """
+
+    def __init__(
+        self,
+        hash_function,
+        size_mb: float = 16,
+        replacement: str = TWO_TIER,
+    ) -> None:
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._finalizer: Optional[weakref.finalize] = None
+        super().__init__(hash_function, size_mb, replacement)
+        self.name: str = self._shm.name
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state["_shm"], state["slots"], state["_finalizer"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._finalizer = None
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, track=False)
+        except TypeError:
+            # Before python 3.13 attaching registers block with resource
+            # tracker, which would free it when this process exits
+            self._shm = shared_memory.SharedMemory(name=self.name)
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        self.slots = np.ndarray(
+            self._index_mask + self._bucket_size,
+            dtype=ENTRY_DTYPE,
+            buffer=self._shm.buf,
+        )
+
+    def _allocate_slots(self, num_slots: int) -> np.ndarray:
+        """ Allocates empty slot array in new shared memory block """
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=num_slots * ENTRY_DTYPE.itemsize
+        )
+        # Block is freed once table is garbage collected or at exit,
+        # but only by creating process
+        self._finalizer = weakref.finalize(
+            self, _unlink_shared_memory, self._shm, os.getpid()
+        )
+        slots = np.ndarray(num_slots, dtype=ENTRY_DTYPE, buffer=self._shm.buf)
+        slots["depth"] = -1
+        return slots
+
+    def _pack_entry(self, entry: tuple) -> np.ndarray:
+        """ Stores key XOR data so that slot verifies only if every field
+        was written by the same store """
+        record = np.array(entry, dtype=ENTRY_DTYPE)
+        record["key"] ^= entry_data(record)
+        return record
+
+    def _entry_keys(self, bucket: np.ndarray) -> np.ndarray:
+        """ Recovers hashes of positions stored in slots. Mixed slots
+        recover a hash matching neither position """
+        return bucket["key"] ^ entry_data(bucket)
+
+    @classmethod
+    def from_table(
+        cls, table: TranspositionTable
+    ) -> "SharedTranspositionTable":
+        """
+        Copies table, including zobrist keys & stored results, into shared
+        memory
+
+        Args:
+            table (TranspositionTable)
+        Returns:
+            (SharedTranspositionTable)
+        """
+        shared = cls(table.hash_function, table.size_mb, table.replacement)
+        shared.hash_table = table.hash_table
+        shared.side_key = table.side_key
+        shared.castling_keys = table.castling_keys
+        shared.en_passant_keys = table.en_passant_keys
+        shared.evaluation_function = table.evaluation_function
+        shared.stored_values = table.stored_values
+        shared.generation = table.generation
+        shared.slots[:] = table.slots
+        shared.slots["key"] ^= entry_data(shared.slots)
+        return shared
+
+    def close(self) -> None:
+        """ Detaches from shared memory block. Table is unusable after """
+        if self._shm is not None:
+            # Array must be released before block can close
+            self.slots = None
+            self._shm.close()
+
+    def unlink(self) -> None:
+        """ Frees shared memory block once every process has closed it """
+        if self._finalizer is not None:
+            self._finalizer()
+        self._shm = None
+
+
+# Layout of a proof table slot. Slots with negative moves are empty
+PROOF_DTYPE = np.dtype(
+    [
+        ("key", np.uint64),
+        ("phi", np.uint32),
+        ("delta", np.uint32),
+        ("work", np.uint32),
+        ("moves", np.int16),
+    ]
+)
+
+
+class ProofTable:
+    """
+    Bounded table of proof & disproof numbers for proof number search, in
+    phi/delta form i.e from perspective of side to move. Entries are keyed
+    by position hash and moves left to mate, since a position may be
+    disproven with one move left yet proven with two. Slots are
+    preallocated in buckets of two: the first keeps whichever entry took
+    more work (nodes searched below it) to compute, the second is always
+    replaced, evicting its entry
+
+    Attributes:
+        size_mb (float): memory allotted to slots in megabytes
+        slots (np.ndarray): PROOF_DTYPE slots indexed by low bits of hash
+        evictions (int): entries overwritten by other positions
+
+    Methods:
+        probe(hash_, moves) -> Optional[Tuple[int, int]]: phi & delta if
+            stored
+        store(hash_, moves, phi, delta, work): stores proof numbers
+        clear(): empties all slots
+    """
+
+    def __init__(self, size_mb: float = 16) -> None:
+        """
+        Args:
+            size_mb (float): memory allotted to slots in megabytes
+        """
+        self.size_mb: float = size_mb
+        num_slots = max(int(size_mb * 2 ** 20) // PROOF_DTYPE.itemsize, 2)
+        num_slots = 1 << (num_slots.bit_length() - 1)
+        self.slots: np.ndarray = np.zeros(num_slots, dtype=PROOF_DTYPE)
+        self.slots["moves"] = -1
+        self.evictions: int = 0
+        self._index_mask: int = (num_slots - 1) & ~1
+
+    def __len__(self):
+        return int(np.count_nonzero(self.slots["moves"] >= 0))
+
+    def probe(self, hash_: int, moves: int) -> Optional[Tuple[int, int]]:
+        """
+        Retrieves proof numbers of position if stored
+
+        Args:
+            hash_ (int): hash of position
+            moves (int): moves left to mate
+        Returns:
+            (Optional[Tuple[int, int]]): phi & delta
+        """
+        index = hash_ & self._index_mask
+        for slot in self.slots[index : index + 2]:
+            if slot["moves"] == moves and int(slot["key"]) == hash_:
+                return int(slot["phi"]), int(slot["delta"])
+        return None
+
+    def store(
+        self, hash_: int, moves: int, phi: int, delta: int, work: int
+    ) -> None:
+        """
+        Stores proof numbers of position, overwriting its previous entry
+
+        Args:
+            hash_ (int): hash of position
+            moves (int): moves left to mate
+            phi (int): proof number of side to move
+            delta (int): disproof number of side to move
+            work (int): nodes searched to compute numbers
+        """
+        index = hash_ & self._index_mask
+        entry = (hash_, phi, delta, min(work, 2 ** 32 - 1), moves)
+        bucket = self.slots[index : index + 2]
+        for offset, slot in enumerate(bucket):
+            if slot["moves"] == moves and int(slot["key"]) == hash_:
+                self.slots[index + offset] = entry
+                return
+        if bucket[0]["moves"] >= 0:
+            self.evictions += int(bucket[1]["moves"] >= 0)
+            if work >= bucket[0]["work"]:
+                # Entry of first slot is demoted to second
+                self.slots[index + 1] = self.slots[index]
+            else:
+                index += 1
+        self.slots[index] = entry
+
+    def clear(self) -> None:
+        """ Empties all slots """
+        self.slots["moves"] = -1
+        self.evictions = 0
@@ -21,5 +21,6 @@ setup(
     author_email="jiaming.justin.chen@gmail.com",
     license="GPL",
     packages=find_packages(),
+    python_requires='>=3.8',
     install_requires=['python_chess'],
     include_package_data=True)
@@ -6,6 +6,7 @@ import chess.pgn  # type: ignore
 import pytest  # type: ignore
 
 from chessmate.analysis import *
+from chessmate.constants.misc import KNOWN_WIN
 from chessmate.engines import AvoidCapture, MiniMax, Random
 from chessmate.utils import load_fen
 
@@ -199,3 +200,52 @@ def test_get_engine_evaluation_runs_with_fen_input():
     assert set(["Random", "Avoid Capture", "MiniMax"]) == set(eval_.keys())
     # Check that evaluations from each engine are legal chess moves
     assert all(len(v) == 4 for v in eval_.values())
+
+
+@pytest.fixture(scope="module")
+def bitbase_evaluation(tmp_path_factory):
+    """ Sets up bitbase evaluation with bitbases cached in temp dir """
+    return BitbaseEvaluation(
+        bitbase_dir=str(tmp_path_factory.mktemp("bitbases"))
+    )
+
+
+@pytest.mark.parametrize(
+    "fen, sign",
+    [
+        ("4k3/8/4K3/4P3/8/8/8/8 b - - 0 1", 1),
+        ("8/8/8/8/8/4k3/4p3/4K3 b - - 0 1", -1),
+        ("8/8/8/4k3/8/8/8/R3K3 b - - 0 1", 1),
+        ("8/8/8/3rk3/8/8/8/4K3 w - - 0 1", -1),
+    ],
+)
+def test_bitbase_eval_known_wins(bitbase_evaluation, fen, sign):
+    """ Tests that won endings are worth at least KNOWN_WIN for winner """
+    assert sign * bitbase_evaluation.evaluate(chess.Board(fen)) >= KNOWN_WIN
+
+
+def test_bitbase_eval_draws(bitbase_evaluation):
+    """ Tests that drawn endings are worth 0 despite material """
+    board = chess.Board("k7/8/K7/P7/8/8/8/8 w - - 0 1")
+    assert bitbase_evaluation.evaluate(board) == 0
+
+
+def test_bitbase_eval_rewards_progress(bitbase_evaluation):
+    """ Tests that wins with lone king nearer the edge are worth more """
+    centre = chess.Board("8/8/8/4k3/8/8/4K3/R7 b - - 0 1")
+    edge = chess.Board("4k3/8/8/4K3/8/8/8/R7 b - - 0 1")
+    assert bitbase_evaluation.evaluate(edge) > bitbase_evaluation.evaluate(
+        centre
+    )
+
+
+def test_bitbase_eval_passes_on_other_positions(
+    bitbase_evaluation, in_progress_board
+):
+    """ Tests that positions outside bitbases are evaluated by wrapped
+    function """
+    hits = bitbase_evaluation.bitbase_hits
+    assert bitbase_evaluation.evaluate(
+        in_progress_board
+    ) == StandardEvaluation().evaluate(in_progress_board)
+    assert bitbase_evaluation.bitbase_hits == hits
@@ -0,0 +1,334 @@
+""" Tests for opening books """
+import struct
+import sys
+
+sys.path.append("..")
+
+import chess  # type: ignore
+import chess.pgn  # type: ignore
+import chess.polyglot  # type: ignore
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from chessmate.books import *
+from chessmate.engines import MiniMax, Random
+from chessmate.simulations import ChessPlayground
+from chessmate.utils import load_fen
+
+
+def write_book(path, entries):
+    """ Writes Polyglot book of (board, uci move, weight) entries """
+    rows = []
+    for board, uci, weight in entries:
+        move = chess.Move.from_uci(uci)
+        encoded = move.to_square | move.from_square << 6
+        rows.append((chess.polyglot.zobrist_hash(board), encoded, weight))
+    with open(path, "wb") as f:
+        for key, move, weight in sorted(rows):
+            f.write(struct.pack(">QHHI", key, move, weight, 0))
+
+
+@pytest.fixture
+def book_path(tmp_path):
+    """ Sets up book covering 1. e4 e5 and 1. d4 """
+    start = chess.Board()
+    after_e4 = chess.Board()
+    after_e4.push_uci("e2e4")
+    path = str(tmp_path / "book.bin")
+    write_book(
+        path,
+        [(start, "e2e4", 3), (start, "d2d4", 1), (after_e4, "e7e5", 1)],
+    )
+    return path
+
+
+def test_book_engine_plays_book_moves_then_engine(book_path):
+    """ Tests that book moves are played while in book and wrapped engine
+    moves afterwards, counting hits and misses """
+    engine = BookEngine(MiniMax(color=chess.WHITE, depth=1), book_path)
+    board = chess.Board()
+
+    assert engine.move(board) in (
+        chess.Move.from_uci("e2e4"),
+        chess.Move.from_uci("d2d4"),
+    )
+    board.push_uci("e2e4")
+    assert engine.move(board) == chess.Move.from_uci("e7e5")
+    board.push_uci("e7e5")
+    assert engine.move(board) in board.legal_moves
+
+    assert (engine.book_hits, engine.book_misses) == (2, 1)
+    assert engine.hit_rate() == pytest.approx(2 / 3)
+    assert len(engine.material_difference) == 3
+    engine.close()
+
+
+def test_book_engine_weights_book_moves(book_path):
+    """ Tests that book moves are chosen in proportion to weight """
+    engine = BookEngine(Random(), book_path, seed=0)
+    board = chess.Board()
+    moves = [engine.move(board).uci() for i in range(400)]
+
+    assert 0.65 < moves.count("e2e4") / len(moves) < 0.85
+    assert set(moves) == {"e2e4", "d2d4"}
+    engine.close()
+
+
+def test_book_engine_respects_minimum_weight_and_max_ply(book_path):
+    """ Tests that light entries and positions past max ply are not played
+    from book """
+    engine = BookEngine(Random(), book_path, minimum_weight=2)
+    assert engine.book_move(chess.Board()) == chess.Move.from_uci("e2e4")
+
+    engine = BookEngine(Random(), book_path, max_book_ply=0)
+    board = chess.Board()
+    assert engine.book_move(board) is not None
+    board.push_uci("e2e4")
+    assert engine.book_move(board) is None
+
+
+def test_book_engine_evaluates_out_of_book_position(book_path):
+    """ Tests that book moves of an earlier position aren't kept once
+    position is out of book, and wrapped engine evaluates it instead """
+    engine = BookEngine(MiniMax(color=chess.WHITE, depth=1), book_path)
+    board = chess.Board()
+    engine.evaluate(board)
+    assert set(engine.legal_moves) == {
+        chess.Move.from_uci("e2e4"),
+        chess.Move.from_uci("d2d4"),
+    }
+
+    board.push_uci("d2d4")
+    engine.engine.color = chess.BLACK
+    engine.evaluate(board)
+    assert engine.legal_moves == {}
+    assert len(engine.engine.material_difference) == 1
+    engine.close()
+
+
+def test_book_engine_move_respects_max_ply(book_path):
+    """ Tests that positions in book past max ply are passed on to wrapped
+    engine when moving """
+    engine = BookEngine(Random(), book_path, max_book_ply=0)
+    board = chess.Board()
+    engine.move(board)
+    board.push_uci("e2e4")
+    engine.move(board)
+    assert (engine.book_hits, engine.book_misses) == (1, 1)
+
+    engine.evaluate(board)
+    assert engine.legal_moves == {}
+    engine.close()
+
+
+def test_book_engine_plays_in_playground(book_path):
+    """ Tests that wrapped engines play full games in ChessPlayground """
+    white = BookEngine(Random(), book_path)
+    black = BookEngine(Random(), book_path)
+    simulator = ChessPlayground(white, black)
+    simulator.play_game()
+
+    assert white.book_hits == 1 and black.book_hits <= 1
+    first_move = simulator.game_pgns[0].next().move
+    assert first_move.uci() in ("e2e4", "d2d4")
+
+
+def test_book_engine_passes_on_search_statistics(book_path):
+    """ Tests that statistics of wrapped engine are collected by playground
+    for moves out of book only """
+    minimax = MiniMax(color=chess.WHITE, depth=1)
+    minimax.collect_statistics = True
+    white = BookEngine(minimax, book_path)
+    simulator = ChessPlayground(white, Random())
+    simulator.play_game()
+
+    assert white.book_hits == 1
+    statistics = simulator.all_search_statistics[0][0]
+    assert statistics is not None
+    assert statistics.searches == white.book_misses
+    white.close()
+
+
+def make_game(ucis, result):
+    """ Sets up pgn game of uci moves with given result """
+    game = chess.pgn.Game()
+    node = game
+    for uci in ucis:
+        node = node.add_variation(chess.Move.from_uci(uci))
+    game.headers["Result"] = result
+    return game
+
+
+@pytest.mark.parametrize(
+    "fen, uci, expected",
+    [
+        (chess.STARTING_FEN, "g1f3", "g1f3"),
+        ("r3k3/8/8/8/8/8/8/4K2R w Kq - 0 1", "e1g1", "e1h1"),
+        ("r3k3/8/8/8/8/8/8/4K2R b Kq - 0 1", "e8c8", "e8a8"),
+        ("8/4P1k1/8/8/8/8/8/4K3 w - - 0 1", "e7e8n", "e7e8n"),
+    ],
+)
+def test_encode_polyglot_move(fen, uci, expected):
+    """ Tests that castling is encoded as king to rook and promotions keep
+    their piece """
+    board = chess.Board(fen)
+    move = chess.Move.from_uci(uci)
+    target = chess.Move.from_uci(expected)
+    promotion = target.promotion - 1 if target.promotion else 0
+    assert encode_polyglot_move(board, move) == (
+        target.to_square | target.from_square << 6 | promotion << 12
+    )
+
+
+def test_book_builder_counts_results(tmp_path):
+    """ Tests that results are counted from perspective of side playing
+    move, and unfinished games are skipped """
+    builder = BookBuilder(str(tmp_path / "counts"), max_ply=2)
+    builder.add_games(
+        [
+            make_game(["e2e4", "e7e5", "g1f3"], "1-0"),
+            make_game(["e2e4", "c7c5"], "0-1"),
+            make_game(["e2e4", "e7e5"], "1/2-1/2"),
+            make_game(["d2d4"], "*"),
+        ]
+    )
+    board = chess.Board()
+    e4 = chess.Move.from_uci("e2e4")
+
+    assert builder.games == 3
+    assert builder.counts(board, e4) == (1, 1, 1)
+    assert builder.counts(board, chess.Move.from_uci("d2d4")) == (0, 0, 0)
+    board.push(e4)
+    assert builder.counts(board, chess.Move.from_uci("e7e5")) == (0, 1, 1)
+    assert builder.counts(board, chess.Move.from_uci("c7c5")) == (1, 0, 0)
+    board.push_uci("e7e5")
+    # Beyond max_ply
+    assert builder.counts(board, chess.Move.from_uci("g1f3")) == (0, 0, 0)
+    builder.close()
+
+
+def test_book_builder_resumes_counts(tmp_path):
+    """ Tests that counts persist on disk across builders """
+    path = str(tmp_path / "counts")
+    builder = BookBuilder(path)
+    builder.add_game(make_game(["e2e4"], "1-0"))
+    builder.close()
+
+    builder = BookBuilder(path)
+    builder.add_game(make_game(["e2e4"], "1-0"))
+    assert builder.counts(chess.Board(), chess.Move.from_uci("e2e4")) == (
+        2,
+        0,
+        0,
+    )
+    builder.close()
+
+
+def test_book_builder_writes_polyglot_book(tmp_path):
+    """ Tests that written book is read by chess.polyglot with weights from
+    wins & draws, leaving out lost and rarely played moves """
+    builder = BookBuilder(str(tmp_path / "counts"))
+    builder.add_games(
+        [make_game(["e2e4", "e7e5"], "1-0")] * 3
+        + [make_game(["d2d4", "d7d5"], "1/2-1/2")] * 2
+        + [make_game(["c2c4"], "1/2-1/2")]
+        + [make_game(["g1f3"], "0-1")] * 2
+    )
+    book_path = str(tmp_path / "book.bin")
+    assert builder.write_book(book_path, min_games=2) == 3
+    builder.close()
+
+    with chess.polyglot.open_reader(book_path) as reader:
+        entries = {
+            entry.move.uci(): entry.weight
+            for entry in reader.find_all(chess.Board())
+        }
+        assert entries == {"e2e4": 6, "d2d4": 2}
+        after_e4 = chess.Board()
+        after_e4.push_uci("e2e4")
+        # e5 only lost
+        assert not list(reader.find_all(after_e4))
+        after_d4 = chess.Board()
+        after_d4.push_uci("d2d4")
+        assert [entry.move.uci() for entry in reader.find_all(after_d4)] == [
+            "d7d5"
+        ]
+
+
+def test_book_builder_merges_sorted_runs(monkeypatch, tmp_path):
+    """ Tests that books written from many small sorted runs match books
+    written from a single run """
+    builder = BookBuilder(str(tmp_path / "counts"))
+    builder.add_games(
+        [make_game(["e2e4", "e7e5", "g1f3", "b8c6"], "1-0")] * 2
+        + [make_game(["d2d4", "d7d5", "c2c4"], "1/2-1/2")]
+        + [make_game(["e2e4", "c7c5", "g1f3"], "0-1")]
+        + [make_game(["c2c4", "e7e5"], "1-0")]
+    )
+    single_path = str(tmp_path / "single.bin")
+    entries = builder.write_book(single_path)
+
+    monkeypatch.setattr("chessmate.books.BOOK_CHUNK_ENTRIES", 2)
+    merged_path = str(tmp_path / "merged.bin")
+    assert builder.write_book(merged_path) == entries
+    builder.close()
+
+    with open(single_path, "rb") as single, open(merged_path, "rb") as merged:
+        assert single.read() == merged.read()
+    book = np.fromfile(merged_path, dtype=POLYGLOT_DTYPE)
+    assert len(book) == entries > 2
+    assert (book["key"][1:] >= book["key"][:-1]).all()
+    # Run files are removed once merged
+    assert not any(entry.is_dir() for entry in tmp_path.iterdir())
+
+
+def test_book_builder_scales_overflowing_weights(tmp_path):
+    """ Tests that weights of a position are scaled down together to fit in
+    16 bits """
+    builder = BookBuilder(str(tmp_path / "counts"))
+    builder.add_games(
+        [make_game(["e2e4"], "1-0")] * 40000
+        + [make_game(["d2d4"], "1-0")] * 10000
+    )
+    book_path = str(tmp_path / "book.bin")
+    builder.write_book(book_path)
+    builder.close()
+
+    with chess.polyglot.open_reader(book_path) as reader:
+        weights = {
+            entry.move.uci(): entry.weight
+            for entry in reader.find_all(chess.Board())
+        }
+    assert weights["e2e4"] == 65535
+    assert weights["d2d4"] == pytest.approx(65535 / 4, abs=1)
+
+
+def test_playground_streams_games_into_book(tmp_path):
+    """ Tests that playground records results and feeds book builder, and
+    that built book is played by BookEngine """
+    simulator = ChessPlayground(
+        MiniMax(color=chess.WHITE, depth=1), Random()
+    )
+    simulator.fen = load_fen("back_rank_mate")
+    simulator.book_builder = BookBuilder(str(tmp_path / "counts"))
+    simulator.play_multiple_games(2)
+
+    for game in simulator.game_pgns:
+        board = game.end().board()
+        assert game.headers["Result"] == board.result()
+    assert simulator.book_builder.games == 2
+    book_path = str(tmp_path / "book.bin")
+    simulator.book_builder.write_book(book_path)
+    simulator.book_builder.close()
+
+    # Book holds first moves of games white didn't lose
+    expected = {
+        game.next().move
+        for game in simulator.game_pgns
+        if game.headers["Result"] != "0-1"
+    }
+    board = chess.Board(load_fen("back_rank_mate"))
+    engine = BookEngine(Random(), book_path)
+    move = engine.move(board)
+    assert move in expected if expected else engine.book_misses == 1
+    engine.close()
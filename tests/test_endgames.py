@@ -0,0 +1,294 @@
+""" Tests for endgame tablebase probing """
+import os
+import pickle
+import random
+import sys
+
+sys.path.append("..")
+
+import chess  # type: ignore
+import chess.syzygy  # type: ignore
+import pytest  # type: ignore
+
+from chessmate.constants.misc import TABLEBASE_WIN
+from chessmate.endgames import *
+from chessmate.engines import MiniMax, Random
+from chessmate.simulations import ChessPlayground
+from chessmate.utils import load_fen
+
+
+class FakeTables:
+    """ Stands in for chess.syzygy.Tablebase holding only KQvK, which the
+    side with the queen wins, with DTZ growing as the losing king leaves
+    the corner """
+
+    def __init__(self, *args, **kwargs):
+        self.wdl = {}
+        self.probes = 0
+
+    def add_directory(self, directory):
+        self.wdl["KQvK"] = directory
+        return 1
+
+    def get_wdl(self, board):
+        self.probes += 1
+        if board.is_checkmate():
+            return -2
+        if board.is_stalemate() or not board.queens:
+            return 0
+        return 2 if board.pieces(chess.QUEEN, board.turn) else -2
+
+    def get_dtz(self, board):
+        wdl = self.get_wdl(board)
+        corner_distance = min(
+            chess.square_distance(board.king(not board.turn), corner)
+            for corner in (chess.A1, chess.A8, chess.H1, chess.H8)
+        )
+        return (wdl > 0) - (wdl < 0) * (1 + corner_distance)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def tablebase(monkeypatch):
+    """ Sets up tablebase of fake tables """
+    monkeypatch.setattr(chess.syzygy, "Tablebase", FakeTables)
+    return Tablebase("syzygy")
+
+
+def test_tablebase_max_pieces(tablebase):
+    """ Tests that max pieces default to those of largest table, and larger
+    positions or those with castling rights aren't probed """
+    assert tablebase.max_pieces == 3
+    assert tablebase.probe_wdl(chess.Board()) is None
+    assert tablebase.best_move(chess.Board()) is None
+    castling = chess.Board("4k3/8/8/8/8/8/8/R3K3 w Q - 0 1")
+    assert tablebase.probe_wdl(castling) is None
+    assert tablebase._tables.probes == 0
+
+
+@pytest.mark.parametrize(
+    "fen_name", ["queen_mates_in_one", "queen_takes_rook"]
+)
+def test_tablebase_fixtures_are_legal(fen_name):
+    """ Tests that fixtures probed in tablebases are legal positions, since
+    tables hold no results for positions that can't arise """
+    assert chess.Board(load_fen(fen_name)).is_valid()
+
+
+def test_tablebase_caches_probes(monkeypatch):
+    """ Tests that repeated probes are answered from cache, evicting least
+    recently used results when full """
+    monkeypatch.setattr(chess.syzygy, "Tablebase", FakeTables)
+    tablebase = Tablebase("syzygy", cache_size=1)
+    board = chess.Board(load_fen("queen_mates_in_one"))
+    other = board.mirror()
+
+    assert tablebase.probe_wdl(board) == 2
+    assert tablebase.probe_wdl(board) == 2
+    assert (tablebase.probes, tablebase.cache_hits) == (2, 1)
+    assert tablebase.probe_wdl(other) == 2
+    assert tablebase.probe_wdl(board) == 2
+    assert tablebase._tables.probes == 3
+
+
+def test_tablebase_value_and_result(tablebase):
+    """ Tests values & results from perspective of side to move """
+    board = chess.Board(load_fen("queen_mates_in_one"))
+    assert tablebase.value(board, ply=3) == TABLEBASE_WIN - 3
+    assert tablebase.result(board) == "1-0"
+    board.turn = chess.BLACK
+    assert tablebase.value(board, ply=3) == -(TABLEBASE_WIN - 3)
+    assert tablebase.result(board) == "1-0"
+
+
+def test_tablebase_best_move_mates(tablebase):
+    """ Tests that winning side prefers mate """
+    board = chess.Board(load_fen("queen_mates_in_one"))
+    assert tablebase.best_move(board) == chess.Move.from_uci("b1b8")
+
+
+def test_tablebase_reopens_when_unpickled(tablebase):
+    """ Tests that tablebases can be passed to worker processes """
+    copy = pickle.loads(pickle.dumps(tablebase))
+    assert copy.directories == tablebase.directories
+    assert copy.max_pieces == tablebase.max_pieces
+    assert copy.probe_wdl(chess.Board(load_fen("queen_mates_in_one"))) == 2
+
+
+def test_minimax_plays_tablebase_move_at_root(tablebase):
+    """ Tests that root positions in tables are played without search """
+    engine = MiniMax(color=chess.WHITE, depth=2)
+    engine.tablebase = tablebase
+    board = chess.Board(load_fen("queen_mates_in_one"))
+
+    assert engine.move(board) == chess.Move.from_uci("b1b8")
+    assert engine.nodes == 0
+    assert engine.score == TABLEBASE_WIN
+
+
+def test_minimax_probes_tablebase_after_capture(tablebase):
+    """ Tests that interior nodes entering tables by a capture are valued
+    by probing """
+    engine = MiniMax(color=chess.WHITE, depth=1)
+    engine.tablebase = tablebase
+    engine.collect_statistics = True
+    board = chess.Board(load_fen("queen_takes_rook"))
+
+    assert engine.move(board) == chess.Move.from_uci("d1d8")
+    assert engine.score == TABLEBASE_WIN - 1
+    assert engine.stats.tablebase_hits == 1
+
+
+def test_playground_adjudicates_by_tablebase(tablebase):
+    """ Tests that games end once position is in tables """
+    simulator = ChessPlayground(MiniMax(color=chess.WHITE, depth=1), Random())
+    simulator.tablebase = tablebase
+    simulator.fen = load_fen("queen_takes_rook")
+    simulator.play_game()
+
+    game = simulator.game_pgns[0]
+    assert game.headers["Result"] == "1-0"
+    assert simulator.all_results == ["White win by tablebase"]
+    assert list(game.mainline_moves()) == [chess.Move.from_uci("d1d8")]
+
+
+@pytest.mark.skipif(
+    "SYZYGY_PATH" not in os.environ, reason="SYZYGY_PATH not set"
+)
+def test_tablebase_probes_real_tables():
+    """ Tests probing real Syzygy tables holding KQvK, found in directories
+    of SYZYGY_PATH """
+    directories = os.environ["SYZYGY_PATH"].split(os.pathsep)
+    tables = [
+        name
+        for directory in directories
+        for name in os.listdir(directory)
+        if name.endswith(".rtbw")
+    ]
+    if "KQvK.rtbw" not in tables:
+        pytest.skip("KQvK table not found")
+    tablebase = Tablebase(directories)
+
+    assert tablebase.max_pieces == max(len(name) - 6 for name in tables)
+    board = chess.Board(load_fen("queen_mates_in_one"))
+    assert tablebase.probe_wdl(board) == 2
+    assert tablebase.result(board) == "1-0"
+    move = tablebase.best_move(board)
+    board.push(move)
+    assert board.is_checkmate()
+    assert tablebase.result(board) == "1-0"
+    tablebase.close()
+
+
+@pytest.fixture(scope="module")
+def bitbase_dir(tmp_path_factory):
+    """ Sets up directory of cached bitbases """
+    directory = str(tmp_path_factory.mktemp("bitbases"))
+    load_bitbases(directory)
+    return directory
+
+
+@pytest.fixture(scope="module")
+def bitbases(bitbase_dir):
+    """ Loads all bitbases from cache """
+    return load_bitbases(bitbase_dir)
+
+
+@pytest.mark.parametrize(
+    "ending, fen, expected",
+    [
+        # Rook pawn with defending king in corner
+        ("KPK", "k7/8/K7/P7/8/8/8/8 w - - 0 1", False),
+        # King on sixth rank in front of pawn wins whoever moves
+        ("KPK", "4k3/8/4K3/4P3/8/8/8/8 w - - 0 1", True),
+        ("KPK", "4k3/8/4K3/4P3/8/8/8/8 b - - 0 1", True),
+        # Defending king in front of pawn
+        ("KPK", "8/8/8/8/4k3/8/4P3/4K3 w - - 0 1", False),
+        ("KQK", "7k/8/6K1/8/8/8/8/1Q6 w - - 0 1", True),
+        # Stalemate
+        ("KQK", "k7/2Q5/1K6/8/8/8/8/8 b - - 0 1", False),
+        ("KRK", "8/8/8/4k3/8/8/8/R3K3 b - - 0 1", True),
+        # Undefended rook is captured
+        ("KRK", "8/8/8/3Rk3/8/8/8/4K3 b - - 0 1", False),
+    ],
+)
+def test_bitbase_known_positions(bitbases, ending, fen, expected):
+    """ Tests bitbases on known positions, with colors flipped too """
+    board = chess.Board(fen)
+    assert bitbases[ending].wins(board) == expected
+    assert bitbases[ending].wins(board.mirror()) == expected
+
+
+def test_bitbase_only_probes_own_ending(bitbases):
+    """ Tests that other positions aren't probed """
+    assert bitbases["KRK"].wins(chess.Board()) is None
+    board = chess.Board(load_fen("queen_mates_in_one"))
+    assert bitbases["KRK"].wins(board) is None
+
+
+def _bitbase_wins(bitbases, board):
+    """ Result of position from bitbases or game end, for white """
+    if board.is_checkmate():
+        return board.turn == chess.BLACK
+    if board.is_stalemate() or board.is_insufficient_material():
+        return False
+    for bitbase in bitbases.values():
+        wins = bitbase.wins(board)
+        if wins is not None:
+            return wins
+    raise ValueError(f"{board.fen()} not in bitbases")
+
+
+@pytest.mark.parametrize("ending", list(BITBASE_ENDINGS))
+def test_bitbase_consistent_with_legal_moves(bitbases, ending):
+    """ Tests that sampled positions are won exactly when white has a move
+    to a won position, or black only has moves to won positions, with moves
+    generated by python-chess """
+    rng = random.Random(0)
+    checked = 0
+    while checked < 200:
+        white_king, piece, black_king = rng.sample(chess.SQUARES, 3)
+        board = chess.Board(None)
+        board.set_piece_at(white_king, chess.Piece(chess.KING, chess.WHITE))
+        board.set_piece_at(
+            piece, chess.Piece(BITBASE_ENDINGS[ending], chess.WHITE)
+        )
+        board.set_piece_at(black_king, chess.Piece(chess.KING, chess.BLACK))
+        board.turn = rng.choice(chess.COLORS)
+        if not board.is_valid():
+            continue
+        checked += 1
+
+        results = []
+        for move in board.legal_moves:
+            board.push(move)
+            results.append(_bitbase_wins(bitbases, board))
+            board.pop()
+        if board.is_checkmate():
+            expected = True
+        elif board.turn == chess.WHITE:
+            expected = any(results)
+        else:
+            expected = bool(results) and all(results)
+        assert bitbases[ending].wins(board) == expected, board.fen()
+
+
+def test_bitbase_loaded_from_cache(monkeypatch, bitbase_dir, bitbases):
+    """ Tests that cached bitbases aren't generated again """
+
+    def fail(*args):
+        raise AssertionError("bitbase generated")
+
+    monkeypatch.setattr("chessmate.endgames.generate_bitbase", fail)
+    bitbase = Bitbase.load("KPK", bitbase_dir)
+    assert (bitbase.bits == bitbases["KPK"].bits).all()
+    assert bitbase.bits.nbytes == 2 * 64 ** 3 // 8
+
+
+def test_bitbase_invalid_ending():
+    """ Tests that endings without bitbases raise """
+    with pytest.raises(ValueError):
+        Bitbase.load("KBNK", None)
+
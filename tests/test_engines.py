@@ -1,11 +1,17 @@
 """ Test suite for engines """
+import asyncio
 import sys
+import time
 from typing import List
 
 import chess  # type: ignore
 import chess.pgn  # type: ignore
 from chessmate.constants.fens import FEN_MAPS
+from chessmate.constants.misc import (ALPHA_BETA, DISPROVEN, EXACT, MTDF,
+                                      PROVEN, PUCT, ROOT_SPLIT,
+                                      TABLEBASE_WIN, UCT, UNPROVEN)
 from chessmate.engines import *
+from chessmate.heuristics import KillerHistoryHeuristic
 from chessmate.simulations import ChessPlayground
 from chessmate.utils import load_fen
 
@@ -293,3 +299,730 @@ def test_minimax_no_pruning_captures_obvious_pieces(minimax_engines):
 
     board = chess.Board(fen=load_fen("capture_white_queen_2"))
     assert str(black_minimax.move(board)) == "c4f4"
+
+
+def test_minimax_node_limit_returns_legal_move(minimax_engines):
+    """ Tests that minimax searching under a node limit deepens past
+    depth 1 and still returns a legal move """
+    engine = minimax_engines[0]
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    starting_fen = board.fen()
+    move = engine.move(board, node_limit=2000)
+
+    assert move in board.legal_moves
+    assert engine.completed_depth >= 1
+    # Board is restored after aborted iteration
+    assert board.fen() == starting_fen
+
+
+def test_minimax_time_limit_stops_search(minimax_engines):
+    """ Tests that minimax under a time limit returns close to the limit
+    with a legal move """
+    engine = minimax_engines[0]
+    engine.time_limit = 0.5
+    board = chess.Board()
+
+    start = time.perf_counter()
+    move = engine.move(board)
+    elapsed = time.perf_counter() - start
+
+    assert move in board.legal_moves
+    assert elapsed < 2.0
+
+
+def test_minimax_iterative_deepening_captures(minimax_engines, modified_boards):
+    """ Tests that minimax under a node budget takes obvious captures """
+    engine = minimax_engines[0]
+    for board, rec_move in modified_boards:
+        move = engine.move(board, node_limit=150)
+        assert str(move) == rec_move
+
+
+def test_minimax_stores_exact_root_entry(minimax_engines):
+    """ Tests that minimax stores root search result in transposition table
+    with searched depth and best move """
+    engine = minimax_engines[0]
+    engine.depth = 2
+    board = chess.Board(fen=load_fen("capture_black_queen"))
+    move = engine.move(board)
+
+    table = engine.transposition_table
+    entry = table.probe(table.hash_position(board))
+    assert entry.depth == 2
+    assert entry.flag == EXACT
+    assert entry.best_move == move
+
+
+def test_minimax_without_pruning_stores_only_exact_entries(minimax_engines):
+    """ Tests that without alpha beta pruning every stored entry is exact
+    since no search is cut off """
+    engine = minimax_engines[1]
+    engine.depth = 2
+    engine.alpha_beta_pruning = False
+    engine.move(chess.Board(fen=load_fen("black_knight_fork_fen")))
+
+    slots = engine.transposition_table.slots
+    flags = slots["flag"][slots["depth"] >= 0]
+    assert len(flags)
+    assert all(flag == EXACT for flag in flags)
+
+
+def test_minimax_quiescence_avoids_defended_capture():
+    """ Tests that quiescence search sees recapture beyond depth horizon
+    i.e doesn't capture defended pawn with queen """
+    board = chess.Board(fen=load_fen("defended_pawn_fen"))
+    engine = MiniMax(color=chess.WHITE, depth=1)
+    engine.move_ordering = False
+    assert str(engine.move(board)) == "d1d5"
+
+    engine = MiniMax(color=chess.WHITE, depth=1)
+    engine.move_ordering = False
+    engine.quiescence_search = True
+    assert str(engine.move(board)) != "d1d5"
+
+
+def test_minimax_quiescence_with_checks_returns_legal_move(minimax_engines):
+    """ Tests that quiescence search with check evasions returns legal
+    moves and leaves board untouched """
+    engine = minimax_engines[0]
+    engine.depth = 2
+    engine.quiescence_search = True
+    engine.quiescence_checks = True
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    starting_fen = board.fen()
+
+    assert engine.move(board) in board.legal_moves
+    assert board.fen() == starting_fen
+
+
+def test_minimax_killer_history_ordering_learns_cutoffs():
+    """ Tests that minimax w/ KillerHistoryHeuristic returns legal move and
+    passes cutoffs to heuristic """
+    engine = MiniMax(color=chess.WHITE, depth=3)
+    engine.ordering_heuristic = KillerHistoryHeuristic()
+    board = chess.Board()
+
+    assert engine.move(board) in board.legal_moves
+    assert engine.ordering_heuristic.killers
+    assert engine.ordering_heuristic.history.sum() > 0
+
+
+def test_minimax_null_move_not_allowed_in_check_or_pawn_endings():
+    """ Tests that null move isn't tried when in check, when side to move
+    only has king & pawns, or at shallow depth """
+    engine = MiniMax(color=chess.WHITE, depth=4)
+    engine.null_move_pruning = True
+
+    assert engine.null_move_allowed(chess.Board(), 4)
+    assert not engine.null_move_allowed(chess.Board(), 2)
+    in_check = chess.Board(fen="4k3/8/8/8/8/8/4r3/R3K3 w - - 0 1")
+    assert not engine.null_move_allowed(in_check, 4)
+    pawn_ending = chess.Board(fen="4k3/4p3/8/8/8/8/4P3/4K3 w - - 0 1")
+    assert not engine.null_move_allowed(pawn_ending, 4)
+
+    engine.null_move_pruning = False
+    assert not engine.null_move_allowed(chess.Board(), 4)
+
+
+def test_minimax_null_move_pruning_searches_fewer_nodes():
+    """ Tests that null move pruning at depth 4 visits fewer nodes and
+    finds same move """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    results = []
+    for null_move_pruning in (False, True):
+        engine = MiniMax(color=chess.WHITE, depth=4)
+        engine.ordering_heuristic = KillerHistoryHeuristic()
+        engine.null_move_pruning = null_move_pruning
+        results.append((engine.move(board), engine.nodes))
+
+    assert results[0][0] == results[1][0]
+    assert results[1][1] < results[0][1]
+
+
+def test_minimax_reduction_only_reduces_late_quiet_moves():
+    """ Tests that late move reductions skip early moves, captures, checks
+    and shallow depths, and follow configured schedule """
+    engine = MiniMax(color=chess.WHITE, depth=4)
+    board = chess.Board(fen=load_fen("capture_black_queen"))
+    quiet = chess.Move.from_uci("a2a3")
+    capture = chess.Move.from_uci("e4d5")
+    assert engine.reduction(board, quiet, 4, 5, False) == 0
+
+    engine.late_move_reductions = True
+    assert engine.reduction(board, quiet, 4, 5, False) == 1
+    assert engine.reduction(board, quiet, 4, 1, False) == 0
+    assert engine.reduction(board, quiet, 2, 5, False) == 0
+    assert engine.reduction(board, quiet, 4, 5, True) == 0
+    assert engine.reduction(board, capture, 4, 5, False) == 0
+
+    engine.lmr_schedule = lambda depth, move_number: depth
+    assert engine.reduction(board, quiet, 4, 5, False) == 3
+
+
+def test_minimax_late_move_reductions_search_fewer_nodes():
+    """ Tests that late move reductions at depth 4 visit fewer nodes and
+    find same move """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    results = []
+    for late_move_reductions in (False, True):
+        engine = MiniMax(color=chess.WHITE, depth=4)
+        engine.ordering_heuristic = KillerHistoryHeuristic()
+        engine.late_move_reductions = late_move_reductions
+        results.append((engine.move(board), engine.nodes))
+
+    assert results[0][0] == results[1][0]
+    assert results[1][1] < results[0][1]
+
+
+def test_minimax_wrapper_matches_negamax_from_both_sides():
+    """ Tests that minimax returns value from white's perspective for both
+    sides to move, negating negamax value for black """
+    board = chess.Board(fen=load_fen("capture_white_queen_2"))
+    engine = MiniMax(color=chess.BLACK, depth=2)
+    white_value = engine.minimax(board, False, 2, -float("inf"), float("inf"))
+
+    engine = MiniMax(color=chess.BLACK, depth=2)
+    black_value = engine.negamax(board, 2, -float("inf"), float("inf"))
+    assert white_value == -black_value
+    # Black captures queen, so position favours black
+    assert white_value < 0
+
+
+def test_minimax_pvs_matches_plain_alpha_beta_value():
+    """ Tests that principal variation search finds same root value as
+    searching without pruning """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    values = []
+    for alpha_beta_pruning in (False, True):
+        engine = MiniMax(color=chess.WHITE, depth=3)
+        engine.move_ordering = False
+        engine.alpha_beta_pruning = alpha_beta_pruning
+        values.append(
+            engine.negamax(board, 3, -float("inf"), float("inf"))
+        )
+
+    assert values[0] == values[1]
+
+
+@pytest.mark.parametrize("window", [1, 50, 1000])
+def test_minimax_aspiration_window_matches_full_window(window):
+    """ Tests that aspiration windows of any width widen until they find
+    the same score and move as a full window search """
+    board = chess.Board(fen=load_fen("capture_rook_or_knight"))
+    results = []
+    for aspiration_window in (None, window):
+        engine = MiniMax(color=chess.WHITE, depth=1)
+        engine.aspiration_window = aspiration_window
+        move = engine.iterative_deepening(board, max_depth=4)
+        results.append((move, engine.score))
+
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize(
+    "fen_name", ["capture_rook_or_knight", "in_progress_fen"]
+)
+def test_minimax_mtdf_matches_alpha_beta(fen_name):
+    """ Tests that MTD(f) finds the score of a full window search with a
+    move achieving it, and counts its passes """
+    board = chess.Board(fen=load_fen(fen_name))
+    engines = []
+    for search_driver in (ALPHA_BETA, MTDF):
+        engine = MiniMax(color=board.turn, depth=3)
+        engine.search_driver = search_driver
+        engine.collect_statistics = True
+        engine.move(board)
+        engines.append(engine)
+    alpha_beta, mtdf = engines
+
+    assert mtdf.score == alpha_beta.score
+    assert mtdf.principal_variation[0] == mtdf.best_move
+    board.push(mtdf.best_move)
+    reply = MiniMax(color=board.turn, depth=2)
+    assert -reply.negamax(board, 2, -float("inf"), float("inf")) == (
+        mtdf.score
+    )
+    assert alpha_beta.stats.mtdf_passes == 0
+    assert mtdf.stats.mtdf_passes >= 2
+    assert mtdf.stats.nodes == mtdf.nodes
+
+
+class ThirdsEvaluation(StandardEvaluation):
+    """ Standard evaluation scaled to fractions of a point """
+
+    def evaluate(self, board):
+        return super().evaluate(board) / 3
+
+
+def test_minimax_mtdf_ends_with_fractional_evaluation():
+    """ Tests that MTD(f) converges on values less than 1 above its lower
+    bound, which null windows of width 1 can't narrow down """
+    board = chess.Board(fen=load_fen("capture_rook_or_knight"))
+    engine = MiniMax(color=board.turn, depth=2)
+    engine.evaluation_function = ThirdsEvaluation()
+    value = engine.negamax(board, 2, -float("inf"), float("inf"))
+    assert value != int(value)
+
+    engine = MiniMax(color=board.turn, depth=2)
+    engine.evaluation_function = ThirdsEvaluation()
+    lower = value - 0.5
+    assert engine.mtdf(board, 2, lower, lower, float("inf")) == value
+    assert engine._iteration_best_move in board.legal_moves
+
+
+def test_minimax_mtdf_deepens_iteratively():
+    """ Tests that MTD(f) guesses from previous iterations within a budget
+    and rejects unknown drivers """
+    board = chess.Board(fen=load_fen("capture_black_queen"))
+    engine = MiniMax(color=chess.WHITE, depth=3)
+    engine.search_driver = MTDF
+    assert engine.move(board, node_limit=5000) in board.legal_moves
+    assert engine.completed_depth >= 1
+
+    engine.search_driver = "best-first"
+    with pytest.raises(ValueError):
+        engine.move(board)
+
+
+def test_minimax_score_carries_over_moves_not_games(minimax_engines):
+    """ Tests that score of previous move is kept for next move's window
+    but reset between games """
+    engine = minimax_engines[0]
+    engine.aspiration_window = 25
+    board = chess.Board(fen=load_fen("capture_black_queen"))
+    engine.move(board)
+    assert engine.score is not None
+
+    engine.reset_game_variables()
+    assert engine.score is None
+
+
+def test_minimax_lazy_smp_returns_legal_move(minimax_engines):
+    """ Tests that lazy smp workers search under time limit and report
+    back a legal move """
+    engine = minimax_engines[0]
+    engine.workers = 2
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    starting_fen = board.fen()
+
+    start = time.perf_counter()
+    move = engine.move(board, time_limit=0.5)
+    elapsed = time.perf_counter() - start
+
+    assert move in board.legal_moves
+    assert engine.completed_depth >= 1
+    assert engine.nodes > 0
+    assert elapsed < 5.0
+    assert board.fen() == starting_fen
+
+
+def test_minimax_lazy_smp_fixed_depth_matches_single_process():
+    """ Tests that lazy smp without limits searches to engine depth and
+    agrees with a single process search """
+    engine = MiniMax(color=chess.WHITE, depth=2)
+    engine.workers = 2
+    board = chess.Board(fen=load_fen("capture_black_queen"))
+
+    assert engine.move(board) == MiniMax(chess.WHITE, 2).move(board)
+    assert engine.completed_depth == 2
+
+
+def test_minimax_lazy_smp_game_over_returns_null_move():
+    """ Tests that lazy smp on a mated or stalemated root returns a null
+    move instead of indexing into an empty principal variation """
+    mated = chess.Board(fen=load_fen("back_rank_mate"))
+    mated.push_san("Ra8#")
+    stalemated = chess.Board(fen=load_fen("statemate_fen"))
+    for board in (mated, stalemated):
+        engine = MiniMax(color=board.turn, depth=2)
+        engine.workers = 2
+
+        assert engine.move(board) == chess.Move.null()
+        assert engine.principal_variation == []
+
+
+def test_minimax_root_split_matches_single_process():
+    """ Tests that splitting root moves over processes finds the same value
+    as a single process search and scores every searched root move """
+    board = chess.Board(fen=load_fen("capture_rook_or_knight"))
+    single = MiniMax(color=chess.WHITE, depth=3)
+    single.move(board)
+
+    engine = MiniMax(color=chess.WHITE, depth=3)
+    engine.workers = 2
+    engine.parallel_search = ROOT_SPLIT
+    move = engine.move(board)
+
+    assert set(engine.legal_moves) == set(
+        engine.order_moves(board, chess.Move.null())
+    )
+    assert engine.legal_moves[move] == max(engine.legal_moves.values())
+    assert engine.score == single.score
+    assert engine.principal_variation[0] == move
+    assert engine.pv_lines[0].score == engine.score
+    assert engine.nodes > 0
+
+
+def test_minimax_invalid_parallel_search_raises_valueerror():
+    """ Tests that unknown parallel search mode raises ValueError """
+    engine = MiniMax(color=chess.WHITE, depth=1)
+    engine.workers = 2
+    engine.parallel_search = "bogus"
+    with pytest.raises(ValueError):
+        engine.move(chess.Board())
+
+
+def test_minimax_collects_statistics_only_when_enabled():
+    """ Tests that statistics are filled during move when enabled, without
+    changing move chosen """
+    board = chess.Board(fen=load_fen("capture_rook_or_knight"))
+    engine = MiniMax(color=chess.WHITE, depth=3)
+    move = engine.move(board)
+    assert engine.stats is None
+
+    engine = MiniMax(color=chess.WHITE, depth=3)
+    engine.collect_statistics = True
+    assert engine.move(board) == move
+
+    stats = engine.stats
+    assert stats.nodes == engine.nodes
+    assert stats.depth == 3
+    assert 0 < stats.tt_probes <= stats.nodes
+    assert stats.beta_cutoffs >= stats.first_move_cutoffs > 0
+    assert stats.interior_nodes > 0 and stats.moves_searched > 0
+    assert stats.elapsed > 0
+    assert all(seconds > 0 for seconds in stats.times.values())
+
+
+@pytest.mark.parametrize("alpha_beta_pruning", [True, False])
+def test_minimax_principal_variation_leads_to_score(alpha_beta_pruning):
+    """ Tests that principal variation starts with best move, is legal, and
+    that its final position evaluates to the score of the search """
+    board = chess.Board(fen=load_fen("capture_rook_or_knight"))
+    engine = MiniMax(color=chess.WHITE, depth=3)
+    engine.alpha_beta_pruning = alpha_beta_pruning
+    move = engine.move(board)
+
+    pv = engine.principal_variation
+    assert pv[0] == move
+    assert len(pv) == 3
+    leaf = board.copy()
+    for pv_move in pv:
+        assert leaf.is_legal(pv_move)
+        leaf.push(pv_move)
+    # Odd length line ends with opponent to move
+    assert engine.static_evaluation(leaf) == -engine.score
+    assert engine.pv_lines == [PrincipalVariation(engine.score, pv)]
+
+
+def test_minimax_multi_pv_finds_exact_top_moves():
+    """ Tests that multi pv returns the best k root moves with the values
+    they'd get from individual full window searches """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    engine = MiniMax(color=chess.WHITE, depth=2)
+    engine.multi_pv = 3
+    move = engine.move(board)
+
+    reference = MiniMax(color=chess.WHITE, depth=2)
+    values = {}
+    for root_move in reference.order_moves(board, chess.Move.null()):
+        board.push(root_move)
+        values[root_move] = -reference.negamax(
+            board, 1, -float("inf"), float("inf"), ply=1
+        )
+        board.pop()
+
+    lines = engine.pv_lines
+    assert len(lines) == 3
+    assert lines[0].moves[0] == move
+    assert lines[0].score == engine.score
+    assert [line.score for line in lines] == sorted(values.values())[::-1][:3]
+    for line in lines:
+        assert values[line.moves[0]] == line.score
+
+
+def test_minimax_async_search_streams_iterations():
+    """ Tests that async search reports each iteration and returns same move
+    as a blocking search """
+    board = chess.Board(fen=load_fen("capture_rook_or_knight"))
+    engine = MiniMax(color=chess.WHITE, depth=3)
+
+    async def run():
+        search = engine.search(board)
+        updates = [update async for update in search]
+        return updates, await search
+
+    updates, move = asyncio.run(run())
+    assert [update.depth for update in updates] == [1, 2, 3]
+    assert updates[-1].pv[0] == move
+    assert updates[-1].score == engine.score
+    assert move == MiniMax(color=chess.WHITE, depth=3).move(board)
+
+
+def test_minimax_async_search_cancel_returns_best_move_so_far():
+    """ Tests that cancelling a long search returns promptly with the best
+    move of the last completed iteration """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    engine = MiniMax(color=chess.WHITE, depth=1)
+
+    async def run():
+        search = engine.search(board, time_limit=60)
+        first = await search.__anext__()
+        start = time.perf_counter()
+        move = await search.cancel()
+        return first, move, time.perf_counter() - start
+
+    first, move, elapsed = asyncio.run(run())
+    assert first.depth == 1
+    assert move in board.legal_moves
+    assert elapsed < 5.0
+    # Stop request doesn't carry over to next move
+    assert engine.move(board) in board.legal_moves
+
+
+def test_cancelling_task_awaiting_search_stops_engine():
+    """ Tests that cancelling the task awaiting a search, i.e as a client
+    disconnected, also stops the search thread """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    engine = MiniMax(color=chess.WHITE, depth=1)
+
+    async def run():
+        search = engine.search(board, time_limit=60)
+        task = asyncio.ensure_future(search.result())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await asyncio.wait_for(search.result(), timeout=5)
+
+    assert asyncio.run(run()) in board.legal_moves
+
+
+def test_base_engine_async_search_returns_move(starting_board):
+    """ Tests that engines without iterative search can still be awaited """
+    engine = Random()
+
+    async def run():
+        search = engine.search(starting_board)
+        updates = [update async for update in search]
+        return updates, await search
+
+    updates, move = asyncio.run(run())
+    assert updates == []
+    assert move in starting_board.legal_moves
+
+
+@pytest.mark.parametrize("selection", [UCT, PUCT])
+def test_mcts_finds_mate_in_one(selection):
+    """ Tests that MCTS plays scholar's mate with either selection rule """
+    board = chess.Board(fen=load_fen("scholars_mate_in_one"))
+    engine = MCTS(playouts=200)
+    engine.selection = selection
+
+    assert engine.move(board) == chess.Move.from_uci("h5f7")
+    assert engine.score == 1.0
+    assert engine.principal_variation == [chess.Move.from_uci("h5f7")]
+    assert sum(engine.legal_moves.values()) == 200
+    assert len(engine.material_difference) == 1
+
+
+def test_mcts_puct_priors_favour_captures():
+    """ Tests that PUCT priors weight captures by value of piece captured """
+    board = chess.Board(fen=load_fen("capture_black_queen"))
+    engine = MCTS()
+    moves = list(board.legal_moves)
+    assert engine.priors(board, moves) == pytest.approx(
+        [1 / len(moves)] * len(moves)
+    )
+
+    engine.selection = PUCT
+    priors = dict(zip(moves, engine.priors(board, moves)))
+    assert sum(priors.values()) == pytest.approx(1)
+    assert max(priors, key=priors.get) == chess.Move.from_uci("e4d5")
+
+
+def test_mcts_search_respects_budgets():
+    """ Tests that searches stop at node limit or time limit """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    engine = MCTS()
+    engine.tree_reuse = False
+
+    assert engine.search_move(board, node_limit=10) in board.legal_moves
+    assert engine.completed_playouts == 10
+    assert engine.tree.nodes["visits"][0] == 10
+
+    engine.playouts = 10 ** 6
+    start = time.perf_counter()
+    engine.search_move(board, time_limit=0.3)
+    assert time.perf_counter() - start < 2
+    assert 0 < engine.completed_playouts < 10 ** 6
+
+
+def test_mcts_reuses_subtree_of_position_reached():
+    """ Tests that search after two moves starts from visits of subtree """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    engine = MCTS(playouts=300)
+    move = engine.move(board)
+    reply = engine.tree.best_child(engine.tree.best_child(0))
+    board.push(move)
+    board.push(engine.tree.move(reply))
+    reused = int(engine.tree.nodes["visits"][reply])
+
+    engine.playouts = 10
+    engine.move(board)
+    assert reused > 0
+    assert engine.tree.nodes["visits"][0] == reused + 10
+
+    engine.reset_game_variables()
+    engine.move(board)
+    assert engine.tree.nodes["visits"][0] == 10
+
+
+def test_mcts_batched_playouts_over_process_pool():
+    """ Tests that playouts are played out in parallel batches """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    engine = MCTS(playouts=40)
+    engine.workers = 2
+    engine.batch_size = 8
+    engine.rollout_policy = CaptureHighestValue()
+
+    assert engine.move(board) in board.legal_moves
+    assert engine.tree.nodes["visits"][0] == 40
+    assert not engine.tree.nodes["virtual"][: len(engine.tree)].any()
+
+    # Workers are kept for following moves until closed
+    pool = engine._pool
+    board.push(engine.best_move)
+    assert engine.move(board) in board.legal_moves
+    assert engine._pool is pool
+    engine.close()
+    assert engine._pool is None
+
+
+def test_mcts_game_over_and_invalid_selection():
+    """ Tests that finished games return null move, and unknown selection
+    rules raise """
+    engine = MCTS()
+    mated = chess.Board("7k/5KQ1/8/8/8/8/8/8 b - - 0 1")
+    assert engine.move(mated) == chess.Move.null()
+
+    engine.selection = "ucb"
+    with pytest.raises(ValueError):
+        engine.move(chess.Board())
+
+
+def test_mcts_async_search_streams_batches():
+    """ Tests that async MCTS search reports progress of playouts """
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    engine = MCTS(playouts=20)
+    engine.batch_size = 5
+
+    async def run():
+        search = engine.search(board)
+        updates = [update async for update in search]
+        return updates, await search
+
+    updates, move = asyncio.run(run())
+    assert [update.nodes for update in updates] == [5, 10, 15, 20]
+    assert updates[-1].pv[0] == move
+
+
+def forces_mate(board: chess.Board, moves: int) -> bool:
+    """ Brute force check that side to move mates within moves """
+    if moves == 0:
+        return False
+    for move in board.legal_moves:
+        board.push(move)
+        mated = board.is_checkmate() or (
+            not board.is_game_over()
+            and moves > 1
+            and all(
+                mates_after(board, reply, moves - 1)
+                for reply in list(board.legal_moves)
+            )
+        )
+        board.pop()
+        if mated:
+            return True
+    return False
+
+
+def mates_after(board: chess.Board, reply: chess.Move, moves: int) -> bool:
+    """ True if side that moved mates after reply within moves """
+    board.push(reply)
+    mated = forces_mate(board, moves)
+    board.pop()
+    return mated
+
+
+@pytest.mark.parametrize("checks_only", [False, True])
+def test_proof_number_search_proves_mating_line(checks_only):
+    """ Tests that proven lines are legal, end in mate & agree with brute
+    force """
+    board = chess.Board(fen=load_fen("krk_mate_in_two"))
+    engine = ProofNumberSearch(max_moves=2)
+    engine.checks_only = checks_only
+    result = engine.solve(board)
+    assert forces_mate(board.copy(), 2)
+    if checks_only:
+        # Only mate starts with a quiet king move
+        assert result.status == DISPROVEN
+        return
+
+    assert result.status == PROVEN
+    assert len(result.line) == 3
+    for move in result.line:
+        assert board.is_legal(move)
+        board.push(move)
+    assert board.is_checkmate()
+
+
+def test_proof_number_search_disproves_missing_mates():
+    """ Tests that positions without mate within max_moves are disproven """
+    board = chess.Board(fen=load_fen("krk_mate_in_two"))
+    assert not forces_mate(board.copy(), 1)
+    assert ProofNumberSearch(max_moves=1).solve(board).status == DISPROVEN
+    assert ProofNumberSearch(max_moves=1).solve(chess.Board()).status == (
+        DISPROVEN
+    )
+
+
+def test_proof_number_search_plays_mate_or_falls_back():
+    """ Tests that engine plays first move of proven mate, and moves of
+    fallback engine when budget runs out """
+    board = chess.Board(fen=load_fen("back_rank_mate"))
+    engine = ProofNumberSearch(max_moves=1)
+    assert engine.move(board) == chess.Move.from_uci("a1a8")
+
+    board = chess.Board(fen=load_fen("krk_mate_in_two"))
+    engine = ProofNumberSearch(max_moves=3)
+    engine.node_limit = 5
+    move = engine.move(board)
+    assert engine.result.status == UNPROVEN
+    assert engine.result.nodes <= 6
+    assert board.is_legal(move)
+
+
+def test_proof_number_search_reports_line_to_callback():
+    """ Tests that proven lines are reported through search_move """
+    board = chess.Board(fen=load_fen("scholars_mate_in_one"))
+    updates = []
+    move = ProofNumberSearch(max_moves=1).search_move(
+        board, time_limit=10, callback=updates.append
+    )
+    assert move == chess.Move.from_uci("h5f7")
+    assert updates[-1].pv == [move]
+    assert updates[-1].score == TABLEBASE_WIN - 1
+
+
+def test_proof_number_search_ends_without_budget_on_small_table():
+    """ Tests that search without node limit ends when proof numbers of
+    children are evicted from a table too small to hold them """
+    board = chess.Board(fen=load_fen("krk_mate_in_two"))
+    engine = ProofNumberSearch(max_moves=3)
+    engine.table = ProofTable(size_mb=0)
+    engine.node_limit = None
+    assert len(engine.table.slots) == 2
+
+    result = engine.solve(board)
+    assert result.status in (PROVEN, UNPROVEN)
@@ -62,3 +62,59 @@ def test_mvv_lva_no_captures_returns_random_sorted():
     # lists are not identical but when sorted are
     assert MVV_LVA(board) != legal_move_list
     assert set(MVV_LVA(board)) == set(legal_move_list)
+
+
+def test_killer_history_returns_all_moves_captures_first():
+    """ Tests that KillerHistoryHeuristic returns all legal moves with
+    captures first, sorted by MVV_LVA """
+    board = chess.Board(fen=load_fen("white_aggressor"))
+    heuristic = KillerHistoryHeuristic()
+    ordered = heuristic(board)
+    captures = MVV_LVA(board, ConventionalPieceValues)
+
+    assert set(ordered) == set(board.legal_moves)
+    assert ordered[: len(captures)] == captures
+
+
+def test_killer_history_orders_killer_before_quiet_moves():
+    """ Tests that quiet move that caused cutoff is ordered first among
+    quiet moves at same ply, but not at other plies """
+    board = chess.Board()
+    killer = chess.Move.from_uci("g1f3")
+    heuristic = KillerHistoryHeuristic()
+    heuristic.store_cutoff(board, killer, depth=1)
+
+    assert heuristic(board)[0] == killer
+    board.push_uci("e2e4")
+    assert killer not in heuristic.killers.get(len(board.move_stack), [])
+
+
+def test_killer_history_keeps_limited_killers():
+    """ Tests that only num_killers most recent killers are kept per ply """
+    board = chess.Board()
+    heuristic = KillerHistoryHeuristic(num_killers=2)
+    for uci in ("a2a3", "b2b3", "c2c3"):
+        heuristic.store_cutoff(board, chess.Move.from_uci(uci), depth=1)
+
+    assert heuristic.killers[0] == [
+        chess.Move.from_uci("c2c3"),
+        chess.Move.from_uci("b2b3"),
+    ]
+
+
+def test_killer_history_orders_by_history():
+    """ Tests that quiet moves are sorted by history counters weighted by
+    depth, and that captures aren't recorded """
+    board = chess.Board(fen=load_fen("white_capture_bishop_or_knight"))
+    heuristic = KillerHistoryHeuristic(num_killers=0)
+    shallow, deep = chess.Move.from_uci("a2a3"), chess.Move.from_uci("h2h3")
+    heuristic.store_cutoff(board, shallow, depth=1)
+    heuristic.store_cutoff(board, deep, depth=3)
+    heuristic.store_cutoff(board, chess.Move.from_uci("c3d4"), depth=5)
+
+    ordered = heuristic(board)
+    assert ordered[2:4] == [deep, shallow]
+    assert heuristic.history[chess.C3, chess.D4] == 0
+
+    heuristic.new_search()
+    assert heuristic.history[chess.H2, chess.H3] == 4
@@ -0,0 +1,82 @@
+""" Tests for node store of Monte Carlo tree search """
+import sys
+
+sys.path.append("..")
+
+import chess  # type: ignore
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from chessmate.mcts import *
+
+
+@pytest.fixture
+def tree():
+    """ Sets up tree with root expanded by legal moves of starting board """
+    tree = MCTSTree(capacity=4)
+    moves = list(chess.Board().legal_moves)
+    tree.expand(0, moves, np.full(len(moves), 1 / len(moves)))
+    return tree
+
+
+@pytest.mark.parametrize("uci", ["e2e4", "a7a8q", "b2b1n", "e1g1"])
+def test_tree_stores_moves_in_16_bits(uci):
+    """ Tests that moves survive packing into move field of nodes """
+    move = chess.Move.from_uci(uci)
+    tree = MCTSTree()
+    tree.expand(0, [move], np.ones(1))
+    assert tree.move(tree.children(0)[0]) == move
+
+
+def test_tree_grows_to_fit_children(tree):
+    """ Tests that node store doubles to fit expanded children """
+    assert len(tree) == 21
+    assert len(tree.nodes) == 32
+    assert tree.expanded(0)
+    assert not tree.expanded(1)
+    assert {tree.move(child) for child in tree.children(0)} == set(
+        chess.Board().legal_moves
+    )
+
+
+def test_uct_tries_unvisited_children_first(tree):
+    """ Tests that UCT visits every child before revisiting any """
+    selected = set()
+    for _ in range(20):
+        child = tree.select_child(0, exploration=1.4)
+        selected.add(child)
+        tree.backpropagate([0, child], [0.5, 1.0])
+    assert selected == set(tree.children(0).tolist())
+
+
+def test_virtual_visits_steer_selection(tree):
+    """ Tests that a child with playouts in flight looks worse """
+    for child in tree.children(0):
+        tree.backpropagate([0, child], [0.5, 0.5])
+    first = tree.select_child(0, exploration=1.4, puct=True)
+    tree.add_virtual_visit([0, first], 5)
+    assert tree.select_child(0, exploration=1.4, puct=True) != first
+    tree.add_virtual_visit([0, first], -5)
+    assert not tree.nodes["virtual"].any()
+
+
+def test_subtree_keeps_statistics_of_line(tree):
+    """ Tests that subtree is rooted at node with contiguous children and
+    statistics of line played """
+    e4 = tree.find([chess.Move.from_uci("e2e4")])
+    board = chess.Board()
+    board.push_uci("e2e4")
+    replies = list(board.legal_moves)
+    tree.expand(e4, replies, np.full(len(replies), 1 / len(replies)))
+    e5 = tree.find([chess.Move.from_uci("e2e4"), chess.Move.from_uci("e7e5")])
+    tree.backpropagate([0, e4, e5], [0.5, 1.0, 0.0])
+
+    subtree = tree.subtree(e4)
+    assert len(subtree) == 1 + len(replies)
+    assert subtree.nodes["visits"][0] == 1
+    assert subtree.nodes["parent"][0] == -1
+    node = subtree.find([chess.Move.from_uci("e7e5")])
+    assert subtree.nodes["parent"][node] == 0
+    assert subtree.nodes["value"][node] == 0.0
+    assert subtree.principal_variation() == [chess.Move.from_uci("e7e5")]
+    assert tree.find([chess.Move.from_uci("e7e5")]) == -1
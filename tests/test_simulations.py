@@ -10,7 +10,7 @@ import chess
 import chess.pgn
 import pytest
 
-from chessmate.engines import AvoidCapture, CaptureHighestValue
+from chessmate.engines import AvoidCapture, CaptureHighestValue, MiniMax
 from chessmate.simulations import *
 from chessmate.utils import load_fen, not_raises
 
@@ -197,3 +197,85 @@ def test_all_fen_maps_are_valid_positions(setup_engines):
         simulator.fen = FEN_MAPS[f]
         simulator.play_game()
         assert simulator.fen == FEN_MAPS[f]
+
+
+def test_playground_aggregates_search_statistics(setup_engines):
+    """ Tests that statistics of engines collecting them are summed per game
+    and over all games """
+    engine = MiniMax(color=chess.WHITE, depth=1)
+    engine.collect_statistics = True
+    simulator = ChessPlayground(engine, setup_engines[1])
+    simulator.fen = load_fen("white_to_mate")
+    simulator.play_multiple_games(2)
+
+    assert len(simulator.all_search_statistics) == 2
+    assert all(black is None for _, black in simulator.all_search_statistics)
+    white, black = simulator.search_statistics()
+    assert black is None
+    assert white.nodes == sum(
+        game[0].nodes for game in simulator.all_search_statistics
+    )
+    assert white.searches > 0
+
+
+def _play_player_move(playvs, move):
+    """ Plays player move without prompting for input """
+    playvs.board.push(move)
+    playvs.append_move_to_tree(move)
+
+
+@pytest.mark.parametrize("expected_reply", [True, False])
+def test_playvs_ponders_expected_reply(monkeypatch, expected_reply):
+    """ Tests that engine ponders on reply expected from its principal
+    variation, playing pondered move on a hit and discarding pondering on
+    a miss """
+    monkeypatch.setattr(PlayVsEngine, "display_board", lambda *args: None)
+    engine = MiniMax(color=chess.BLACK, depth=2)
+    playvs = PlayVsEngine(engine)
+    playvs.ponder = True
+    playvs.game.setup(playvs.board)
+    playvs.node = playvs.game
+
+    _play_player_move(playvs, chess.Move.from_uci("e2e4"))
+    playvs.engine_move()
+    expected = playvs._ponder_move
+    assert playvs._ponder_thread is not None
+
+    if expected_reply:
+        reply = expected
+    else:
+        reply = next(m for m in playvs.board.legal_moves if m != expected)
+    _play_player_move(playvs, reply)
+    # Don't ponder on following move
+    playvs.ponder = False
+    move = playvs.engine_move()
+
+    assert playvs.board.move_stack[-1] == move
+    assert playvs.ponder_hits == int(expected_reply)
+    assert playvs.ponder_misses == int(not expected_reply)
+    assert len(engine.material_difference) == 2
+
+
+def test_playvs_ponder_error_keeps_material_difference(monkeypatch):
+    """ Tests that an exception raised while pondering is raised once
+    pondering stops, without dropping material difference of last move """
+    monkeypatch.setattr(PlayVsEngine, "display_board", lambda *args: None)
+    engine = MiniMax(color=chess.BLACK, depth=2)
+    playvs = PlayVsEngine(engine)
+    playvs.ponder = True
+    playvs.game.setup(playvs.board)
+    playvs.node = playvs.game
+
+    def failing_search(*args, **kwargs):
+        raise RuntimeError("search failed")
+
+    _play_player_move(playvs, chess.Move.from_uci("e2e4"))
+    monkeypatch.setattr(engine, "search_move", failing_search)
+    playvs.engine_move()
+    _play_player_move(playvs, playvs._ponder_move)
+
+    with pytest.raises(RuntimeError):
+        playvs.stop_pondering()
+    assert playvs._ponder_thread is None
+    assert len(engine.material_difference) == 1
+    assert playvs.ponder_hits == playvs.ponder_misses == 0
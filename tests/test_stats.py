@@ -0,0 +1,60 @@
+""" Tests for search statistics """
+import sys
+
+sys.path.append("..")
+
+import pytest  # type: ignore
+
+from chessmate.stats import *
+
+
+@pytest.fixture
+def filled_statistics():
+    """ Sets up statistics of a single search """
+    stats = SearchStatistics()
+    stats.nodes = 100
+    stats.interior_nodes = 20
+    stats.moves_searched = 80
+    stats.tt_probes = 40
+    stats.tt_hits = 10
+    stats.beta_cutoffs = 8
+    stats.first_move_cutoffs = 6
+    stats.searches = 1
+    stats.depth = 2
+    stats.elapsed = 0.5
+    stats.times[EVALUATION] = 0.25
+    return stats
+
+
+def test_search_statistics_rates(filled_statistics):
+    """ Tests that rates are derived from counters """
+    stats = filled_statistics
+    assert stats.tt_hit_rate() == 0.25
+    assert stats.cutoff_rate() == 0.4
+    assert stats.first_move_cutoff_rate() == 0.75
+    assert stats.branching_factor() == 4
+    assert stats.effective_branching_factor() == pytest.approx(10)
+    assert stats.nodes_per_second() == 200
+
+
+def test_search_statistics_empty_rates_are_zero():
+    """ Tests that rates of statistics without searches don't divide by
+    zero """
+    stats = SearchStatistics()
+    assert all(value == 0 for value in stats.to_dict().values())
+
+
+def test_search_statistics_combine_sums_counters_and_times(
+    filled_statistics,
+):
+    """ Tests that combined statistics sum counters & component timings """
+    total = SearchStatistics.combine([filled_statistics, filled_statistics])
+
+    assert total.nodes == 200
+    assert total.searches == 2
+    assert total.elapsed == 1.0
+    assert total.times[EVALUATION] == 0.5
+    # Rates of identical searches are unchanged
+    assert total.tt_hit_rate() == filled_statistics.tt_hit_rate()
+    assert total.effective_branching_factor() == pytest.approx(10)
+    assert set(COMPONENTS) <= set(total.times)
@@ -1,14 +1,21 @@
 """ Tests for transposition table functionality """
+import multiprocessing
+import pickle
 import random
 import sys
 
 sys.path.append("..")
 
 import chess  # type: ignore
+import numpy as np  # type: ignore
 import pytest  # type: ignore
 
 from chessmate.analysis import PiecePositionEvaluation
+from chessmate.constants.misc import (ALWAYS_REPLACE, DEPTH_PREFERRED, EXACT,
+                                      LOWER_BOUND, PROOF_INFINITY, TWO_TIER,
+                                      UPPER_BOUND)
 from chessmate.transpositions import *
+from chessmate.utils import load_fen
 
 
 # Since hashes are randomly generated, seed hashed for tests for consistency
@@ -269,3 +276,335 @@ def test_transposition_table_evaluate_from_fen(known_zobrist_hash):
     # evaluation is returned
     returned_eval = table.get_evaluation_from_fen(opening_sequence_fen)
     assert returned_eval in table.stored_values.values()
+
+
+def test_transposition_table_store_and_probe_entry():
+    """ Tests that stored search results are retrievable with depth, bound
+    type and best move """
+    table = TranspositionTable(zobrist_hash_function)
+    board = chess.Board()
+    hash_ = table.hash_current_board(board)
+    move = chess.Move.from_uci("e2e4")
+    table.store(hash_, 35, 3, LOWER_BOUND, move)
+
+    entry = table.probe(hash_)
+    assert entry == TranspositionEntry(35, 3, LOWER_BOUND, move)
+    assert hash_ in table
+    assert table.probe(hash_ + 1) is None
+
+
+def test_transposition_table_shallow_entry_keeps_deeper_entry():
+    """ Tests that storing a shallower result doesn't replace a deeper one
+    but a deeper result does replace a shallower one """
+    table = TranspositionTable(zobrist_hash_function)
+    hash_ = table.hash_current_board(chess.Board())
+    table.store(hash_, 10, 4, EXACT, chess.Move.null())
+    table.store(hash_, 20, 2, EXACT, chess.Move.null())
+    assert table.probe(hash_).value == 10
+
+    table.store(hash_, 30, 5, UPPER_BOUND, chess.Move.null())
+    assert table.probe(hash_).value == 30
+    assert table.probe(hash_).flag == UPPER_BOUND
+
+
+def test_hash_position_includes_side_castling_and_en_passant():
+    """ Tests that hash_position distinguishes positions with identical
+    piece placement but different side to move, castling rights or en
+    passant square """
+    table = TranspositionTable(zobrist_hash_function)
+    placement = "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR"
+    fens = [
+        f"{placement} w KQkq - 0 1",
+        f"{placement} b KQkq - 0 1",
+        f"{placement} w Kkq - 0 1",
+        f"{placement} w KQkq e6 0 1",
+    ]
+    hashes = [table.hash_position(chess.Board(fen=fen)) for fen in fens]
+
+    assert len(set(hashes)) == len(fens)
+
+
+def test_make_move_matches_full_hash():
+    """ Tests that incrementally updated hash matches full hash of board
+    after each move, including castling, en passant, promotions and null
+    moves """
+    table = TranspositionTable(zobrist_hash_function)
+    sequences = [
+        # Castling both sides & en passant capture
+        ["e2e4", "g8f6", "e4e5", "d7d5", "e5d6", "e7e6", "g1f3", "f8e7",
+         "f1e2", "e8g8", "e1g1", "b8c6", "d2d4", "d8d6", "b1c3", "c8d7",
+         "c1e3", "a8c8", "d1d2", "f8e8"],
+        # Promotions with capture & queenside castling
+        ["b2b4", "h7h5", "b4b5", "h5h4", "b5b6", "h4h3", "b6a7", "h3g2",
+         "a7b8q", "g2h1n", "b1c3", "g8f6", "c1b2", "e7e6", "d2d3", "f8e7",
+         "d1d2", "e8g8", "e1c1"],
+    ]
+    for sequence in sequences:
+        board = chess.Board()
+        hash_ = table.hash_position(board)
+        for uci in sequence:
+            move = chess.Move.from_uci(uci)
+            assert move in board.legal_moves
+            hash_ = table.make_move(board, move, hash_)
+            assert hash_ == table.hash_position(board)
+        hash_ = table.make_move(board, chess.Move.null(), hash_)
+        assert hash_ == table.hash_position(board)
+
+
+def test_transposition_table_size_is_fixed():
+    """ Tests that slots are preallocated within the size given in
+    megabytes and that storing many results doesn't grow the table """
+    table = TranspositionTable(zobrist_hash_function, size_mb=0.5)
+    assert table.slots.nbytes <= 0.5 * 2 ** 20
+    num_slots = len(table.slots)
+
+    for hash_ in range(1, 5 * num_slots, 3):
+        table.store(hash_, 0, 1, EXACT, chess.Move.null())
+    assert len(table.slots) == num_slots
+    assert len(table) <= num_slots
+
+
+def test_transposition_table_invalid_replacement_raises_valueerror():
+    """ Tests that unknown replacement scheme raises ValueError """
+    with pytest.raises(ValueError):
+        TranspositionTable(zobrist_hash_function, replacement="random")
+
+
+@pytest.mark.parametrize(
+    "replacement, expected_values",
+    [
+        (DEPTH_PREFERRED, (10, None)),
+        (ALWAYS_REPLACE, (None, 20)),
+        (TWO_TIER, (10, 20)),
+    ],
+)
+def test_transposition_table_replacement_schemes(
+    replacement, expected_values
+):
+    """ Tests which of two colliding results is kept under each
+    replacement scheme when the shallower result is stored second """
+    table = TranspositionTable(
+        zobrist_hash_function, size_mb=0.01, replacement=replacement
+    )
+    deep_hash = 12345
+    shallow_hash = deep_hash + len(table.slots)
+    table.store(deep_hash, 10, 5, EXACT, chess.Move.null())
+    table.store(shallow_hash, 20, 1, EXACT, chess.Move.null())
+
+    values = tuple(
+        None if table.probe(h) is None else table.probe(h).value
+        for h in (deep_hash, shallow_hash)
+    )
+    assert values == expected_values
+
+
+def test_transposition_table_new_search_ages_deeper_entries():
+    """ Tests that results of a previous search are replaced by shallower
+    results of the current search """
+    table = TranspositionTable(
+        zobrist_hash_function, size_mb=0.01, replacement=DEPTH_PREFERRED
+    )
+    old_hash = 12345
+    new_hash = old_hash + len(table.slots)
+    table.store(old_hash, 10, 5, EXACT, chess.Move.null())
+    table.new_search()
+    table.store(new_hash, 20, 1, EXACT, chess.Move.null())
+
+    assert table.probe(old_hash) is None
+    assert table.probe(new_hash).value == 20
+
+
+def test_encode_decode_move_roundtrip():
+    """ Tests that moves packed into slots unpack to same move """
+    for uci in ("e2e4", "a7a8q", "h2h1n", "e1g1"):
+        move = chess.Move.from_uci(uci)
+        assert decode_move(encode_move(move)) == move
+    assert decode_move(encode_move(chess.Move.null())) == chess.Move.null()
+
+
+def _store_in_shared_table(table):
+    table.store(12345, 7.0, 3, EXACT, chess.Move.from_uci("e2e4"))
+
+
+def test_shared_transposition_table_visible_across_processes():
+    """ Tests that entries stored by another process are probed by parent,
+    and that zobrist keys are shared """
+    table = TranspositionTable(zobrist_hash_function, size_mb=1)
+    table.store(1, 5.0, 1, EXACT, chess.Move.null())
+    shared = SharedTranspositionTable.from_table(table)
+    assert shared.probe(1).value == 5.0
+    assert shared.hash_position(chess.Board()) == table.hash_position(
+        chess.Board()
+    )
+
+    for method in ("fork", "spawn"):
+        process = multiprocessing.get_context(method).Process(
+            target=_store_in_shared_table, args=(shared,)
+        )
+        process.start()
+        process.join()
+        assert process.exitcode == 0
+        assert shared.probe(12345) == TranspositionEntry(
+            7.0, 3, EXACT, chess.Move.from_uci("e2e4")
+        )
+        shared.clear()
+
+    shared.close()
+    shared.unlink()
+
+
+def test_shared_transposition_table_rejects_mixed_slot():
+    """ Tests that a slot with fields from two different stores fails
+    verification instead of returning a corrupt entry """
+    table = SharedTranspositionTable(zobrist_hash_function, size_mb=1)
+    table.store(12345, 7.0, 3, EXACT, chess.Move.from_uci("e2e4"))
+    index = 12345 & table._index_mask
+    table.slots["value"][index] = -7.0
+
+    assert table.probe(12345) is None
+    table.close()
+    table.unlink()
+
+
+def _store_repeatedly(table, hash_, value, stores):
+    move = chess.Move.from_uci("e2e4")
+    for i in range(stores):
+        table.store(hash_, value, i % 10, EXACT, move)
+
+
+def test_shared_transposition_table_concurrent_stores_stay_consistent():
+    """ Tests that probes racing stores of other processes to the same slot
+    only ever see complete entries """
+    table = SharedTranspositionTable(
+        zobrist_hash_function, size_mb=1, replacement=ALWAYS_REPLACE
+    )
+    # Same index, different positions
+    hashes = (1, 1 + (table._index_mask + 1) * 7)
+    processes = [
+        multiprocessing.get_context("fork").Process(
+            target=_store_repeatedly, args=(table, hash_, value, 20000)
+        )
+        for hash_, value in zip(hashes, (1.0, 2.0))
+    ]
+    for process in processes:
+        process.start()
+    while any(process.is_alive() for process in processes):
+        for hash_, value in zip(hashes, (1.0, 2.0)):
+            entry = table.probe(hash_)
+            assert entry is None or entry.value == value
+    for process in processes:
+        process.join()
+
+    table.close()
+    table.unlink()
+
+
+def test_transposition_table_save_and_load(tmp_path):
+    """ Tests that loaded table hashes identically and keeps entries and
+    stored values of saved table """
+    table = TranspositionTable(zobrist_hash_function, size_mb=1)
+    board = chess.Board(fen=load_fen("in_progress_fen"))
+    hash_ = table.hash_position(board)
+    table.store(hash_, 42.0, 5, LOWER_BOUND, chess.Move.from_uci("e2e4"))
+    table.store_current_board(board)
+    table.new_search()
+    path = str(tmp_path / "table.bin")
+    table.save(path)
+
+    loaded = TranspositionTable.load(path)
+    assert loaded.hash_position(board) == hash_
+    assert loaded.probe(hash_) == table.probe(hash_)
+    assert loaded.stored_values == table.stored_values
+    assert loaded.generation == table.generation
+    assert len(loaded) == len(table)
+    assert isinstance(loaded.slots, np.memmap)
+    assert isinstance(loaded.stored_values.mapped, np.memmap)
+
+
+def test_transposition_table_loads_stored_values_lazily(tmp_path):
+    """ Tests that stored values of loaded table are looked up in file,
+    take values stored since loading and survive pickling & saving """
+    table = TranspositionTable(zobrist_hash_function, size_mb=1)
+    for fen in load_fen("not_mated_fens") + [load_fen("starting_fen")]:
+        table.store_current_board(chess.Board(fen=fen))
+    path = str(tmp_path / "table.bin")
+    table.save(path)
+
+    loaded = TranspositionTable.load(path)
+    values = loaded.stored_values
+    assert len(values) == len(table.stored_values) == 3
+    assert -1 not in values and 2 ** 64 not in values
+    key, value = next(iter(table.stored_values.items()))
+    assert values[key] == value
+
+    values[key] = 7.0
+    values[1] = 3.0
+    del values[next(k for k in table.stored_values if k != key)]
+    assert len(values) == 3 and values[key] == 7.0
+    assert pickle.loads(pickle.dumps(values)) == values
+
+    loaded.save(str(tmp_path / "resaved.bin"))
+    resaved = TranspositionTable.load(str(tmp_path / "resaved.bin"))
+    assert resaved.stored_values == values
+
+    # Default mode doesn't write stores back to file
+    loaded.store(1, 1.0, 1, EXACT, chess.Move.null())
+    assert TranspositionTable.load(path).probe(1) is None
+
+
+def test_shared_transposition_table_saves_unpacked_keys(tmp_path):
+    """ Tests that shared tables save hashes rather than verification keys """
+    table = SharedTranspositionTable(zobrist_hash_function, size_mb=1)
+    table.store(12345, 7.0, 3, EXACT, chess.Move.from_uci("e2e4"))
+    path = str(tmp_path / "table.bin")
+    table.save(path)
+
+    assert TranspositionTable.load(path).probe(12345).value == 7.0
+    table.close()
+    table.unlink()
+
+
+def test_transposition_table_load_invalid_file_raises_valueerror(tmp_path):
+    """ Tests that loading a file not written by save raises ValueError """
+    path = tmp_path / "table.bin"
+    path.write_bytes(b"not a table")
+    with pytest.raises(ValueError):
+        TranspositionTable.load(str(path))
+
+
+def test_proof_table_keys_entries_by_moves_left():
+    """ Tests that proof numbers are stored per moves left to mate """
+    table = ProofTable(size_mb=1)
+    table.store(12345, 2, 0, PROOF_INFINITY, 10)
+    table.store(12345, 1, PROOF_INFINITY, 0, 5)
+
+    assert table.probe(12345, 2) == (0, PROOF_INFINITY)
+    assert table.probe(12345, 1) == (PROOF_INFINITY, 0)
+    assert table.probe(12345, 3) is None
+    table.store(12345, 2, 3, 4, 20)
+    assert table.probe(12345, 2) == (3, 4)
+    assert len(table) == 2
+
+    table.clear()
+    assert len(table) == 0 and table.probe(12345, 2) is None
+
+
+def test_proof_table_evicts_entries_of_least_work():
+    """ Tests that full buckets keep entry of most work """
+    table = ProofTable(size_mb=1)
+    stride = len(table.slots)
+    # Hashes of the same bucket
+    table.store(2, 1, 1, 1, 100)
+    table.store(2 + stride, 1, 2, 2, 5)
+    table.store(2 + 2 * stride, 1, 3, 3, 50)
+
+    assert table.evictions == 1
+    assert table.probe(2, 1) == (1, 1)
+    assert table.probe(2 + stride, 1) is None
+    assert table.probe(2 + 2 * stride, 1) == (3, 3)
+
+    # More work takes first slot, demoting its entry
+    table.store(2 + 3 * stride, 1, 4, 4, 200)
+    assert table.probe(2 + 3 * stride, 1) == (4, 4)
+    assert table.probe(2, 1) == (1, 1)
+    assert table.probe(2 + 2 * stride, 1) is None